@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("matplotlib")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from vega_sys3 import LazyModuleDict, ProjectDatabase, ProjectFile, RTLAnalyzer  # noqa: E402
+
+
+def write_design(rtl):
+    rtl.mkdir()
+    (rtl / "top.sv").write_text("""
+module top (input logic clk, output logic [7:0] o);
+    logic [7:0] mid;
+    prod u_p (.clk(clk), .q(mid));
+    cons u_c (.clk(clk), .d(mid), .o(o));
+endmodule
+""")
+    (rtl / "prod.sv").write_text("module prod (input logic clk, output logic [7:0] q);\nendmodule\n")
+    (rtl / "cons.sv").write_text("module cons (input logic clk, input logic [7:0] d, output logic [7:0] o);\nendmodule\n")
+    (rtl / "defs_pkg.sv").write_text("package defs_pkg;\n    localparam int W = 8;\nendpackage\n")
+
+
+def test_restore_with_package_reparses_nothing(tmp_path):
+    write_design(tmp_path / "rtl")
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+
+    hierarchy = RTLAnalyzer.extract_hierarchy(str(tmp_path / "rtl"))
+    data = ProjectFile.hierarchy_to_dict(hierarchy, str(project_dir))
+    assert "defs_pkg.sv" in data["file_hashes"]
+
+    restored, stale = ProjectFile.restore_hierarchy(data, str(project_dir))
+    assert stale == []
+    assert restored.connections == hierarchy.connections
+    assert set(restored.submodules) == {"prod", "cons"}
+
+
+def test_changed_package_is_the_only_stale_source(tmp_path):
+    write_design(tmp_path / "rtl")
+    hierarchy = RTLAnalyzer.extract_hierarchy(str(tmp_path / "rtl"))
+    data = ProjectFile.hierarchy_to_dict(hierarchy, str(tmp_path))
+
+    (tmp_path / "rtl" / "defs_pkg.sv").write_text("package defs_pkg;\n    localparam int W = 16;\nendpackage\n")
+    restored, stale = ProjectFile.restore_hierarchy(data, str(tmp_path))
+    assert stale == ["defs_pkg.sv"]
+    assert restored.get_paths() == [("prod", "cons")]
+
+
+def test_database_with_package_loads_lazily(tmp_path):
+    write_design(tmp_path / "rtl")
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    hierarchy = RTLAnalyzer.extract_hierarchy(str(tmp_path / "rtl"))
+    db_file = project_dir / f"top{ProjectDatabase.EXTENSION}"
+    ProjectDatabase.save(str(db_file), ProjectFile.hierarchy_to_dict(hierarchy, str(project_dir)), {}, {})
+
+    database = ProjectDatabase(str(db_file))
+    try:
+        loaded, stale = database.load_hierarchy(str(project_dir))
+        assert stale == []
+        assert isinstance(loaded.submodules, LazyModuleDict)
+        assert loaded.get_paths() == [("prod", "cons")]
+    finally:
+        database.close()
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("matplotlib")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from vega_sys3 import RTLAnalyzer  # noqa: E402
+
+
+TOP = """
+module top #(parameter W = 8) (input logic clk, output logic [W-1:0] y);
+    sub #(.W($clog2(W)), .D(2)) u_sub (.clk(clk), .y(y));
+    leaf u_leaf (.clk(clk));
+endmodule
+"""
+
+
+def test_parameterized_instances_are_extracted():
+    instances = RTLAnalyzer._extract_instances(TOP)
+    assert instances == {"u_sub": "sub", "u_leaf": "leaf"}
+
+    connections = RTLAnalyzer._extract_instance_connections(TOP, instances)
+    assert connections["u_sub"] == {"clk": "clk", "y": "y"}
+
+
+def test_declarations_are_not_instances():
+    content = TOP + """
+module other (input logic a);
+    function automatic int twice(int v); return 2 * v; endfunction
+    always_comb begin if (a) begin end end
+endmodule
+"""
+    instances = RTLAnalyzer._extract_instances(content)
+    assert "top" not in instances and "other" not in instances
+    assert "twice" not in instances
+    assert set(instances.values()) == {"sub", "leaf"}
+
+
+def test_top_level_with_parameterized_children(tmp_path):
+    (tmp_path / "top.sv").write_text(TOP)
+    (tmp_path / "sub.sv").write_text("module sub #(parameter W = 1, D = 1) (input logic clk, output logic [W-1:0] y);\nendmodule\n")
+    (tmp_path / "leaf.sv").write_text("module leaf (input logic clk);\nendmodule\n")
+
+    hierarchy = RTLAnalyzer.extract_hierarchy(str(tmp_path))
+    assert hierarchy.top_level.name == "top"
+    assert hierarchy.instance_tree().index() == {"top": "top", "top.u_sub": "sub", "top.u_leaf": "leaf"}
+
+
+def test_paths_follow_shared_nets(tmp_path):
+    (tmp_path / "top.sv").write_text("""
+module top (input logic clk, output logic [7:0] o1, output logic [7:0] o2);
+    logic [7:0] mid;
+    prod u_p (.clk(clk), .q(mid));
+    cons u_c (.clk(clk), .d(mid), .o(o1));
+    cons u_c2 (.clk(clk), .d(mid[7:0]), .o(o2));
+endmodule
+""")
+    (tmp_path / "prod.sv").write_text("module prod (input logic clk, output logic [7:0] q);\nendmodule\n")
+    (tmp_path / "cons.sv").write_text("module cons (input logic clk, input logic [7:0] d, output logic [7:0] o);\nendmodule\n")
+
+    hierarchy = RTLAnalyzer.extract_hierarchy(str(tmp_path))
+    assert hierarchy.get_paths() == [("prod", "cons")]
+    assert hierarchy.get_instance_paths() == [("u_p", "prod", "u_c", "cons"), ("u_p", "prod", "u_c2", "cons")]
@@ -15,32 +15,673 @@ import re
 import sys
 import random 
 import math
+import ast
+import operator
 import json
-import zipfile
+import csv
+import xml.etree.ElementTree as ET
+import tarfile
+import gzip
+import struct
 from datetime import datetime
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
+from tkinter import ttk, filedialog, messagebox, scrolledtext, font as tkfont
 from jinja2 import Environment, FileSystemLoader, TemplateNotFound
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
 import traceback
 import subprocess
 import threading
+import time
+import argparse
+import shutil
+import hashlib
+import sqlite3
+import zlib
+import heapq
+import mmap
+import bisect
+from array import array
+import contextlib
+import cProfile
+import pstats
+import statistics
+import tempfile
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+#---------------------------------------------------------------
+# Profiling
+#---------------------------------------------------------------
+class Tracer:
+    """Opt-in timing spans and profiler capture across the generation pipeline
+    
+    Disabled by default: span() then returns a shared no-op context, so the
+    instrumentation costs one attribute check. When started, every span is
+    recorded with its thread and can be written as a Chrome trace
+    (chrome://tracing, Perfetto) or a speedscope file. cProfile only sees
+    the thread that started it; pyinstrument is used if it is installed.
+    """
+    PROFILERS = ('cprofile', 'pyinstrument')
+    _NO_SPAN = contextlib.nullcontext()
+    
+    def __init__(self):
+        self.enabled = False
+        self.events: List[Tuple[str, str, float, float, int, Dict]] = []  # (name, category, start, end, thread, args)
+        self.profiler_name = None
+        self._profiler = None
+        self._origin = time.perf_counter()
+    
+    def start(self, profiler: Optional[str] = None):
+        """Clears previous events and starts recording (optionally under a profiler)"""
+        self.stop()
+        self.events = []
+        self._origin = time.perf_counter()
+        self._profiler = None
+        self.profiler_name = profiler
+        if profiler == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profiler == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)")
+            self._profiler = Profiler()
+            self._profiler.start()
+        elif profiler is not None:
+            raise ValueError(f"Unknown profiler: {profiler}")
+        self.enabled = True
+    
+    def stop(self):
+        """Stops recording; events and profiler results are kept until the next start"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+        elif self._profiler is not None:
+            self._profiler.stop()
+    
+    def span(self, name: str, category: str = 'vega', **args):
+        """Context manager timing one pipeline stage"""
+        if not self.enabled:
+            return self._NO_SPAN
+        return _TraceSpan(self, name, category, args)
+    
+    def summary(self) -> List[Dict]:
+        """Per-span totals, slowest first"""
+        totals = {}
+        for name, category, start, end, _, _ in self.events:
+            entry = totals.setdefault(name, {'name': name, 'category': category, 'count': 0,
+                                             'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += end - start
+            entry['max'] = max(entry['max'], end - start)
+        for entry in totals.values():
+            entry['mean'] = entry['total'] / entry['count']
+        return sorted(totals.values(), key=lambda e: e['total'], reverse=True)
+    
+    def profile_summary(self, limit: int = 15) -> List[Tuple[str, int, float, float]]:
+        """(function, calls, own time, cumulative time) of the top cProfile entries"""
+        if not isinstance(self._profiler, cProfile.Profile):
+            return []
+        stats = pstats.Stats(self._profiler).stats
+        rows = [(f"{func[2]} ({os.path.basename(func[0])}:{func[1]})", calls, own, cumulative)
+                for func, (_, calls, own, cumulative, _) in stats.items()]
+        return sorted(rows, key=lambda r: r[3], reverse=True)[:limit]
+    
+    def chrome_trace(self) -> Dict:
+        """Events in Chrome trace format (complete events, microseconds)"""
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                 'ts': round((start - self._origin) * 1e6, 3), 'dur': round((end - start) * 1e6, 3),
+                 'args': args}
+                for name, category, start, end, tid, args in self.events
+            ],
+            'displayTimeUnit': 'ms'
+        }
+    
+    def speedscope(self) -> Dict:
+        """Events in speedscope's evented format, one profile per thread"""
+        frames = {}
+        profiles = []
+        for tid in sorted({event[4] for event in self.events}):
+            spans = sorted((e for e in self.events if e[4] == tid), key=lambda e: (e[2], -e[3]))
+            events = []
+            stack = []  # (frame, end) of the open spans
+            
+            def close_until(at):
+                while stack and (at is None or stack[-1][1] <= at):
+                    frame, end = stack.pop()
+                    events.append({'type': 'C', 'frame': frame, 'at': end})
+            
+            for name, _, start, end, _, _ in spans:
+                start = (start - self._origin) * 1e6
+                end = (end - self._origin) * 1e6
+                close_until(start)
+                if stack:
+                    end = min(end, stack[-1][1])  # keep rounding from breaking the nesting
+                frame = frames.setdefault(name, len(frames))
+                events.append({'type': 'O', 'frame': frame, 'at': start})
+                stack.append((frame, end))
+            close_until(None)
+            profiles.append({
+                'type': 'evented', 'name': f"Thread {tid}", 'unit': 'microseconds',
+                'startValue': events[0]['at'], 'endValue': max(e['at'] for e in events), 'events': events
+            })
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': name} for name in frames]},
+            'profiles': profiles,
+            'name': 'VEGA trace',
+            'exporter': f"VEGA {TestbenchGenerator.GENERATOR_VERSION}"
+        }
+    
+    def write(self, path: str) -> List[str]:
+        """Writes the trace (speedscope for *.speedscope.json, Chrome trace otherwise)
+        and the profiler output next to it; returns the files written"""
+        data = self.speedscope() if path.endswith('.speedscope.json') else self.chrome_trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        written = [path]
+        stem = path[:-len('.json')] if path.endswith('.json') else path
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.dump_stats(f"{stem}.prof")
+            written.append(f"{stem}.prof")
+        elif self._profiler is not None:
+            from pyinstrument.renderers import SpeedscopeRenderer
+            with open(f"{stem}.pyinstrument.speedscope.json", 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output(SpeedscopeRenderer()))
+            written.append(f"{stem}.pyinstrument.speedscope.json")
+        return written
+
+class _TraceSpan:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+    
+    def __init__(self, tracer: Tracer, name: str, category: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.tracer.events.append((self.name, self.category, self.start, time.perf_counter(),
+                                   threading.get_ident(), self.args))
+        return False
+
+TRACER = Tracer()
+
+#---------------------------------------------------------------
+# Simulator Backends
+#---------------------------------------------------------------
+class SimulatorBackend:
+    """Base class describing how to drive one simulator"""
+    name = "base"
+    label = "Base"
+    executables: List[str] = []
+    supports_libraries = False  # separate compile libraries, so shards can compile in parallel
+
+    # Log dialect: tool-specific error/warning lines (UVM messages are common)
+    error_pattern = re.compile(r'^(?:UVM_FATAL|UVM_ERROR)\b(?!\s*:)')
+    warning_pattern = re.compile(r'^UVM_WARNING\b(?!\s*:)')
+    uvm_summary_pattern = re.compile(r'^(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)\s*:\s*(\d+)\s*$')
+
+    def __init__(self, uvm_home=None):
+        self.uvm_home = uvm_home
+
+    def is_available(self) -> bool:
+        """Checks that every required executable is in PATH"""
+        return all(shutil.which(exe) for exe in self.executables)
+
+    def compile_commands(self, sources: List[str], include_dirs: List[str] = None,
+                         defines: Dict[str, str] = None, library: Optional[str] = None) -> List[List[str]]:
+        """Commands that analyze the given source files (into library, if supported)"""
+        raise NotImplementedError
+
+    def elaborate_commands(self, top: str, snapshot: str = "sim", libraries: Optional[List[str]] = None,
+                           top_library: Optional[str] = None, waves: bool = False,
+                           sources: Optional[List[str]] = None) -> List[List[str]]:
+        """Commands that elaborate the compiled design (from libraries, if given) into a snapshot
+        
+        Snapshots are optimized without signal visibility unless waves is set.
+        Tools that compile and elaborate in one step build from sources here.
+        """
+        raise NotImplementedError
+
+    def run_command(self, snapshot: str = "sim", gui: bool = False,
+                    plusargs: Dict[str, str] = None, seed: Optional[int] = None) -> List[str]:
+        """Command that runs a simulation of the snapshot"""
+        raise NotImplementedError
+
+    def coverage_export_command(self, report_dir: str = "coverage_report") -> Optional[List[str]]:
+        """Command that exports collected coverage to a report, if supported"""
+        return None
+
+    def classify_line(self, line: str) -> Optional[str]:
+        """Returns 'error', 'warning' or None for a log line"""
+        line = line.strip()
+        if self.error_pattern.search(line):
+            return 'error'
+        if self.warning_pattern.search(line):
+            return 'warning'
+        return None
+
+    def summarize_log(self, lines) -> Dict[str, int]:
+        """Counts tool errors/warnings and reads the UVM report summary"""
+        summary = defaultdict(int)
+        for line in lines:
+            match = self.uvm_summary_pattern.match(line.strip())
+            if match:
+                summary[match.group(1)] = int(match.group(2))
+                continue
+            severity = self.classify_line(line)
+            if severity:
+                summary[severity] += 1
+        return dict(summary)
+
+    @staticmethod
+    def _plusarg_list(plusargs: Optional[Dict[str, str]]) -> List[str]:
+        args = []
+        for key, value in (plusargs or {}).items():
+            args.append(f"+{key}" if value is None else f"+{key}={value}")
+        return args
+
+    def _define_list(self, defines: Optional[Dict[str, str]], flag: str) -> List[str]:
+        args = []
+        for key, value in (defines or {}).items():
+            args.append(f"{flag}{key}" if value is None else f"{flag}{key}={value}")
+        return args
+
+
+class XSimBackend(SimulatorBackend):
+    """Vivado simulator (xvlog/xelab/xsim)"""
+    name = "xsim"
+    label = "Vivado XSIM"
+    executables = ['xvlog', 'xelab', 'xsim']
+    supports_libraries = True
+    error_pattern = re.compile(r'^(?:ERROR:|FATAL_ERROR:|UVM_FATAL\b(?!\s*:)|UVM_ERROR\b(?!\s*:))')
+    warning_pattern = re.compile(r'^(?:WARNING:|UVM_WARNING\b(?!\s*:))')
+
+    def compile_commands(self, sources, include_dirs=None, defines=None, library=None):
+        cmd = ['xvlog', '-sv', '-d', 'UVM_NO_DPI']
+        for inc in ([f'{self.uvm_home}/src'] if self.uvm_home else []) + list(include_dirs or []):
+            cmd += ['-i', inc]
+        for define in self._define_list(defines, ''):
+            cmd += ['-d', define]
+        if self.uvm_home:
+            cmd += ['-L', 'uvm']
+        if library:
+            cmd += ['--work', library]
+        return [cmd + list(sources)]
+
+    def elaborate_commands(self, top, snapshot="sim", libraries=None, top_library=None, waves=False,
+                           sources=None):
+        cmd = ['xelab', '-debug', 'typical' if waves else 'off', '-timescale', '1ns/1ps']
+        if self.uvm_home:
+            cmd += ['-L', 'uvm']
+        for library in libraries or []:
+            cmd += ['-L', library]
+        return [cmd + [f"{top_library}.{top}" if top_library else top, '-s', snapshot]]
+
+    def run_command(self, snapshot="sim", gui=False, plusargs=None, seed=None):
+        cmd = ['xsim', snapshot, '-gui' if gui else '-R']
+        for arg in self._plusarg_list(plusargs):
+            cmd += ['-testplusarg', arg[1:]]
+        if seed is not None:
+            cmd += ['-sv_seed', str(seed)]
+        return cmd
+
+    def coverage_export_command(self, report_dir="coverage_report"):
+        return ['xcrg', '-report_format', 'html', '-dir', 'xsim.covdb', '-report_dir', report_dir]
+
+
+class QuestaBackend(SimulatorBackend):
+    """Siemens Questa / ModelSim (vlog/vopt/vsim)"""
+    name = "questa"
+    label = "Questa"
+    executables = ['vlib', 'vlog', 'vopt', 'vsim']
+    supports_libraries = True
+    error_pattern = re.compile(r'^(?:# )?(?:\*\* (?:Error|Fatal)\b|UVM_FATAL\b(?!\s*:)|UVM_ERROR\b(?!\s*:))')
+    warning_pattern = re.compile(r'^(?:# )?(?:\*\* Warning\b|UVM_WARNING\b(?!\s*:))')
+    uvm_summary_pattern = re.compile(r'^(?:# )?(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)\s*:\s*(\d+)\s*$')
+
+    def compile_commands(self, sources, include_dirs=None, defines=None, library=None):
+        library = library or 'work'
+        cmd = ['vlog', '-sv', '-timescale', '1ns/1ps', '-work', library]
+        for inc in ([f'{self.uvm_home}/src'] if self.uvm_home else []) + list(include_dirs or []):
+            cmd.append(f'+incdir+{inc}')
+        cmd += self._define_list(defines, '+define+')
+        return [['vlib', library], cmd + list(sources)]
+
+    def elaborate_commands(self, top, snapshot="sim", libraries=None, top_library=None, waves=False,
+                           sources=None):
+        access = ['+acc=npr'] if waves else []
+        if not libraries:
+            return [['vopt'] + access + [top, '-o', snapshot]]
+        # The optimized snapshot goes to 'work' so run_command() finds it
+        cmd = ['vopt'] + access
+        for library in libraries:
+            cmd += ['-L', library]
+        return [['vlib', 'work'], cmd + [f"{top_library}.{top}" if top_library else top, '-o', snapshot]]
+
+    def run_command(self, snapshot="sim", gui=False, plusargs=None, seed=None):
+        cmd = ['vsim', snapshot] if gui else ['vsim', '-c', snapshot, '-do', 'run -all; quit -f']
+        cmd += self._plusarg_list(plusargs)
+        if seed is not None:
+            cmd += ['-sv_seed', str(seed)]
+        return cmd
+
+    def coverage_export_command(self, report_dir="coverage_report"):
+        return ['vcover', 'report', '-details', '-html', '-output', report_dir, 'coverage.ucdb']
+
+
+class VCSBackend(SimulatorBackend):
+    """Synopsys VCS (vlogan/vcs/simv)"""
+    name = "vcs"
+    label = "VCS"
+    executables = ['vlogan', 'vcs']
+    error_pattern = re.compile(r'^(?:Error-\[|UVM_FATAL\b(?!\s*:)|UVM_ERROR\b(?!\s*:))')
+    warning_pattern = re.compile(r'^(?:Warning-\[|Lint-\[|UVM_WARNING\b(?!\s*:))')
+
+    def compile_commands(self, sources, include_dirs=None, defines=None, library=None):
+        # Libraries need synopsys_sim.setup mappings, so VCS always uses the default library
+        cmd = ['vlogan', '-full64', '-sverilog', '-ntb_opts', 'uvm', '-timescale=1ns/1ps']
+        for inc in include_dirs or []:
+            cmd.append(f'+incdir+{inc}')
+        cmd += self._define_list(defines, '+define+')
+        return [cmd + list(sources)]
+
+    def elaborate_commands(self, top, snapshot="sim", libraries=None, top_library=None, waves=False,
+                           sources=None):
+        access = ['-debug_access+r'] if waves else []
+        return [['vcs', '-full64', '-ntb_opts', 'uvm'] + access + [top, '-o', snapshot]]
+
+    def run_command(self, snapshot="sim", gui=False, plusargs=None, seed=None):
+        cmd = [f'./{snapshot}']
+        if gui:
+            cmd.append('-gui')
+        cmd += self._plusarg_list(plusargs)
+        if seed is not None:
+            cmd.append(f'+ntb_random_seed={seed}')
+        return cmd
+
+    def coverage_export_command(self, report_dir="coverage_report"):
+        return ['urg', '-dir', 'sim.vdb', '-report', report_dir]
+
+
+class VerilatorBackend(SimulatorBackend):
+    """Verilator 5.x (compiles and elaborates in one step, no GUI)"""
+    name = "verilator"
+    label = "Verilator"
+    executables = ['verilator']
+    error_pattern = re.compile(r'^(?:%Error\b|UVM_FATAL\b(?!\s*:)|UVM_ERROR\b(?!\s*:))')
+    warning_pattern = re.compile(r'^(?:%Warning\b|UVM_WARNING\b(?!\s*:))')
+
+    def compile_commands(self, sources, include_dirs=None, defines=None, library=None):
+        # Verilator needs the top module to build, so the sources are passed
+        # to elaborate_commands() instead (+incdir+/+define+ arguments included)
+        return []
+
+    def elaborate_commands(self, top, snapshot="sim", libraries=None, top_library=None, waves=False,
+                           sources=None):
+        cmd = ['verilator', '--binary', '--timing', '-Wno-fatal', '-j', '0', '--timescale', '1ns/1ps']
+        if self.uvm_home:
+            cmd.append(f'+incdir+{self.uvm_home}/src')
+        cmd += list(sources or [])
+        return [cmd + (['--trace'] if waves else []) + ['--top-module', top, '-o', snapshot]]
+
+    def run_command(self, snapshot="sim", gui=False, plusargs=None, seed=None):
+        cmd = [str(Path('obj_dir') / snapshot)]
+        cmd += self._plusarg_list(plusargs)
+        if seed is not None:
+            cmd.append(f'+verilator+seed+{seed}')
+        return cmd
+
+    def coverage_export_command(self, report_dir="coverage_report"):
+        return ['verilator_coverage', '--annotate', report_dir, 'coverage.dat']
+
+
+class StubBackend(SimulatorBackend):
+    """Fake simulator for hermetic tests: every step echoes canned output"""
+    name = "stub"
+    label = "Stub (no simulator)"
+    executables = []
+    supports_libraries = True
+
+    def __init__(self, uvm_home=None, fail_step: Optional[str] = None):
+        super().__init__(uvm_home)
+        self.fail_step = fail_step  # 'compile', 'elaborate' or 'run'
+
+    def _echo(self, step: str, lines: List[str]) -> List[str]:
+        code = f"print({chr(10).join(lines)!r})"
+        if self.fail_step == step:
+            code += f"; print('UVM_FATAL stub.sv(1) @ 0: reporter [STUB] {step} failed'); raise SystemExit(1)"
+        return [sys.executable, '-c', code]
+
+    def compile_commands(self, sources, include_dirs=None, defines=None, library=None):
+        return [self._echo('compile', [f"stub: analyzing {src} into {library or 'work'}" for src in sources])]
+
+    def elaborate_commands(self, top, snapshot="sim", libraries=None, top_library=None, waves=False,
+                           sources=None):
+        return [self._echo('elaborate', [f"stub: elaborating {top_library or 'work'}.{top} -> {snapshot}"
+                                         + (f" (libraries: {', '.join(libraries)})" if libraries else "")
+                                         + (" with signal access" if waves else "")])]
+
+    def run_command(self, snapshot="sim", gui=False, plusargs=None, seed=None):
+        return self._echo('run', [
+            f"UVM_INFO @ 0: reporter [RNTST] Running test (seed={seed})",
+            "--- UVM Report Summary ---",
+            "UVM_INFO :    1",
+            "UVM_WARNING :    0",
+            "UVM_ERROR :    0",
+            "UVM_FATAL :    0",
+        ])
+
+
+SIMULATOR_BACKENDS = {
+    backend.name: backend
+    for backend in (XSimBackend, QuestaBackend, VCSBackend, VerilatorBackend, StubBackend)
+}
+
+
+def get_simulator_backend(name: str = "auto", uvm_home=None) -> SimulatorBackend:
+    """Creates a backend by name; 'auto' picks the first installed simulator"""
+    if name == "auto":
+        for candidate in ('questa', 'vcs', 'xsim', 'verilator'):
+            backend = SIMULATOR_BACKENDS[candidate](uvm_home)
+            if backend.is_available():
+                return backend
+        return StubBackend(uvm_home)
+    
+    if name not in SIMULATOR_BACKENDS:
+        raise ValueError(f"Unknown simulator: {name}")
+    return SIMULATOR_BACKENDS[name](uvm_home)
+
+#---------------------------------------------------------------
+# Compilation Dependencies
+#---------------------------------------------------------------
+class SourceDependencyGraph:
+    """Declaration/reference graph over SystemVerilog sources
+    
+    A file depends on another when it uses a package, class, module,
+    interface or program declared there, or `includes it. Package, class and
+    include dependencies must be compiled first and in the same compilation
+    unit; module, interface and program references are only resolved at
+    elaboration, so they order the filelist but do not tie files to one shard.
+    """
+    COMPILE_TIME_KINDS = ('package', 'class')
+    
+    _DECLARATION = re.compile(
+        r'(?:\b(typedef|virtual)\s+)?\b(package|interface|module|program|class)\s+'
+        r'(?:(?:static|automatic|class)\s+)?([A-Za-z_]\w*)'
+    )
+    _IDENTIFIER = re.compile(r'\b[A-Za-z_]\w*')
+    _INCLUDE = re.compile(r'`include\s+"([^"\n]+)"')
+    
+    def __init__(self, sources: List[str], base_dir: str = "."):
+        self.base_dir = str(base_dir)
+        self.sources = list(sources)
+        self.declarations: Dict[str, Tuple[str, str]] = {}  # name -> (file, kind)
+        self.compile_deps: Dict[str, set] = {src: set() for src in self.sources}
+        self.elab_deps: Dict[str, set] = {src: set() for src in self.sources}
+        self.included: set = set()  # files compiled through an `include, not listed themselves
+        self.sizes: Dict[str, int] = {}
+        self.cycles: List[str] = []  # files released early to break a dependency cycle
+        
+        by_name = {}
+        for src in self.sources:
+            by_name.setdefault(os.path.basename(src), src)
+        
+        identifiers = {}
+        includes = {}
+        for src in self.sources:
+            path = os.path.join(self.base_dir, src)
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = SVPreprocessor.strip_comments(f.read())
+            self.sizes[src] = len(text)
+            for prefix, kind, name in self._DECLARATION.findall(text):
+                if prefix == 'typedef' or (prefix == 'virtual' and kind == 'interface'):
+                    continue  # forward declaration or virtual interface handle
+                self.declarations.setdefault(name, (src, kind))
+            identifiers[src] = set(self._IDENTIFIER.findall(text))
+            includes[src] = self._INCLUDE.findall(text)
+        
+        for src in self.sources:
+            for name in identifiers[src] & self.declarations.keys():
+                owner, kind = self.declarations[name]
+                if owner == src:
+                    continue
+                (self.compile_deps if kind in self.COMPILE_TIME_KINDS else self.elab_deps)[src].add(owner)
+            for name in includes[src]:
+                candidate = os.path.normpath(os.path.join(os.path.dirname(src), name))
+                target = candidate if candidate in self.compile_deps else by_name.get(os.path.basename(name))
+                if target and target != src:
+                    self.compile_deps[src].add(target)
+                    self.included.add(target)
+    
+    def order(self) -> List[str]:
+        """Sources with dependencies first (stable otherwise); included files are left out"""
+        index = {src: i for i, src in enumerate(self.sources)}
+        waiting = {}
+        dependents = defaultdict(list)
+        for src in self.sources:
+            deps = self.compile_deps[src] | self.elab_deps[src]
+            waiting[src] = len(deps)
+            for dep in deps:
+                dependents[dep].append(src)
+        
+        ready = [index[src] for src in self.sources if waiting[src] == 0]
+        heapq.heapify(ready)
+        ordered, done = [], set()
+        self.cycles = []
+        next_forced = 0
+        while len(ordered) < len(self.sources):
+            if not ready:
+                while self.sources[next_forced] in done:
+                    next_forced += 1
+                self.cycles.append(self.sources[next_forced])
+                heapq.heappush(ready, next_forced)
+            src = self.sources[heapq.heappop(ready)]
+            if src in done:
+                continue
+            done.add(src)
+            ordered.append(src)
+            for dependent in dependents[src]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0 and dependent not in done:
+                    heapq.heappush(ready, index[dependent])
+        return [src for src in ordered if src not in self.included]
+    
+    def shards(self, jobs: int) -> List[List[str]]:
+        """Splits the ordered filelist into at most jobs independently compilable groups
+        
+        Files connected by compile-time dependencies stay together; the
+        resulting components are balanced across shards by size.
+        """
+        parent = {src: src for src in self.sources}
+        
+        def find(src):
+            while parent[src] != src:
+                parent[src] = parent[parent[src]]
+                src = parent[src]
+            return src
+        
+        for src, deps in self.compile_deps.items():
+            for dep in deps:
+                parent[find(src)] = find(dep)
+        
+        ordered = self.order()
+        position = {src: i for i, src in enumerate(ordered)}
+        components = defaultdict(list)
+        for src in ordered:
+            components[find(src)].append(src)
+        
+        def weight(files):
+            return sum(self.sizes[src] for src in files)
+        
+        bins = [[] for _ in range(max(1, min(jobs, len(components))))]
+        loads = [0] * len(bins)
+        for files in sorted(components.values(), key=weight, reverse=True):
+            target = loads.index(min(loads))
+            bins[target].extend(files)
+            loads[target] += weight(files)
+        return [sorted(files, key=position.get) for files in bins if files]
+    
+    def shard_of(self, name: str, shards: List[List[str]]) -> Optional[int]:
+        """Index of the shard holding the declaration of name"""
+        owner = self.declarations.get(name, (None, None))[0]
+        for i, files in enumerate(shards):
+            if owner in files:
+                return i
+        return None
+    
+    @staticmethod
+    def write_filelist(path, files: List[str], include_dirs: Optional[List[str]] = None,
+                       defines: Optional[Dict[str, str]] = None):
+        """Writes a simulator .f filelist"""
+        lines = [f"+incdir+{inc}" for inc in include_dirs or []]
+        lines += [f"+define+{key}" if value in (None, "") else f"+define+{key}={value}"
+                  for key, value in (defines or {}).items()]
+        lines += files
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
 
 #---------------------------------------------------------------
 # Simulation Controller
 #---------------------------------------------------------------
 class SimulationController:
-    def __init__(self, output_dir):
+    WAVES_SNAPSHOT = "sim_waves"  # debug-visible snapshot, built only to re-run with waves
+    WAVE_WINDOW = 1000  # ns dumped before (and after) a failure
+    
+    def __init__(self, output_dir, simulator="auto", top="top", sources=None):
         self.output_dir = Path(output_dir)
+        self.sources = sources  # Explicit source list (default: *.sv in output_dir)
         self.process = None
         self.is_running = False
         self.compile_complete = False
+        self._shards = None  # shard layout of the last successful sharded compile
+        self._elaboration = {}  # elaborate_commands() arguments the snapshot was built with
+        self._waves_ready = False
+        self._cancelled = threading.Event()
+        self._active = set()  # running tool processes, terminated by cancel()
+        self._active_lock = threading.Lock()
         self.uvm_home = self._find_uvm_home()
+        self.top = top
+        self.backend = (simulator if isinstance(simulator, SimulatorBackend)
+                        else get_simulator_backend(simulator, self.uvm_home))
 
     def _find_uvm_home(self):
         """Locate UVM_HOME directory automatically"""
@@ -63,72 +704,145 @@ class SimulationController:
                 
         return None
 
-    def check_vivado_installation(self):
-        """Check if Vivado/XSIM is installed"""
-        try:
-            result = subprocess.run(['vivado', '-version'], 
-                                  capture_output=True, text=True)
-            return 'Vivado' in result.stdout
-        except:
-            return False
-        
-    def compile(self, callback=None):
-        """Compile project using XSIM with UVM support"""
-        if not self.check_vivado_installation():
-            callback("Error: Vivado/XSIM not found in PATH")
+    def check_simulator_installation(self):
+        """Check if the selected simulator is installed"""
+        return self.backend.is_available()
+
+    def source_files(self) -> List[str]:
+        """SystemVerilog sources in the output directory, in stable order"""
+        return sorted(p.name for p in self.output_dir.glob('*.sv'))
+
+    def _run_steps(self, commands, callback=None) -> bool:
+        """Runs commands sequentially, streaming output; stops at first failure"""
+        for cmd in commands:
+            if self._cancelled.is_set():
+                return False
+            if callback:
+                callback(f"$ {' '.join(cmd)}")
+            with TRACER.span(f"sim.{os.path.basename(cmd[0])}", "simulation", command=' '.join(cmd)):
+                process = self._start(cmd, stdout=subprocess.PIPE)
+                self.process = process
+                try:
+                    for line in iter(process.stdout.readline, ''):
+                        if callback:
+                            callback(line.rstrip())
+                    returncode = process.wait()
+                finally:
+                    self._finish(process)
+            
+            if returncode != 0:
+                return False
+        return True
+    
+    def _start(self, cmd, stdout) -> subprocess.Popen:
+        process = subprocess.Popen(cmd, cwd=self.output_dir, stdout=stdout,
+                                   stderr=subprocess.STDOUT, text=True)
+        with self._active_lock:
+            self._active.add(process)
+        return process
+    
+    def _finish(self, process):
+        with self._active_lock:
+            self._active.discard(process)
+    
+    def cancel(self):
+        """Stops the running compile or regression: pending steps and runs are skipped,
+        running tool processes are terminated"""
+        self._cancelled.set()
+        with self._active_lock:
+            for process in self._active:
+                process.terminate()
+        
+    def compile(self, callback=None, wait=False, jobs=None, changed=None):
+        """Compile and elaborate the project with the selected simulator
+        
+        Without an explicit source list, sources are compiled in dependency
+        order (written to sources.f). If the backend supports separate
+        libraries, independent groups of files compile as parallel jobs, and
+        when the changed files are given only their shards are recompiled.
+        """
+        callback = callback or (lambda message: None)
+        if not self.check_simulator_installation():
+            callback(f"Error: {self.backend.label} not found in PATH")
             return False
             
-        if not self.uvm_home:
+        if not self.uvm_home and self.backend.name != 'stub':
             callback("Warning: UVM_HOME not configured - may affect UVM simulation")
 
+        self._cancelled.clear()
+        
         def run_compilation():
-            try:
-                self.compile_complete = False
-                
-                # Compilation command with UVM support
-                compile_cmd = [
-                    'xvlog', '-sv', 
-                    '-d', 'UVM_NO_DPI',
-                    '-i', f'{self.uvm_home}/src' if self.uvm_home else '',
-                    str(self.output_dir / '*.sv'),
-                    '&&',
-                    'xelab', '-debug', 'typical',
-                    '-timescale', '1ns/1ps',
-                    '-L', 'uvm' if self.uvm_home else '',
-                    'top_module',
-                    '-s', 'sim'
-                ]
-                
-                # Filter empty commands
-                compile_cmd = [c for c in compile_cmd if c]
-                
-                self.process = subprocess.Popen(
-                    ' '.join(compile_cmd),
-                    cwd=self.output_dir,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True
-                )
-                
-                for line in iter(self.process.stdout.readline, ''):
-                    if callback:
-                        callback(line.strip())
-                
-                self.compile_complete = self.process.wait() == 0
-                
-                if not self.compile_complete:
-                    callback("Compilation error - check logs")
+            with TRACER.span("sim.compile", "simulation", backend=self.backend.name):
+                try:
+                    self.compile_complete = False
+                    self._waves_ready = False
+                    self._elaboration = {}
+                    shards = None
+                    if self.sources:
+                        sources = self.sources
+                    else:
+                        with TRACER.span("sim.dependencies", "simulation"):
+                            graph = SourceDependencyGraph(self.source_files(), self.output_dir)
+                            sources = graph.order()
+                        for src in graph.cycles:
+                            callback(f"Warning: dependency cycle broken at {src}")
+                        SourceDependencyGraph.write_filelist(self.output_dir / 'sources.f', sources)
+                        if self.backend.supports_libraries and (jobs or os.cpu_count() or 1) > 1:
+                            shards = graph.shards(jobs or os.cpu_count() or 1)
                     
-            except Exception as e:
-                if callback:
+                    if shards and len(shards) > 1:
+                        only = None
+                        if changed and shards == self._shards:
+                            names = {os.path.relpath(path, self.output_dir) for path in changed}
+                            only = [i for i, files in enumerate(shards) if names & set(files)]
+                        self.compile_complete = self._compile_shards(graph, shards, callback, only)
+                        self._shards = shards if self.compile_complete else None
+                    else:
+                        self._elaboration = {'sources': sources}
+                        commands = (self.backend.compile_commands(sources)
+                                    + self.backend.elaborate_commands(self.top, sources=sources))
+                        self.compile_complete = self._run_steps(commands, callback)
+                    
+                    if self.compile_complete:
+                        callback("Compilation completed")
+                    else:
+                        callback("Error: compilation failed - check logs")
+                    
+                except Exception as e:
                     callback(f"Compilation error: {str(e)}")
-                self.compile_complete = False
+                    self.compile_complete = False
 
+        if wait:
+            run_compilation()
+            return self.compile_complete
         threading.Thread(target=run_compilation, daemon=True).start()
+        return True
 
-    def run_simulation(self, gui=False, callback=None):
+    def _compile_shards(self, graph, shards, callback, only=None) -> bool:
+        """Compiles shards (all, or the indices in only) into separate libraries in parallel,
+        then elaborates from all of them"""
+        libraries = [f"shard{i}" for i in range(len(shards))]
+        selected = list(range(len(shards))) if only is None else only
+        callback(f"Compiling {len(selected)} of {len(shards)} independent shards in parallel")
+        
+        def compile_shard(i):
+            with TRACER.span("sim.shard", "simulation", library=libraries[i], files=len(shards[i])):
+                SourceDependencyGraph.write_filelist(self.output_dir / f"{libraries[i]}.f", shards[i])
+                commands = self.backend.compile_commands(shards[i], library=libraries[i])
+                return self._run_steps(commands, lambda line: callback(f"[{libraries[i]}] {line}"))
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(selected))) as pool:
+            if not all(pool.map(compile_shard, selected)):
+                return False
+        
+        top_shard = graph.shard_of(self.top, shards)
+        top_library = libraries[top_shard] if top_shard is not None else None
+        self._elaboration = {'libraries': libraries, 'top_library': top_library}
+        return self._run_steps(self.backend.elaborate_commands(self.top, **self._elaboration), callback)
+
+    def run_simulation(self, gui=False, callback=None, plusargs=None, seed=None, wait=False):
         """Run simulation"""
+        callback = callback or (lambda message: None)
         if not self.compile_complete:
             callback("Error: Project not successfully compiled")
             return
@@ -136,29 +850,140 @@ class SimulationController:
         def execute():
             try:
                 self.is_running = True
-                cmd = ['xsim', 'sim']
-                if not gui:
-                    cmd.append('-R')
-                
-                self.process = subprocess.Popen(
-                    cmd,
-                    cwd=self.output_dir,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True
-                )
-                
-                if callback:
-                    callback("Simulation started...")
-                
-                for line in iter(self.process.stdout.readline, ''):
-                    if callback:
-                        callback(line.strip())
-                    
+                callback("Simulation started...")
+                snapshot = self.WAVES_SNAPSHOT if gui and self.elaborate_waves(callback) else "sim"
+                with TRACER.span("sim.simulate", "simulation", backend=self.backend.name):
+                    self._run_steps([self.backend.run_command(snapshot, gui=gui, plusargs=plusargs, seed=seed)],
+                                    callback)
+            except Exception as e:
+                callback(f"Simulation error: {str(e)}")
             finally:
                 self.is_running = False
 
-        threading.Thread(target=execute, daemon=True).start()
+        if wait:
+            execute()
+        else:
+            threading.Thread(target=execute, daemon=True).start()
+
+    def elaborate_waves(self, callback=None) -> bool:
+        """Elaborates the debug-visible snapshot next to the optimized one (once per compile)"""
+        if not self.compile_complete:
+            return False
+        if not self._waves_ready:
+            self._waves_ready = self._run_steps(self.backend.elaborate_commands(
+                self.top, self.WAVES_SNAPSHOT, waves=True, **self._elaboration
+            ), callback)
+        return self._waves_ready
+    
+    def rerun_with_waves(self, scenario, seed, window=None, callback=None, plusargs=None,
+                         log_dir="waves") -> Optional[Dict]:
+        """Re-runs one regression run on the debug snapshot with dumping enabled
+        
+        window is a (start, end) time in ns, or a failure time around which
+        WAVE_WINDOW ns are dumped; None dumps the whole run. Returns the run
+        result with the dump file, or None if the snapshot could not be built.
+        """
+        callback = callback or (lambda message: None)
+        if not self.elaborate_waves(callback):
+            callback("Error: could not elaborate the waveform snapshot")
+            return None
+        
+        log_path = self.output_dir / log_dir
+        log_path.mkdir(exist_ok=True)
+        dump_file = f"{log_dir}/{scenario}_{seed}.vcd"
+        args = {'SCENARIO': scenario, 'DUMP': None, 'DUMP_FILE': dump_file}
+        if isinstance(window, (int, float)):
+            window = (max(0, window - self.WAVE_WINDOW), window + self.WAVE_WINDOW)
+        if window:
+            args['DUMP_START'], args['DUMP_END'] = (int(t) for t in window)
+        args.update(plusargs or {})
+        
+        log_file = log_path / f"{scenario}_{seed}.log"
+        start = datetime.now()
+        callback(f"Re-running {scenario} seed={seed} with waves"
+                 + (f" ({args['DUMP_START']}-{args['DUMP_END']} ns)" if window else ""))
+        with open(log_file, 'w', encoding='utf-8') as log, \
+                TRACER.span("sim.waves", "simulation", scenario=scenario, seed=seed):
+            process = self._start(self.backend.run_command(self.WAVES_SNAPSHOT, plusargs=args, seed=seed), stdout=log)
+            self.process = process
+            try:
+                returncode = process.wait()
+            finally:
+                self._finish(process)
+        callback(f"Waveform: {self.output_dir / dump_file}")
+        return {
+            'scenario': scenario,
+            'seed': seed,
+            'returncode': returncode,
+            'log': str(log_file),
+            'dump': str(self.output_dir / dump_file),
+            'window': list(window) if window else None,
+            'execution_time': (datetime.now() - start).total_seconds()
+        }
+    
+    def run_regression(self, runs, jobs=None, callback=None, log_dir="logs"):
+        """Runs independent simulations in parallel, one process per run
+        
+        Each run is a dict with 'scenario', 'seed' and optional 'plusargs'.
+        Returns one result dict per run with the parsed log summary.
+        """
+        callback = callback or (lambda message: None)
+        if not self.compile_complete:
+            callback("Error: Project not successfully compiled")
+            return []
+        
+        log_path = self.output_dir / log_dir
+        log_path.mkdir(exist_ok=True)
+        jobs = jobs or os.cpu_count() or 1
+
+        def execute(run):
+            if self._cancelled.is_set():
+                return {'scenario': run['scenario'], 'seed': run['seed'], 'returncode': None, 'passed': False,
+                        'summary': {}, 'log': None, 'execution_time': 0.0, 'cancelled': True}
+            plusargs = {'SCENARIO': run['scenario']}
+            plusargs.update(run.get('plusargs', {}))
+            cmd = self.backend.run_command(plusargs=plusargs, seed=run['seed'])
+            log_file = log_path / f"{run['scenario']}_{run['seed']}.log"
+            start = datetime.now()
+            with open(log_file, 'w', encoding='utf-8') as log, \
+                    TRACER.span("sim.run", "simulation", scenario=run['scenario'], seed=run['seed']):
+                process = self._start(cmd, stdout=log)
+                try:
+                    returncode = process.wait()
+                finally:
+                    self._finish(process)
+            with open(log_file, 'r', encoding='utf-8', errors='replace') as log:
+                summary = self.backend.summarize_log(log)
+            passed = (returncode == 0 and not summary.get('UVM_ERROR')
+                      and not summary.get('UVM_FATAL') and not summary.get('error'))
+            result = {
+                'scenario': run['scenario'],
+                'seed': run['seed'],
+                'returncode': returncode,
+                'passed': passed,
+                'summary': summary,
+                'log': str(log_file),
+                'execution_time': (datetime.now() - start).total_seconds()
+            }
+            callback(f"[{'PASS' if passed else 'FAIL'}] {run['scenario']} seed={run['seed']}")
+            return result
+
+        self._cancelled.clear()
+        self.is_running = True
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                return list(pool.map(execute, runs))
+        finally:
+            self.is_running = False
+
+    def export_coverage(self, callback=None, report_dir="coverage_report"):
+        """Exports coverage with the backend's report tool"""
+        cmd = self.backend.coverage_export_command(report_dir)
+        if cmd is None:
+            if callback:
+                callback(f"Coverage export not supported by {self.backend.label}")
+            return False
+        return self._run_steps([cmd], callback)
 
     def stop_simulation(self):
         """Stop running simulation"""
@@ -225,7 +1050,79 @@ class ModuleInfo:
     clock_signals: List[str] = field(default_factory=lambda: ['clk', 'clock'])
     reset_signals: List[str] = field(default_factory=lambda: ['rst', 'reset'])
     instances: Dict[str, str] = field(default_factory=dict)  # Submodule instances
+    instance_connections: Dict[str, Dict[str, str]] = field(default_factory=dict)  # Instance -> port -> net
+
+    def diff(self, other: 'ModuleInfo') -> set:
+        """Names of the aspects ('name', 'ports', 'parameters', 'signals', 'instances',
+        'connections') in which another version of this module differs"""
+        aspects = set()
+        if self.name != other.name:
+            aspects.add('name')
+        if [(p.name, p.direction, p.width) for p in self.ports] != [(p.name, p.direction, p.width) for p in other.ports]:
+            aspects.add('ports')
+        if self.parameters != other.parameters:
+            aspects.add('parameters')
+        if self.clock_signals != other.clock_signals or self.reset_signals != other.reset_signals:
+            aspects.add('signals')
+        if self.instances != other.instances:
+            aspects.add('instances')
+        if ([p.connected_to for p in self.ports] != [p.connected_to for p in other.ports]
+                or self.instance_connections != other.instance_connections):
+            aspects.add('connections')
+        return aspects
 
+    def resolve_width(self, width: str) -> str:
+        """Packed range with parameters replaced by their default values ([WIDTH-1:0] -> [31:0])
+        
+        Used where the declaration sits outside the module (DPI imports).
+        Ranges that cannot be evaluated are returned unchanged.
+        """
+        if width == '1':
+            return width
+        try:
+            bounds = [str(self.evaluate(bound)) for bound in width.strip()[1:-1].split(':')]
+        except (ValueError, SyntaxError, ZeroDivisionError, RecursionError):
+            return width
+        return f"[{':'.join(bounds)}]"
+    
+    def bit_width(self, width: str) -> Optional[int]:
+        """Number of bits of a packed range, or None if it cannot be evaluated"""
+        resolved = self.resolve_width(width)
+        match = re.fullmatch(r'\[(-?\d+):(-?\d+)\]', resolved.replace(' ', ''))
+        if resolved == '1':
+            return 1
+        return abs(int(match.group(1)) - int(match.group(2))) + 1 if match else None
+    
+    SV_LITERAL = re.compile(r"\d*'[sS]?([hHdDbBoO])([0-9a-fA-F_]+)")
+    
+    def evaluate(self, expression: str, depth: int = 0) -> int:
+        """Integer value of a constant expression over the module parameters"""
+        if depth > 16:
+            raise ValueError(f"Parameter loop in {expression}")
+        text = self.SV_LITERAL.sub(
+            lambda m: str(int(m.group(2).replace('_', ''), {'h': 16, 'd': 10, 'b': 2, 'o': 8}[m.group(1).lower()])),
+            expression.replace('$clog2', 'clog2')
+        )
+        operators = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                     ast.Div: operator.floordiv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+                     ast.LShift: operator.lshift, ast.RShift: operator.rshift, ast.Pow: operator.pow}
+        
+        def value(node):
+            if isinstance(node, ast.Constant) and isinstance(node.value, int):
+                return node.value
+            if isinstance(node, ast.BinOp) and type(node.op) in operators:
+                return operators[type(node.op)](value(node.left), value(node.right))
+            if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+                return -value(node.operand) if isinstance(node.op, ast.USub) else value(node.operand)
+            if isinstance(node, ast.Name) and node.id in self.parameters:
+                return self.evaluate(self.parameters[node.id], depth + 1)
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'clog2'
+                    and len(node.args) == 1):
+                return max(0, value(node.args[0]) - 1).bit_length()
+            raise ValueError(f"Not a constant expression: {expression}")
+        
+        return value(ast.parse(text.strip(), mode='eval').body)
+    
     def get_input_ports(self) -> List[Port]:
         """Returns only input ports"""
         return [p for p in self.ports if p.direction == 'input']
@@ -245,6 +1142,276 @@ class ModuleHierarchy:
     submodules: Dict[str, ModuleInfo]  # Instance name -> ModuleInfo
     connections: List[Tuple[str, str, str, str]]  # (src_mod, src_port, dest_mod, dest_port)
     file_mapping: Dict[str, str]  # Module name -> source file
+    includes: Dict[str, List[str]] = field(default_factory=dict)  # Source file -> include files it uses
+    root: str = ""  # Directory the sources were scanned from
+    sources: List[str] = field(default_factory=list)  # Every scanned source, with or without a module
+    _instance_tree: Optional['InstanceTree'] = field(default=None, init=False, repr=False, compare=False)
+
+    def instance_tree(self) -> 'InstanceTree':
+        """Returns the elaborated instance tree (built once per hierarchy)"""
+        if self._instance_tree is None:
+            self._instance_tree = InstanceTree(self)
+        return self._instance_tree
+
+    def get_paths(self) -> List[Tuple[str, str]]:
+        """Returns unique producer->consumer module pairs between submodules"""
+        paths = {}
+        for src_mod, src_port, dest_mod, dest_port in self.connections:
+            if (src_mod != dest_mod and src_mod in self.submodules
+                    and dest_mod in self.submodules):
+                paths.setdefault((src_mod, dest_mod), None)
+        return list(paths)
+    
+    def get_instance_paths(self) -> List[Tuple[str, str, str, str]]:
+        """Unique (src_inst, src_mod, dest_inst, dest_mod) producer->consumer pairs
+        
+        Instances are hierarchical paths below the top (u_core.u_alu), so two
+        instances of the same module stay separate.
+        """
+        tree = self.instance_tree()
+        links = {}
+        paths = {}
+        for path, module in tree.walk():
+            if module not in links:
+                info = self.top_level if module == self.top_level.name else self.submodules[module]
+                links[module] = RTLAnalyzer.net_links(info, self.submodules)
+            prefix = path.split('.', 1)[1] + '.' if '.' in path else ''
+            children = tree.children(module)
+            for src_inst, _, dest_inst, _ in links[module]:
+                if src_inst in children and dest_inst in children:
+                    paths.setdefault((prefix + src_inst, children[src_inst],
+                                      prefix + dest_inst, children[dest_inst]), None)
+        return list(paths)
+
+class InstanceTree:
+    """Elaborated instance tree of a hierarchy, indexed by hierarchical path
+    
+    Paths look like top.u_core.u_alu. Each module's child instances and
+    subtree size are resolved once and shared by every instance of that
+    module, so resolving a path is O(depth) and a full walk is linear in the
+    number of instances.
+    """
+    
+    def __init__(self, hierarchy: ModuleHierarchy):
+        self.hierarchy = hierarchy
+        self.top = hierarchy.top_level.name
+        self._children: Dict[str, Dict[str, str]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._index: Optional[Dict[str, str]] = None
+        self._paths_by_module: Optional[Dict[str, List[str]]] = None
+    
+    def children(self, module: str) -> Dict[str, str]:
+        """Instance name -> module name for the known submodules a module instantiates"""
+        children = self._children.get(module)
+        if children is None:
+            submodules = self.hierarchy.submodules
+            if module == self.top:
+                instances = self.hierarchy.top_level.instances
+            elif hasattr(submodules, 'instances'):
+                instances = submodules.instances(module)
+            else:
+                instances = submodules[module].instances
+            children = {inst: sub for inst, sub in instances.items() if sub in submodules and sub != self.top}
+            self._children[module] = children
+        return children
+    
+    def subtree_size(self, module: str) -> int:
+        """Number of instances in a module's subtree, the module itself included"""
+        stack = [(module, False)]
+        ancestors = set()
+        while stack:
+            name, finished = stack.pop()
+            if finished:
+                ancestors.discard(name)
+                self._sizes[name] = 1 + sum(self._sizes[sub] for sub in self.children(name).values())
+                continue
+            if name in self._sizes:
+                continue
+            if name in ancestors:
+                raise ValueError(f"Recursive instantiation of module {name}")
+            ancestors.add(name)
+            stack.append((name, True))
+            stack.extend((sub, False) for sub in self.children(name).values() if sub not in self._sizes)
+        return self._sizes[module]
+    
+    def __len__(self) -> int:
+        return self.subtree_size(self.top)
+    
+    def resolve(self, path: str) -> Optional[str]:
+        """Module name of the instance at a hierarchical path, or None"""
+        names = path.split('.')
+        if names[0] != self.top:
+            return None
+        module = self.top
+        for inst in names[1:]:
+            module = self.children(module).get(inst)
+            if module is None:
+                return None
+        return module
+    
+    def walk(self, path: Optional[str] = None):
+        """Yields (path, module) for every instance below path, in pre-order"""
+        root = path or self.top
+        module = self.resolve(root)
+        if module is None:
+            raise KeyError(root)
+        self.subtree_size(module)  # rejects recursive instantiation up front
+        stack = [(root, module)]
+        while stack:
+            path, module = stack.pop()
+            yield path, module
+            children = self.children(module)
+            if children:
+                stack.extend((f"{path}.{inst}", sub) for inst, sub in reversed(list(children.items())))
+    
+    def index(self) -> Dict[str, str]:
+        """Hierarchical path -> module name for the whole design"""
+        if self._index is None:
+            self._index = dict(self.walk())
+        return self._index
+    
+    def paths_of(self, module: str) -> List[str]:
+        """All instance paths of a module"""
+        if self._paths_by_module is None:
+            self._paths_by_module = defaultdict(list)
+            for path, name in self.index().items():
+                self._paths_by_module[name].append(path)
+        return self._paths_by_module.get(module, [])
+
+@dataclass
+class BusInterface:
+    """A group of ports recognized as one protocol interface (see RTLAnalyzer.detect_protocols)"""
+    protocol: str  # 'axi', 'apb', 'wishbone', 'stream'
+    variant: str  # e.g. 'axi4-lite', 'valid-ready'
+    prefix: str  # Common port name prefix as written in the RTL
+    dut_initiator: bool  # True if the DUT drives the requests (AXI manager, APB requester, ...)
+    signals: Dict[str, Port] = field(default_factory=dict)  # Canonical signal -> DUT port
+    clock: str = ""
+    reset: str = ""
+    name: str = ""
+
+    def __post_init__(self):
+        if not self.name:
+            self.name = self.prefix.strip('_').lower() or self.protocol
+
+    @property
+    def template(self) -> str:
+        """Agent template rendered for this interface"""
+        return f"{self.protocol}_agent.sv.j2"
+
+    @property
+    def reset_active_low(self) -> bool:
+        return RTLAnalyzer.is_active_low(self.reset)
+
+    def has(self, signal: str) -> bool:
+        return signal in self.signals
+
+    def tb_drives(self, signal: str) -> bool:
+        """True if the testbench side of the interface drives this signal"""
+        return self.signals[signal].direction == 'input'
+
+    def width(self, signal: str) -> str:
+        width = self.signals[signal].width if signal in self.signals else "1"
+        return "" if width == "1" else width
+
+@dataclass
+class ClockDomain:
+    """Instance clock ports driven by the same net (see RTLAnalyzer.infer_clock_domains)"""
+    name: str
+    clock: str  # Top-level clock port, or hierarchical path of a clock generated inside the design
+    period_ns: float = 10.0
+    reset: str = ""  # Top-level reset port used by the domain
+    reset_active_low: bool = False
+    generated: bool = False
+    members: List[Tuple[str, str, str]] = field(default_factory=list)  # (instance path, module, clock port)
+
+    @property
+    def modules(self) -> List[str]:
+        """Modules with at least one clock port in this domain, in discovery order"""
+        return list(dict.fromkeys(module for _, module, _ in self.members))
+
+@dataclass
+class SVAssertion:
+    """One concurrent assertion of the bound SVA checker (see TestbenchGenerator.assertions)"""
+    name: str  # Property label, also the +SVA_OFF_<name> switch
+    kind: str  # 'handshake', 'protocol', 'reset', 'known'
+    clock: str
+    expression: str  # Property body over DUT port names
+    message: str
+    reset: str = ""
+    reset_active_low: bool = False
+    disable_in_reset: bool = True
+    cover: str = ""  # Optional cover property body
+
+    @property
+    def reset_condition(self) -> str:
+        """Expression true while the reset is asserted"""
+        if not self.reset:
+            return ""
+        return f"!{self.reset}" if self.reset_active_low else self.reset
+
+@dataclass
+class RegisterField:
+    """One field of a register (see RegisterSpecImporter)"""
+    name: str
+    lsb: int
+    width: int
+    access: str = "RW"  # UVM access policy
+    reset: int = 0
+    volatile: bool = False
+    description: str = ""
+
+@dataclass
+class Register:
+    """A register, or a register array when dim > 0"""
+    name: str
+    offset: int  # Byte offset in the address map
+    width: int = 32
+    fields: List[RegisterField] = field(default_factory=list)
+    dim: int = 0
+    hdl_path: str = ""  # Backdoor path below the DUT, empty for front-door only
+    description: str = ""
+    type_name: str = ""  # Register class shared by registers with the same layout
+
+    @property
+    def stride(self) -> int:
+        """Bytes between the elements of an array"""
+        return max(1, self.width // 8)
+
+    @property
+    def layout(self) -> Tuple:
+        return (self.width,) + tuple((f.name, f.lsb, f.width, f.access, f.reset, f.volatile) for f in self.fields)
+
+@dataclass
+class RegisterBlock:
+    """Registers of one address map
+    
+    Registers with identical layouts share one generated uvm_reg class, so
+    a spec with thousands of registers built from a few shapes stays small.
+    """
+    name: str
+    registers: List[Register] = field(default_factory=list)
+    base_address: int = 0
+    width: int = 32  # Bus data width in bits
+
+    def __post_init__(self):
+        types = {}
+        for register in self.registers:
+            register.type_name = types.setdefault(register.layout, register.name)
+
+    @property
+    def n_bytes(self) -> int:
+        return max(1, self.width // 8)
+
+    @property
+    def count(self) -> int:
+        """Registers including every array element"""
+        return sum(max(1, register.dim) for register in self.registers)
+
+    @property
+    def types(self) -> List[Register]:
+        """One register per generated register class"""
+        return [register for register in self.registers if register.type_name == register.name]
 
 @dataclass
 class SystemTestConfig:
@@ -253,6 +1420,8 @@ class SystemTestConfig:
     check_interfaces: bool = True
     generate_cross_coverage: bool = True
     monitor_performance: bool = False
+    clock_periods: Dict[str, float] = field(default_factory=dict)  # Clock net or domain name -> period (ns)
+    default_clock_period: float = 10.0
 
 @dataclass
 class TestResult:
@@ -264,190 +1433,3909 @@ class TestResult:
     subsystem_results: Dict[str, Dict[str, float]] = field(default_factory=dict)  # Results by subsystem
 
 #---------------------------------------------------------------
-# RTL Analyzer 
+# SystemVerilog Preprocessor
+#---------------------------------------------------------------
+@dataclass
+class SVMacro:
+    """A `define: params is None for object-like macros"""
+    body: str
+    params: Optional[List[Tuple[str, Optional[str]]]] = None  # (name, default)
+
+class SVPreprocessor:
+    """Resolves `include, `define/`undef and `ifdef/`ifndef/`elsif/`else/`endif
+    
+    One instance is meant to be shared by every file of a project. Include
+    files are read once, and the result of processing one (its text and the
+    macros it defines) is reused by later includers whenever the macros it
+    looked at have the same values, so a large header such as uvm_macro.svh
+    is processed once per run instead of once per includer.
+    """
+    CONDITIONALS = ('ifdef', 'ifndef', 'elsif', 'else', 'endif')
+    # Directives dropped together with the rest of their line
+    LINE_DIRECTIVES = {'timescale', 'default_nettype', 'line', 'pragma', 'begin_keywords',
+                       'unconnected_drive', 'default_decay_time', 'default_trireg_strength'}
+    # Directives without arguments
+    WORD_DIRECTIVES = {'resetall', 'celldefine', 'endcelldefine', 'end_keywords',
+                       'nounconnected_drive', 'undefineall', 'delay_mode_distributed',
+                       'delay_mode_path', 'delay_mode_unit', 'delay_mode_zero'}
+    MAX_EXPANSION_DEPTH = 64
+    
+    _TOKEN = re.compile(r'`(\w+)')
+    _NAME = re.compile(r'[ \t]*(\w+)')
+    _COMMENT = re.compile(r'"(?:\\.|[^"\\\n])*"|//[^\n]*|/\*.*?\*/', re.DOTALL)
+    _GUARD = re.compile(r'\s*`ifndef\s+(\w+)\s+`define\s+(\w+)\b')
+    _CONDITIONAL = re.compile(r'`(ifdef|ifndef|endif)\b')
+    _INCLUDE = re.compile(r'[ \t]*(?:"([^"\n]+)"|<([^>\n]+)>|`(\w+))')
+    
+    def __init__(self, include_dirs: Optional[List[str]] = None, defines: Optional[Dict[str, str]] = None):
+        self.include_dirs = [str(d) for d in include_dirs or []]
+        # Command-line defines (+define+NAME or +define+NAME=VALUE)
+        self.defines = {name: SVMacro(str(value) if value is not None else "")
+                        for name, value in (defines or {}).items()}
+        self._sources: Dict[str, Tuple[str, Optional[str]]] = {}  # path -> (text, include guard)
+        self._stamps: Dict[str, Optional[Tuple[int, int]]] = {}  # path -> (mtime_ns, size) when read
+        self._results: Dict[str, List[Tuple[Dict, str, List]]] = {}  # path -> [(deps, text, changes)]
+        self._resolved: Dict[Tuple[str, str], Optional[str]] = {}
+        self._nested: Dict[str, set] = {}  # include file -> files it includes, transitively
+        self.dependencies: Dict[str, set] = {}  # preprocessed file -> include files it used
+        self.stats = {"files_read": 0, "includes_processed": 0, "include_cache_hits": 0}
+        self.missing_includes: List[str] = []
+    
+    @staticmethod
+    def parse_define_args(args: List[str]) -> Dict[str, str]:
+        """Parses simulator-style +define+A+B=1 and -DA=1 arguments"""
+        defines = {}
+        for arg in args:
+            if arg.startswith('+define+'):
+                items = arg[len('+define+'):].split('+')
+            elif arg.startswith('-D'):
+                items = [arg[2:]]
+            else:
+                items = [arg]
+            for item in filter(None, items):
+                name, _, value = item.partition('=')
+                defines[name] = value
+        return defines
+    
+    def preprocess_file(self, path: str) -> str:
+        """Preprocesses one compilation unit, starting from the command-line defines"""
+        path = os.path.abspath(path)
+        text, _ = self._load(path)
+        state = _SVPreprocessState(dict(self.defines))
+        out = []
+        with TRACER.span("preprocess.expand", "analyzer"):
+            self._scan(text, path, state, out, 0)
+        self.dependencies[path] = state.files
+        return ''.join(out)
+    
+    def invalidate(self, paths: List[str]):
+        """Forgets cached contents of changed files (and every cached include result if a header changed)"""
+        included = set(self._nested).union(*self._nested.values()) if self._nested else set()
+        for path in map(os.path.abspath, paths):
+            self._sources.pop(path, None)
+            self._stamps.pop(path, None)
+            if path in included or path in self._results:
+                self._results.clear()
+                self._nested.clear()
+                included = set()
+        self._resolved.clear()
+    
+    def refresh(self) -> List[str]:
+        """Invalidates files changed on disk since they were read and returns them"""
+        changed = [path for path, stamp in self._stamps.items() if self._stamp(path) != stamp]
+        if changed:
+            self.invalidate(changed)
+        return changed
+    
+    @staticmethod
+    def _stamp(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def dependents(self, paths: List[str]) -> set:
+        """Preprocessed files that include any of the given files"""
+        changed = set(map(os.path.abspath, paths))
+        return {path for path, files in self.dependencies.items() if files & changed}
+    
+    def resolve_include(self, name: str, including_dir: str) -> Optional[str]:
+        """Finds an include file next to the includer or in the include directories"""
+        key = (name, including_dir)
+        if key not in self._resolved:
+            self._resolved[key] = None
+            if os.path.isabs(name):
+                candidates = [name]
+            else:
+                candidates = [os.path.join(d, name) for d in [including_dir] + self.include_dirs]
+            for candidate in candidates:
+                if os.path.isfile(candidate):
+                    self._resolved[key] = os.path.abspath(candidate)
+                    break
+        return self._resolved[key]
+    
+    def _load(self, path: str) -> Tuple[str, Optional[str]]:
+        """Comment-stripped text and include guard macro of a file (read once)"""
+        if path not in self._sources:
+            self._stamps[path] = self._stamp(path)
+            with TRACER.span("preprocess.read", "analyzer", file=path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        text = f.read()
+                except UnicodeDecodeError:
+                    with open(path, 'r', encoding='latin-1') as f:
+                        text = f.read()
+            self.stats["files_read"] += 1
+            with TRACER.span("preprocess.strip_comments", "analyzer"):
+                text = self.strip_comments(text)
+            self._sources[path] = (text, self._find_guard(text))
+        return self._sources[path]
+    
+    @classmethod
+    def strip_comments(cls, text: str) -> str:
+        """Removes // and /* */ comments, keeping string literals and line numbers"""
+        return cls._COMMENT.sub(lambda m: m.group(0) if m.group(0)[0] == '"' else
+                                '\n' * m.group(0).count('\n'), text)
+    
+    @classmethod
+    def _find_guard(cls, text: str) -> Optional[str]:
+        """Macro of an `ifndef X / `define X ... `endif guard wrapping the whole file"""
+        match = cls._GUARD.match(text)
+        if not match or match.group(1) != match.group(2) or not text.rstrip().endswith('`endif'):
+            return None
+        depth = 0
+        for directive in cls._CONDITIONAL.finditer(text):
+            depth += -1 if directive.group(1) == 'endif' else 1
+            if depth == 0:
+                return match.group(1) if directive.end() == len(text.rstrip()) else None
+        return None
+    
+    def _include(self, name: str, including_dir: str, state: '_SVPreprocessState', out: List[str]):
+        path = self.resolve_include(name, including_dir)
+        if path is None:
+            self.missing_includes.append(name)
+            return
+        if path in state.include_stack:
+            raise ValueError(f"Recursive `include of {path}")
+        state.files.add(path)
+        for parent in state.include_stack:
+            self._nested.setdefault(parent, set()).add(path)
+        text, guard = self._load(path)
+        if guard and state.lookup(guard) is not None:
+            return
+        
+        # Reuse an earlier result if every macro it depended on still has the same value
+        for deps, result, changes in self._results.get(path, []):
+            if all(state.macros.get(dep) == value for dep, value in deps.items()):
+                self.stats["include_cache_hits"] += 1
+                nested = self._nested.get(path, set())
+                state.files |= nested
+                for parent in state.include_stack:
+                    self._nested.setdefault(parent, set()).update(nested)
+                for dep in deps:
+                    state.lookup(dep)
+                for macro_name, macro in changes:
+                    state.define(macro_name, macro)
+                out.append(result)
+                return
+        
+        self.stats["includes_processed"] += 1
+        recorder = _SVPreprocessRecorder()
+        state.recorders.append(recorder)
+        state.include_stack.append(path)
+        include_out = []
+        try:
+            self._scan(text, path, state, include_out, 0)
+        finally:
+            state.include_stack.pop()
+            state.recorders.pop()
+        result = ''.join(include_out)
+        self._results.setdefault(path, []).append((recorder.deps, result, recorder.changes))
+        out.append(result)
+    
+    def _scan(self, text: str, path: str, state: '_SVPreprocessState', out: List[str], depth: int):
+        """Processes directives and expands macros in text, appending the result to out"""
+        conditions = []  # [parent_active, branch_taken]
+        active = True
+        pos = 0
+        while True:
+            tick = text.find('`', pos)
+            if tick < 0:
+                if active:
+                    out.append(text[pos:])
+                break
+            if active:
+                out.append(text[pos:tick])
+            token = self._TOKEN.match(text, tick)
+            if not token:
+                if active:
+                    out.append('`')
+                pos = tick + 1
+                continue
+            directive = token.group(1)
+            pos = token.end()
+            
+            if directive in self.CONDITIONALS:
+                if directive in ('ifdef', 'ifndef', 'elsif'):
+                    name_match = self._NAME.match(text, pos)
+                    macro_name = name_match.group(1) if name_match else ""
+                    pos = name_match.end() if name_match else pos
+                if directive in ('ifdef', 'ifndef'):
+                    taken = active and (state.lookup(macro_name) is not None) == (directive == 'ifdef')
+                    conditions.append([active, taken])
+                    active = taken
+                elif not conditions:
+                    continue  # stray `elsif/`else/`endif
+                elif directive == 'elsif':
+                    parent, done = conditions[-1]
+                    active = parent and not done and state.lookup(macro_name) is not None
+                    conditions[-1][1] = done or active
+                elif directive == 'else':
+                    parent, done = conditions[-1]
+                    active = parent and not done
+                    conditions[-1][1] = True
+                else:
+                    active = conditions.pop()[0]
+                continue
+            
+            if not active:
+                continue
+            
+            if directive == 'define':
+                pos = self._define(text, pos, path, state)
+            elif directive == 'undef':
+                name_match = self._NAME.match(text, pos)
+                if name_match:
+                    state.define(name_match.group(1), None)
+                    pos = name_match.end()
+            elif directive == 'include':
+                pos = self._parse_include(text, pos, path, state, out, depth)
+            elif directive in self.LINE_DIRECTIVES:
+                end = text.find('\n', pos)
+                pos = len(text) if end < 0 else end
+            elif directive in self.WORD_DIRECTIVES:
+                pass
+            elif directive in ('__FILE__', '__LINE__'):
+                out.append(f'"{path}"' if directive == '__FILE__' else str(text.count('\n', 0, tick) + 1))
+            else:
+                macro = state.lookup(directive)
+                if macro is None:
+                    out.append(token.group(0))  # unknown macro: keep it for the analyzer
+                    continue
+                args = None
+                if macro.params is not None:
+                    args, pos = self._parse_args(text, pos)
+                expansion = self._substitute(macro, args)
+                if depth < self.MAX_EXPANSION_DEPTH:
+                    self._scan(expansion, path, state, out, depth + 1)
+                else:
+                    out.append(expansion)
+    
+    def _define(self, text: str, pos: int, path: str, state: '_SVPreprocessState') -> int:
+        name_match = self._NAME.match(text, pos)
+        if not name_match:
+            return pos
+        name = name_match.group(1)
+        pos = name_match.end()
+        
+        params = None
+        if text.startswith('(', pos):
+            close = text.find(')', pos)
+            params = []
+            for param in filter(None, (p.strip() for p in text[pos + 1:close].split(','))):
+                param_name, eq, default = param.partition('=')
+                params.append((param_name.strip(), default.strip() if eq else None))
+            pos = close + 1
+        
+        # Body runs to the end of the line, continued by trailing backslashes
+        lines = []
+        while True:
+            end = text.find('\n', pos)
+            line = text[pos:] if end < 0 else text[pos:end]
+            if line.rstrip().endswith('\\'):
+                lines.append(line.rstrip()[:-1])
+                pos = end + 1
+                continue
+            lines.append(line)
+            pos = len(text) if end < 0 else end
+            break
+        state.define(name, SVMacro('\n'.join(lines).strip(), params))
+        return pos
+    
+    def _parse_include(self, text: str, pos: int, path: str, state: '_SVPreprocessState',
+                       out: List[str], depth: int) -> int:
+        match = self._INCLUDE.match(text, pos)
+        if not match:
+            return pos
+        name = match.group(1) or match.group(2)
+        if match.group(3):
+            # `include `FILE_MACRO
+            macro = state.lookup(match.group(3))
+            name = macro.body.strip('"<> ') if macro else None
+        if name:
+            self._include(name, os.path.dirname(path), state, out)
+        return match.end()
+    
+    @staticmethod
+    def _parse_args(text: str, pos: int) -> Tuple[Optional[List[str]], int]:
+        """Reads a parenthesized, comma-separated macro argument list"""
+        start = pos
+        while start < len(text) and text[start] in ' \t\n':
+            start += 1
+        if start >= len(text) or text[start] != '(':
+            return None, pos
+        args, current, nesting, i = [], [], 0, start + 1
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                end = i + 1
+                while end < len(text) and text[end] != '"':
+                    end += 2 if text[end] == '\\' else 1
+                current.append(text[i:end + 1])
+                i = end + 1
+                continue
+            if char in '([{':
+                nesting += 1
+            elif char in ')]}':
+                if nesting == 0:
+                    args.append(''.join(current).strip())
+                    return args, i + 1
+                nesting -= 1
+            elif char == ',' and nesting == 0:
+                args.append(''.join(current).strip())
+                current = []
+                i += 1
+                continue
+            current.append(char)
+            i += 1
+        raise ValueError("Unterminated macro argument list")
+    
+    @staticmethod
+    def _substitute(macro: SVMacro, args: Optional[List[str]]) -> str:
+        """Replaces parameters in a macro body and applies `" and `` operators"""
+        body = macro.body
+        if macro.params:
+            args = list(args or [])
+            values = {}
+            for index, (name, default) in enumerate(macro.params):
+                value = args[index] if index < len(args) and args[index] != '' else default
+                values[name] = value if value is not None else ''
+            body = re.sub(r'\b(' + '|'.join(re.escape(name) for name in values) + r')\b',
+                          lambda m: values[m.group(1)], body)
+        return body.replace('`\\`"', '\\"').replace('`"', '"').replace('``', '')
+
+class _SVPreprocessRecorder:
+    """Macros an include file looked at (with their values) and the ones it changed"""
+    
+    def __init__(self):
+        self.deps: Dict[str, Optional[SVMacro]] = {}
+        self.changes: List[Tuple[str, Optional[SVMacro]]] = []
+        self.changed: set = set()
+
+class _SVPreprocessState:
+    """Macro table of one compilation unit"""
+    
+    def __init__(self, macros: Dict[str, SVMacro]):
+        self.macros = macros
+        self.recorders: List[_SVPreprocessRecorder] = []
+        self.include_stack: List[str] = []
+        self.files: set = set()  # every include file used
+    
+    def lookup(self, name: str) -> Optional[SVMacro]:
+        value = self.macros.get(name)
+        for recorder in self.recorders:
+            if name not in recorder.changed and name not in recorder.deps:
+                recorder.deps[name] = value
+        return value
+    
+    def define(self, name: str, macro: Optional[SVMacro]):
+        """Defines a macro, or undefines it when macro is None"""
+        if macro is None:
+            self.macros.pop(name, None)
+        else:
+            self.macros[name] = macro
+        for recorder in self.recorders:
+            recorder.changes.append((name, macro))
+            recorder.changed.add(name)
+
+#---------------------------------------------------------------
+# RTL Analyzer 
+#---------------------------------------------------------------
+class RTLAnalyzer:
+    """Class responsible for RTL module analysis"""
+
+    # Bus protocols recognized by detect_protocols, in matching priority order.
+    # 'request' signals are driven by the initiator, 'response' signals by the target;
+    # a group is accepted when all signals of any 'required' set are present, and
+    # the direction of the first 'anchor' found decides which side the DUT is on.
+    PROTOCOLS = {
+        'axi': {
+            'request': ['awvalid', 'awaddr', 'awid', 'awlen', 'awsize', 'awburst', 'awprot',
+                        'wvalid', 'wdata', 'wstrb', 'wlast', 'bready',
+                        'arvalid', 'araddr', 'arid', 'arlen', 'arsize', 'arburst', 'arprot', 'rready'],
+            'response': ['awready', 'wready', 'bvalid', 'bresp', 'bid',
+                         'arready', 'rvalid', 'rdata', 'rresp', 'rlast', 'rid'],
+            'required': [('awvalid', 'awready', 'wvalid', 'wready', 'bvalid', 'bready'),
+                         ('arvalid', 'arready', 'rvalid', 'rready')],
+            'anchor': ['awvalid', 'arvalid'],
+        },
+        'apb': {
+            'request': ['psel', 'penable', 'pwrite', 'paddr', 'pwdata', 'pstrb', 'pprot'],
+            'response': ['pready', 'prdata', 'pslverr'],
+            'required': [('psel', 'penable', 'pwrite', 'paddr')],
+            'anchor': ['psel'],
+        },
+        'wishbone': {
+            'request': ['cyc', 'stb', 'we', 'adr', 'sel', 'dat_w'],
+            'response': ['ack', 'err', 'rty', 'stall', 'dat_r'],
+            'required': [('cyc', 'stb', 'ack')],
+            'anchor': ['cyc'],
+            # dat_i/dat_o only differ by direction: (initiator-driven, target-driven)
+            'aliases': {'addr': 'adr', 'dat': ('dat_w', 'dat_r')},
+        },
+        'stream': {
+            'request': ['valid', 'data', 'last', 'keep', 'strb', 'user', 'id', 'dest'],
+            'response': ['ready'],
+            'required': [('valid', 'ready')],
+            'anchor': ['valid'],
+            'aliases': {'tvalid': 'valid', 'tready': 'ready', 'tdata': 'data', 'tlast': 'last',
+                        'tkeep': 'keep', 'tstrb': 'strb', 'tuser': 'user', 'tid': 'id', 'tdest': 'dest'},
+        },
+    }
+
+    # Single-bit inputs recognized as clocks and resets (clk, aclk, clk_core, wr_clk_i, rst_n, presetn, ...)
+    CLOCK_PATTERN = re.compile(r'(^|_)[a-z]?(clk|clock)\d*(_|$)', re.IGNORECASE)
+    RESET_PATTERN = re.compile(r'(^|_)[a-z]?(rst|reset)\d*(_?n|_b)?(_|$)', re.IGNORECASE)
+    NOT_CLOCK_PATTERN = re.compile(r'_(en|enable|sel|gate|ok|div|cnt|count|req|ack|val|sync)(_[io])?$', re.IGNORECASE)
+
+    @staticmethod
+    def extract_module_info(file_path: str, preprocessor: Optional[SVPreprocessor] = None) -> ModuleInfo:
+        """Extracts information from SystemVerilog/Verilog module
+        
+        The file is preprocessed first (comments, includes, macros, ifdefs);
+        pass a shared preprocessor to reuse include files across calls.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        if preprocessor is None:
+            preprocessor = SVPreprocessor()
+        with TRACER.span("analyze.module", "analyzer", file=str(file_path)):
+            with TRACER.span("analyze.preprocess", "analyzer"):
+                content = preprocessor.preprocess_file(file_path)
+            
+            # Find module declaration
+            with TRACER.span("analyze.header", "analyzer"):
+                module_match = re.search(
+                    r'module\s+(\w+)\s*(?:#\s*\([^)]*\))?\s*\(\s*(.*?)\s*\)\s*;', 
+                    content, 
+                    re.DOTALL | re.IGNORECASE
+                )
+            
+            if not module_match:
+                raise ValueError("Module declaration not found")
+            
+            module_name = module_match.group(1)
+            ports_section = module_match.group(2)
+            
+            module_info = ModuleInfo(name=module_name)
+            
+            # Extract ports
+            with TRACER.span("analyze.ports", "analyzer"):
+                module_info.ports = RTLAnalyzer._extract_ports(ports_section, content)
+            
+            # Extract parameters
+            with TRACER.span("analyze.parameters", "analyzer"):
+                module_info.parameters = RTLAnalyzer._extract_parameters(content)
+            
+            # Extract instances and connections
+            with TRACER.span("analyze.instances", "analyzer"):
+                module_info.instances = RTLAnalyzer._extract_instances(content)
+                module_info.instance_connections = RTLAnalyzer._extract_instance_connections(
+                    content, module_info.instances)
+            
+            # Clock and reset ports (the defaults stay when none is recognized)
+            clocks, resets = RTLAnalyzer._classify_clock_reset(module_info.ports)
+            if clocks:
+                module_info.clock_signals = clocks
+            if resets:
+                module_info.reset_signals = resets
+            
+            # Extract port connections
+            with TRACER.span("analyze.connections", "analyzer"):
+                RTLAnalyzer._extract_port_connections(content, module_info)
+        
+        return module_info
+    
+    @staticmethod
+    def _remove_comments(content: str) -> str:
+        """Removes // and /* */ comments from code"""
+        content = re.sub(r'//.*?$', '', content, flags=re.MULTILINE)
+        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
+        return content
+    
+    @staticmethod
+    def _extract_ports(ports_section: str, full_content: str) -> List[Port]:
+        """Extracts port information
+        
+        In an ANSI list, names following a declaration (input logic [7:0] a, b)
+        share its direction and width.
+        """
+        ports = []
+        port_pattern = r'(input|output|inout)\s+(?:(wire|reg|logic|bit)\s+)?(?:(signed)\s+)?(\[.*?\])?\s*(\w+)'
+        
+        # Look for declarations in ports section, split on top-level commas
+        items, depth, start = [], 0, 0
+        for i, char in enumerate(ports_section):
+            depth += {'(': 1, '[': 1, '{': 1, ')': -1, ']': -1, '}': -1}.get(char, 0)
+            if char == ',' and depth == 0:
+                items.append(ports_section[start:i])
+                start = i + 1
+        items.append(ports_section[start:])
+        
+        previous = None
+        for item in items:
+            item = item.strip()
+            match = re.match(port_pattern, item, re.IGNORECASE)
+            if match:
+                direction, wire_type, signed, width, name = match.groups()
+                previous = Port(
+                    name=name.strip(),
+                    direction=direction.lower(),
+                    width=width.strip() if width else "1"
+                )
+                ports.append(previous)
+            elif previous and re.fullmatch(r'\w+(?:\s*\[.*?\])*', item):
+                ports.append(Port(
+                    name=re.match(r'\w+', item).group(0),
+                    direction=previous.direction,
+                    width=previous.width
+                ))
+            else:
+                previous = None
+        
+        # If no ports found in declaration, look in module body
+        if not ports:
+            ports = RTLAnalyzer._extract_ports_from_body(full_content)
+        
+        return ports
+    
+    @staticmethod
+    def _extract_ports_from_body(content: str) -> List[Port]:
+        """Extracts ports from module body (separate declarations)"""
+        ports = []
+        separate_pattern = r'(input|output|inout)\s+(?:(wire|reg|logic|bit)\s+)?(?:(signed)\s+)?(\[.*?\])?\s*(\w+(?:\s*,\s*\w+)*)\s*;'
+        
+        matches = re.findall(separate_pattern, content, re.IGNORECASE | re.MULTILINE)
+        
+        for direction, wire_type, signed, width, names in matches:
+            name_list = [name.strip() for name in names.split(',')]
+            
+            for name in name_list:
+                if name:
+                    port = Port(
+                        name=name,
+                        direction=direction.lower(),
+                        width=width.strip() if width else "1"
+                    )
+                    ports.append(port)
+        
+        return ports
+    
+    @staticmethod
+    def _extract_parameters(content: str) -> Dict[str, str]:
+        """Extracts module parameters"""
+        parameters = {}
+        param_pattern = r'parameter\s+(?:\w+\s+)?(\w+)\s*=\s*([^;,]+)'
+        
+        matches = re.findall(param_pattern, content, re.IGNORECASE)
+        
+        for name, value in matches:
+            # The last header parameter runs into the closing ")" of #( ... )
+            depth = 0
+            for i, char in enumerate(value):
+                depth += {'(': 1, ')': -1}.get(char, 0)
+                if depth < 0:
+                    value = value[:i]
+                    break
+            parameters[name.strip()] = value.strip()
+        
+        return parameters
+
+    # Words that can precede "name (" without being a module type
+    NON_INSTANCE_KEYWORDS = frozenset({
+        'module', 'macromodule', 'interface', 'program', 'package', 'class', 'primitive', 'checker',
+        'function', 'task', 'property', 'sequence', 'covergroup', 'config', 'generate',
+        'automatic', 'static', 'virtual', 'extern', 'pure', 'void', 'new', 'import', 'export',
+        'assert', 'assume', 'cover', 'restrict', 'expect', 'if', 'else', 'for', 'foreach', 'while',
+        'do', 'repeat', 'forever', 'case', 'casex', 'casez', 'return', 'wait', 'disable',
+        'begin', 'end', 'fork', 'join', 'initial', 'final', 'always', 'always_comb', 'always_ff',
+        'always_latch', 'assign', 'input', 'output', 'inout', 'wire', 'reg', 'logic', 'bit',
+        'byte', 'int', 'integer', 'string', 'real',
+    })
+    
+    # Instance port list up to its closing ")": .port(net) nesting plus one level inside nets
+    PORT_LIST_PATTERN = re.compile(r'(?:[^()]|\((?:[^()]|\([^()]*\))*\))*')
+    
+    @staticmethod
+    def _skip_parens(content: str, i: int) -> int:
+        """Index just past the ")" closing the "(" before content[i]"""
+        depth = 1
+        while depth and i < len(content):
+            depth += {'(': 1, ')': -1}.get(content[i], 0)
+            i += 1
+        return i
+    
+    @staticmethod
+    def _instance_headers(content: str) -> List[Tuple[str, str, int]]:
+        """(module, instance, index after the port list "(") of each instantiation, in source order"""
+        found = [(match.start(), match.group(1), match.group(2), match.end())
+                 for match in re.finditer(r'\b(\w+)\s+(\w+)\s*\(', content)]
+        
+        # Parameter overrides can nest parentheses, so they are skipped by counting
+        name_pattern = re.compile(r'\s*(\w+)\s*\(')
+        for match in re.finditer(r'#\s*\(', content):
+            module = re.search(r'(\w+)\s*$', content[max(0, match.start() - 256):match.start()])
+            name = name_pattern.match(content, RTLAnalyzer._skip_parens(content, match.end()))
+            if module and name:
+                found.append((match.start(), module.group(1), name.group(1), name.end()))
+        
+        keywords = RTLAnalyzer.NON_INSTANCE_KEYWORDS
+        return [(module_name, instance_name, end) for _, module_name, instance_name, end in sorted(found)
+                if module_name not in keywords and instance_name not in keywords]
+    
+    @staticmethod
+    def _extract_instances(content: str) -> Dict[str, str]:
+        """Extracts module instances, with or without a #(...) parameter override"""
+        return {instance_name: module_name
+                for module_name, instance_name, _ in RTLAnalyzer._instance_headers(content)}
+
+    @staticmethod
+    def _extract_instance_connections(content: str, instances: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+        """Named port connections (.port(net)) of each instance
+        
+        A .* wildcard is recorded as "*": "*"; positional instances get no entries.
+        """
+        connections = {}
+        for module_name, instance_name, start in RTLAnalyzer._instance_headers(content):
+            if instances.get(instance_name) != module_name:
+                continue
+            body = RTLAnalyzer.PORT_LIST_PATTERN.match(content, start).group(0)
+            ports = {}
+            for port, net in re.findall(r'\.(\w+)\s*\(\s*((?:[^()]|\([^()]*\))*?)\s*\)', body):
+                if net:
+                    ports[port] = re.sub(r'\s+', '', net)
+            if re.search(r'\.\s*\*', body):
+                ports['*'] = '*'
+            connections[instance_name] = ports
+        return connections
+
+    @staticmethod
+    def _classify_clock_reset(ports: List[Port]) -> Tuple[List[str], List[str]]:
+        """Names of the single-bit input ports that look like clocks and resets"""
+        candidates = [p.name for p in ports if p.direction == 'input' and p.width == '1']
+        clocks = [name for name in candidates
+                  if RTLAnalyzer.CLOCK_PATTERN.search(name) and not RTLAnalyzer.NOT_CLOCK_PATTERN.search(name)]
+        resets = [name for name in candidates if name not in clocks and RTLAnalyzer.RESET_PATTERN.search(name)]
+        return clocks, resets
+
+    @staticmethod
+    def is_active_low(reset: str) -> bool:
+        """Naming convention for active-low resets (rst_n, aresetn, rst_b, rst_ni)"""
+        return bool(re.search(r'(_n|resetn|rstn|_b|_ni)$', reset, re.IGNORECASE))
+
+    @staticmethod
+    def clock_period_hint(name: str, default: float = 10.0) -> float:
+        """Period in ns implied by a clock name such as clk_100m or clk_62p5mhz"""
+        match = re.search(r'(\d+(?:p\d+)?)_?(mhz|m|ghz|g|khz|k)(_|$)', name, re.IGNORECASE)
+        if not match:
+            return default
+        value = float(match.group(1).replace('p', '.'))
+        unit = match.group(2).lower()[0]
+        mhz = value * {'g': 1000.0, 'm': 1.0, 'k': 0.001}[unit]
+        return round(1000.0 / mhz, 3) if mhz else default
+
+    @staticmethod
+    def port_domains(module_info: ModuleInfo) -> Dict[str, str]:
+        """Clock port each non-clock port is most likely sampled by
+        
+        A port belongs to the clock whose name stem (the clock name without
+        its clk/clock token, e.g. wr for wr_clk) it shares; everything else
+        goes to the first clock.
+        """
+        clocks = [p.name for p in module_info.ports if p.name in module_info.clock_signals]
+        if not clocks:
+            return {}
+        stems = {}
+        for clock in clocks:
+            stem = re.sub(r'(^|_)[a-z]?(clk|clock)\d*(_i|_in)?(_|$)', '_', clock, flags=re.IGNORECASE).strip('_').lower()
+            if stem:
+                stems[stem] = clock
+        domains = {}
+        for port in module_info.ports:
+            if port.name in clocks:
+                continue
+            tokens = set(port.name.lower().split('_'))
+            name = port.name.lower()
+            owner = next((clock for stem, clock in stems.items()
+                          if stem in tokens or name.startswith(stem + '_') or name.endswith('_' + stem)), clocks[0])
+            domains[port.name] = owner
+        return domains
+
+    @staticmethod
+    def infer_clock_domains(hierarchy: ModuleHierarchy, periods: Optional[Dict[str, float]] = None,
+                            default_period: float = 10.0) -> List[ClockDomain]:
+        """Groups every instance clock port by the net that ultimately drives it
+        
+        Clock nets are followed from the top-level clock ports down the
+        instance tree through the named port connections; a clock port fed
+        by a net that is not a clock port of its parent (a divider output,
+        a gated clock, ...) starts a generated domain. Positional instances
+        and ports left to a .* wildcard connect by name. Periods come
+        from the periods mapping (by domain name or clock net), then from
+        the clock name (clk_100m), then default_period.
+        """
+        periods = periods or {}
+        top = hierarchy.top_level
+        tree = hierarchy.instance_tree()
+        domains: Dict[str, ClockDomain] = {}
+        
+        def new_domain(key: str, name: str, generated: bool) -> ClockDomain:
+            name = re.sub(r'\W+', '_', name).strip('_') or 'clk'
+            period = periods.get(name, periods.get(key, RTLAnalyzer.clock_period_hint(key, default_period)))
+            domains[key] = ClockDomain(name=name, clock=key, period_ns=float(period), generated=generated)
+            return domains[key]
+        
+        top_ports = {p.name for p in top.ports}
+        top_clocks = {name: name for name in top.clock_signals if name in top_ports}
+        top_resets = {name: name for name in top.reset_signals if name in top_ports}
+        for name in top_clocks:
+            new_domain(name, name, False)
+        
+        stack = [(top.name, top, top_clocks, top_resets)]
+        while stack:
+            path, module, clocks, resets = stack.pop()
+            for inst, sub in tree.children(module.name).items():
+                child = hierarchy.submodules[sub]
+                child_path = f"{path}.{inst}"
+                conns = module.instance_connections.get(inst) or {}
+                by_name = not conns or '*' in conns
+                child_ports = {p.name for p in child.ports}
+                
+                def net_of(port, nets):
+                    if port in conns:
+                        return conns[port]
+                    return port if by_name and port in nets else None
+                
+                child_resets = {}
+                for port in child.reset_signals:
+                    net = net_of(port, resets)
+                    if port in child_ports and net:
+                        child_resets[port] = resets.get(net, f"{path}.{net}")
+                
+                child_clocks = {}
+                for port in child.clock_signals:
+                    net = net_of(port, clocks)
+                    if port not in child_ports or not net:
+                        continue
+                    key = clocks.get(net)
+                    if key is None:
+                        key = f"{path}.{net}"
+                        if key not in domains:
+                            new_domain(key, key.split('.', 1)[-1], True)
+                    domain = domains[key]
+                    domain.members.append((child_path, sub, port))
+                    if not domain.reset:
+                        reset = next((r for r in child_resets.values() if r in top_resets), "")
+                        domain.reset = reset
+                    child_clocks[port] = key
+                
+                stack.append((child_path, child, child_clocks, child_resets))
+        
+        # Domains nothing else claimed a reset for use the single top-level reset, if there is one
+        for domain in domains.values():
+            if not domain.reset and len(top_resets) == 1:
+                domain.reset = next(iter(top_resets))
+            domain.reset_active_low = RTLAnalyzer.is_active_low(domain.reset) if domain.reset else False
+        return list(domains.values())
+
+    @staticmethod
+    def _extract_port_connections(content: str, module_info: ModuleInfo):
+        """Extracts port connections from module content"""
+        port_connections = re.findall(r'\.(\w+)\s*\(\s*(\w+)\s*\)', content)
+        for port_name, connection in port_connections:
+            for port in module_info.ports:
+                if port.name == port_name:
+                    port.connected_to = connection
+                    break
+
+    @staticmethod
+    def detect_protocols(module_info: ModuleInfo) -> List[BusInterface]:
+        """Groups ports into protocol interfaces (see PROTOCOLS)
+        
+        Ports are clustered by the prefix left after removing a known signal
+        suffix (and an optional _i/_o/_in/_out direction suffix), then each
+        cluster is matched against the protocol signatures. A port belongs to
+        at most one interface; unmatched ports are left to the generic agent.
+        """
+        claimed = set()
+        buses = []
+        for protocol, spec in RTLAnalyzer.PROTOCOLS.items():
+            names = sorted(set(spec['request'] + spec['response']) | set(spec.get('aliases', {})),
+                           key=len, reverse=True)
+            groups = {}
+            for port in module_info.ports:
+                if port.name in claimed or port.direction == 'inout':
+                    continue
+                base = re.sub(r'_(i|o|in|out)$', '', port.name.lower())
+                for name in names:
+                    prefix = base[:-len(name)]
+                    if base.endswith(name) and (not prefix or prefix.endswith('_')):
+                        groups.setdefault(prefix, []).append((name, port))
+                        break
+            
+            for prefix, matches in sorted(groups.items()):
+                bus = RTLAnalyzer._match_protocol(protocol, spec, prefix, matches)
+                if bus is None:
+                    continue
+                bus.prefix = matches[0][1].name[:len(prefix)]
+                bus.clock, bus.reset = RTLAnalyzer._bus_clock_reset(module_info, prefix)
+                claimed.update(port.name for port in bus.signals.values())
+                buses.append(bus)
+        
+        # Interface names become class names, so they must be unique
+        seen = Counter(bus.name for bus in buses)
+        for index, bus in enumerate(buses):
+            if seen[bus.name] > 1:
+                bus.name = f"{bus.name}{index}"
+        return buses
+
+    @staticmethod
+    def _match_protocol(protocol: str, spec: Dict, prefix: str, matches: List[Tuple]) -> Optional[BusInterface]:
+        """Checks one prefix cluster (matched suffix, port) against a protocol signature"""
+        aliases = spec.get('aliases', {})
+        keyed = [(aliases.get(name, name), port) for name, port in matches]
+        anchors = [port for anchor in spec['anchor'] for key, port in keyed if key == anchor]
+        if not anchors:
+            return None
+        dut_initiator = anchors[0].direction == 'output'
+        initiator_dir = 'output' if dut_initiator else 'input'
+        
+        signals = {}
+        for key, port in keyed:
+            if isinstance(key, tuple):
+                key = key[0] if port.direction == initiator_dir else key[1]
+            expected = initiator_dir if key in spec['request'] else ('input' if dut_initiator else 'output')
+            if port.direction == expected and key not in signals:
+                signals[key] = port
+        
+        if not any(all(name in signals for name in required) for required in spec['required']):
+            return None
+        
+        if protocol == 'axi':
+            variant = 'axi4' if 'awlen' in signals or 'arlen' in signals else 'axi4-lite'
+        elif protocol == 'stream':
+            variant = 'axi-stream' if any(name == 'tvalid' for name, _ in matches) else 'valid-ready'
+        else:
+            variant = protocol
+        return BusInterface(protocol=protocol, variant=variant, prefix=prefix,
+                            dut_initiator=dut_initiator, signals=signals)
+
+    @staticmethod
+    def _bus_clock_reset(module_info: ModuleInfo, prefix: str) -> Tuple[str, str]:
+        """Clock and reset ports for an interface, preferring ones sharing its prefix"""
+        def pick(known):
+            candidates = [p.name for p in module_info.get_input_ports() if p.name in known]
+            own = [name for name in candidates if prefix and name.lower().startswith(prefix)]
+            return (own or candidates or [""])[0]
+        
+        return pick(module_info.clock_signals), pick(module_info.reset_signals)
+
+    @staticmethod
+    def discover_sources(project_dir: str) -> List[Path]:
+        """Lists Verilog/SystemVerilog sources under a directory"""
+        return [Path(project_dir) / rel for rel in RTLAnalyzer.walk_sources(project_dir)]
+
+    @staticmethod
+    def walk_sources(project_dir: str) -> List[str]:
+        """Source paths relative to project_dir, sorted (os.walk avoids pathlib overhead)"""
+        sources = []
+        for root, dirs, files in os.walk(project_dir):
+            rel_root = os.path.relpath(root, project_dir)
+            for name in files:
+                if name.endswith(('.sv', '.v')):
+                    sources.append(name if rel_root == '.' else os.path.join(rel_root, name))
+        return sorted(sources)
+
+    @staticmethod
+    def extract_hierarchy(project_dir: str, preprocessor: Optional[SVPreprocessor] = None) -> ModuleHierarchy:
+        """Analyzes a complete project and extracts the hierarchy"""
+        modules = {}
+        file_mapping = {}
+        if preprocessor is None:
+            preprocessor = SVPreprocessor([project_dir])
+        
+        with TRACER.span("analyze.hierarchy", "analyzer", project=str(project_dir)):
+            # Step 1: Extract all modules
+            sources = RTLAnalyzer.discover_sources(project_dir)
+            for file in sources:
+                try:
+                    module_info = RTLAnalyzer.extract_module_info(str(file), preprocessor)
+                    modules[module_info.name] = module_info
+                    file_mapping[module_info.name] = str(file)
+                except ValueError as e:
+                    continue
+            
+            with TRACER.span("analyze.build_hierarchy", "analyzer"):
+                hierarchy = RTLAnalyzer.build_hierarchy(modules, file_mapping,
+                                                        includes=RTLAnalyzer.include_dependencies(file_mapping, preprocessor))
+            hierarchy.root = str(project_dir)
+            hierarchy.sources = [str(file) for file in sources]
+            return hierarchy
+
+    @staticmethod
+    def include_dependencies(file_mapping: Dict[str, str], preprocessor: SVPreprocessor) -> Dict[str, List[str]]:
+        """Include files each mapped source used when it was preprocessed"""
+        includes = {}
+        for path in set(file_mapping.values()):
+            files = preprocessor.dependencies.get(os.path.abspath(path))
+            if files:
+                includes[path] = sorted(files)
+        return includes
+
+    @staticmethod
+    def net_links(module: ModuleInfo, modules) -> List[Tuple[str, str, str, str]]:
+        """(src_inst, src_port, dest_inst, dest_port) for every child output port
+        that drives a child input port through a net of module
+        
+        Positional instances and ports left to a .* wildcard connect by name;
+        bit and part selects count as their base net, concatenations are skipped.
+        """
+        drivers = defaultdict(list)
+        loads = defaultdict(list)
+        for inst, sub in module.instances.items():
+            if sub not in modules or sub == module.name:
+                continue
+            conns = module.instance_connections.get(inst) or {}
+            by_name = not conns or '*' in conns
+            for port in modules[sub].ports:
+                net = conns.get(port.name, port.name if by_name else None)
+                match = re.fullmatch(r'(\w+)(\[[^\]]*\])*', net or '')
+                if not match:
+                    continue
+                if port.direction == 'output':
+                    drivers[match.group(1)].append((inst, port.name))
+                elif port.direction == 'input':
+                    loads[match.group(1)].append((inst, port.name))
+        links = []
+        for net, sources in drivers.items():
+            for src_inst, src_port in sources:
+                for dest_inst, dest_port in loads.get(net, []):
+                    if dest_inst != src_inst:
+                        links.append((src_inst, src_port, dest_inst, dest_port))
+        return links
+    
+    @staticmethod
+    def build_hierarchy(modules: Dict[str, ModuleInfo], file_mapping: Dict[str, str],
+                        preferred_top: Optional[str] = None,
+                        includes: Optional[Dict[str, List[str]]] = None) -> ModuleHierarchy:
+        """Assembles a hierarchy from already extracted modules"""
+        # Identify top-level (module not instantiated by others)
+        top_level_candidates = set(modules.keys())
+        for module in modules.values():
+            for instance in module.instances.values():
+                if instance in top_level_candidates:
+                    top_level_candidates.remove(instance)
+        
+        if not top_level_candidates:
+            raise ValueError("Could not identify top-level module")
+        
+        if preferred_top in top_level_candidates:
+            top_level_name = preferred_top
+        else:
+            top_level_name = sorted(top_level_candidates)[0]
+        top_level = modules[top_level_name]
+        
+        # Map hierarchical connections: instance outputs driving instance inputs over a shared net
+        connections = []
+        for module in modules.values():
+            for src_inst, src_port, dest_inst, dest_port in RTLAnalyzer.net_links(module, modules):
+                connections.append((module.instances[src_inst], src_port, module.instances[dest_inst], dest_port))
+        
+        # Filter submodules (all except top-level)
+        submodules = {name: mod for name, mod in modules.items() if name != top_level_name}
+        
+        file_mapping = {name: path for name, path in file_mapping.items() if name in modules}
+        sources = set(file_mapping.values())
+        return ModuleHierarchy(
+            top_level=top_level,
+            submodules=submodules,
+            connections=connections,
+            file_mapping=file_mapping,
+            includes={path: files for path, files in (includes or {}).items() if path in sources}
+        )
+
+#---------------------------------------------------------------
+# Register Import
+#---------------------------------------------------------------
+class RegisterSpecImporter:
+    """Reads register specifications into a RegisterBlock
+    
+    CSV has one row per field with register, offset, field, bits, access,
+    reset and description columns (optional: size, count, hdl_path,
+    volatile); an empty register cell, or the previous register's name,
+    continues that register.
+    IP-XACT (1685-2009, 2014 and 2022) is read with iterparse and every
+    register element is dropped once converted, so memory stays flat on
+    specs with many thousands of registers.
+    """
+    UVM_ACCESS = {'RO', 'RW', 'RC', 'RS', 'WRC', 'WRS', 'WC', 'WS', 'WSRC', 'WCRS', 'W1C', 'W1S', 'W1T',
+                  'W0C', 'W0S', 'W0T', 'W1SRC', 'W1CRS', 'W0SRC', 'W0CRS', 'WO', 'WOC', 'WOS', 'W1', 'WO1'}
+    IPXACT_ACCESS = {'read-write': 'RW', 'read-only': 'RO', 'write-only': 'WO',
+                     'read-writeonce': 'W1', 'writeonce': 'WO1'}
+    MODIFIED_WRITE = {'oneToClear': 'W1C', 'oneToSet': 'W1S', 'oneToToggle': 'W1T', 'zeroToClear': 'W0C',
+                      'zeroToSet': 'W0S', 'zeroToToggle': 'W0T', 'clear': 'WC', 'set': 'WS'}
+    HARDWARE_UPDATED = ('RO', 'RC', 'RS')  # Treated as volatile unless the spec says otherwise
+    VERILOG_INT = re.compile(r"(?:\d+)?'s?([hdbo])([0-9a-f]+)")
+    
+    @classmethod
+    def load(cls, path: str, name: Optional[str] = None) -> RegisterBlock:
+        """Imports a .csv file or an IP-XACT XML file"""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Register spec not found: {path}")
+        with TRACER.span("registers.import", "analyzer", file=str(path)):
+            if Path(path).suffix.lower() == '.csv':
+                block = cls.from_csv(path, name)
+            else:
+                block = cls.from_ipxact(path, name)
+            cls.check(block, path)
+        return block
+    
+    @staticmethod
+    def check(block: RegisterBlock, path: str = ""):
+        """Rejects duplicate register names and registers whose address ranges overlap"""
+        names = set()
+        for register in block.registers:
+            if register.name in names:
+                raise ValueError(f"{path}: register {register.name} is defined twice")
+            names.add(register.name)
+        
+        previous = None
+        for register in sorted(block.registers, key=lambda r: r.offset):
+            if previous and register.offset < previous.offset + max(1, previous.dim) * previous.stride:
+                raise ValueError(f"{path}: register {register.name} at 0x{register.offset:x} overlaps "
+                                 f"{previous.name} at 0x{previous.offset:x}")
+            previous = register
+    
+    @staticmethod
+    def parse_int(text, default: int = 0) -> int:
+        """Integer in decimal, 0x/0b/0o or Verilog ('hFF, 32'h0) notation"""
+        text = str(text or "").strip().replace('_', '').lower()
+        if not text:
+            return default
+        if text.isdigit():
+            return int(text)
+        match = RegisterSpecImporter.VERILOG_INT.fullmatch(text)
+        if match:
+            return int(match.group(2), {'h': 16, 'd': 10, 'b': 2, 'o': 8}[match.group(1)])
+        if text.startswith('#'):  # IP-XACT 1.x hex
+            return int(text[1:], 16)
+        return int(text, 0) if re.match(r'0[xbo]', text) else int(text)
+    
+    @staticmethod
+    def identifier(name: str) -> str:
+        """SystemVerilog-safe class/handle name"""
+        name = re.sub(r'\W', '_', name.strip())
+        return f"r_{name}" if not name or name[0].isdigit() else name
+    
+    @classmethod
+    def access(cls, access: str = "", modified_write: str = "", read_action: str = "") -> str:
+        """UVM access policy from a CSV/IP-XACT access description"""
+        base = access.strip()
+        base = base.upper() if base.upper() in cls.UVM_ACCESS else cls.IPXACT_ACCESS.get(base.lower(), 'RW')
+        if modified_write in cls.MODIFIED_WRITE:
+            return cls.MODIFIED_WRITE[modified_write]
+        if read_action in ('clear', 'set'):
+            return ('R' if base == 'RO' else 'WR') + read_action[0].upper()
+        return base
+    
+    @staticmethod
+    def parse_bits(bits: str, width: int) -> Tuple[int, int]:
+        """(lsb, width) of a "7:0", "[3]" or empty (whole register) bit range"""
+        bits = bits.strip().strip('[]')
+        if not bits:
+            return 0, width
+        msb, _, lsb = bits.partition(':')
+        msb, lsb = int(msb), int(lsb or msb)
+        return min(msb, lsb), abs(msb - lsb) + 1
+    
+    @classmethod
+    def from_csv(cls, path: str, name: Optional[str] = None) -> RegisterBlock:
+        registers = []
+        current = None
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+                if current and row.get('register') and cls.identifier(row['register']) == current.name:
+                    if row.get('offset') and cls.parse_int(row['offset']) != current.offset:
+                        raise ValueError(f"{path}:{reader.line_num}: register {current.name} "
+                                         f"repeated with a different offset")
+                elif row.get('register'):
+                    current = Register(
+                        name=cls.identifier(row['register']),
+                        offset=cls.parse_int(row.get('offset')),
+                        width=cls.parse_int(row.get('size'), 32),
+                        dim=cls.parse_int(row.get('count')),
+                        hdl_path=row.get('hdl_path', ""),
+                        description=row.get('description', "") if not row.get('field') else ""
+                    )
+                    registers.append(current)
+                elif current is None:
+                    raise ValueError(f"{path}:{reader.line_num}: field row before any register")
+                if not row.get('field') and not row.get('bits') and current.fields:
+                    continue
+                lsb, width = cls.parse_bits(row.get('bits', ""), current.width)
+                access = cls.access(row.get('access', ""))
+                volatile = row.get('volatile', "").lower()
+                current.fields.append(RegisterField(
+                    name=cls.identifier(row.get('field') or 'value'),
+                    lsb=lsb,
+                    width=width,
+                    access=access,
+                    reset=cls.parse_int(row.get('reset')),
+                    volatile=volatile in ('1', 'true', 'yes') if volatile else access in cls.HARDWARE_UPDATED,
+                    description=row.get('description', "")
+                ))
+        width = max([register.width for register in registers] or [32])
+        return RegisterBlock(name or Path(path).stem, registers, width=width)
+    
+    @classmethod
+    def from_ipxact(cls, path: str, name: Optional[str] = None) -> RegisterBlock:
+        registers = []
+        block = {'baseAddress': '0', 'width': '32'}
+        component = ""
+        tags, elements = [], []
+        register = bit_field = None
+        for event, elem in ET.iterparse(path, events=('start', 'end')):
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if event == 'start':
+                tags.append(tag)
+                elements.append(elem)
+                if tag == 'register':
+                    register = {'fields': [], 'path': []}
+                elif tag == 'field' and register is not None:
+                    bit_field = {}
+                elif tag == 'addressBlock':
+                    block = {'baseAddress': '0', 'width': '32'}
+                continue
+            
+            tags.pop()
+            elements.pop()
+            parent = tags[-1] if tags else ""
+            text = (elem.text or "").strip()
+            if tag == 'register' and register is not None:
+                registers.append(cls._ipxact_register(register, block))
+                register = None
+                elem.clear()
+                if elements:
+                    elements[-1].remove(elem)
+            elif tag == 'field' and bit_field is not None:
+                register['fields'].append(bit_field)
+                bit_field = None
+            elif bit_field is not None:
+                if tag == 'value' and parent == 'reset':
+                    bit_field['reset'] = text
+                elif parent in ('field', 'fieldAccessPolicy') and tag != 'reset':
+                    bit_field[tag] = text
+            elif register is not None:
+                if tag == 'value' and parent == 'reset':
+                    register['reset'] = text
+                elif parent in ('register', 'accessPolicy') and tag != 'reset':
+                    register[tag] = text
+                elif tag == 'pathSegmentName':
+                    register['path'].append(text)
+            elif parent == 'addressBlock':
+                block[tag] = text
+            elif parent == 'component' and tag == 'name':
+                component = text
+        
+        width = max([register.width for register in registers] or [cls.parse_int(block['width'], 32)])
+        return RegisterBlock(name or component or Path(path).stem, registers, width=width)
+    
+    @classmethod
+    def _ipxact_register(cls, register: Dict, block: Dict) -> Register:
+        """Register from the child texts collected by from_ipxact"""
+        width = cls.parse_int(register.get('size'), cls.parse_int(block['width'], 32))
+        reset = cls.parse_int(register.get('reset'))
+        fields = []
+        for bit_field in register['fields'] or [{'name': 'value'}]:
+            lsb = cls.parse_int(bit_field.get('bitOffset'))
+            size = cls.parse_int(bit_field.get('bitWidth'), width)
+            access = cls.access(bit_field.get('access') or register.get('access', ""),
+                                bit_field.get('modifiedWriteValue', ""), bit_field.get('readAction', ""))
+            volatile = bit_field.get('volatile') or register.get('volatile', "")
+            fields.append(RegisterField(
+                name=cls.identifier(bit_field.get('name', 'value')),
+                lsb=lsb,
+                width=size,
+                access=access,
+                reset=(cls.parse_int(bit_field['reset']) if 'reset' in bit_field
+                       else (reset >> lsb) & ((1 << size) - 1)),
+                volatile=volatile.lower() == 'true' if volatile else access in cls.HARDWARE_UPDATED,
+                description=" ".join(bit_field.get('description', "").split())
+            ))
+        return Register(
+            name=cls.identifier(register.get('name', "")),
+            offset=cls.parse_int(block['baseAddress']) + cls.parse_int(register.get('addressOffset')),
+            width=width,
+            fields=fields,
+            dim=cls.parse_int(register.get('dim')),
+            hdl_path=".".join(register['path']),
+            description=" ".join(register.get('description', "").split())
+        )
+
+#---------------------------------------------------------------
+# Project Persistence
+#---------------------------------------------------------------
+class ProjectFile:
+    """Serialization of a design hierarchy to and from .vega project data"""
+    
+    @staticmethod
+    def module_to_dict(module: ModuleInfo) -> Dict:
+        """Converts a module to plain JSON-compatible data"""
+        return {
+            "name": module.name,
+            "ports": [{
+                "name": port.name,
+                "direction": port.direction,
+                "width": port.width,
+                "description": port.description,
+                "connected_to": port.connected_to
+            } for port in module.ports],
+            "parameters": module.parameters,
+            "clock_signals": module.clock_signals,
+            "reset_signals": module.reset_signals,
+            "instances": module.instances,
+            "instance_connections": module.instance_connections
+        }
+    
+    @staticmethod
+    def module_from_dict(data: Dict) -> ModuleInfo:
+        """Rebuilds a module from saved data"""
+        return ModuleInfo(
+            name=data["name"],
+            ports=[Port(**port) for port in data.get("ports", [])],
+            parameters=dict(data.get("parameters", {})),
+            clock_signals=list(data.get("clock_signals", ['clk', 'clock'])),
+            reset_signals=list(data.get("reset_signals", ['rst', 'reset'])),
+            instances=dict(data.get("instances", {})),
+            instance_connections={inst: dict(conns) for inst, conns in data.get("instance_connections", {}).items()}
+        )
+    
+    @staticmethod
+    def hierarchy_to_dict(hierarchy: ModuleHierarchy, base_dir: str) -> Dict:
+        """Converts a hierarchy, including source and include file fingerprints, to saved data
+        
+        Every scanned source is fingerprinted, so packages and other files
+        without a module do not look new on load. Source paths are stored
+        relative to the RTL root, and the root relative to base_dir (the
+        project file's directory).
+        """
+        root = hierarchy.root or base_dir
+        
+        def relative(path):
+            return os.path.relpath(Path(path).resolve(), Path(root).resolve())
+        
+        file_mapping = {name: relative(path) for name, path in hierarchy.file_mapping.items()}
+        includes = {relative(path): [relative(inc) for inc in files] for path, files in hierarchy.includes.items()}
+        sources = {relative(path) for path in hierarchy.sources}
+        return {
+            "top_level": ProjectFile.module_to_dict(hierarchy.top_level),
+            "submodules": {
+                name: ProjectFile.module_to_dict(module)
+                for name, module in hierarchy.submodules.items()
+            },
+            "connections": hierarchy.connections,
+            "root": os.path.relpath(Path(root).resolve(), Path(base_dir).resolve()),
+            "file_mapping": file_mapping,
+            "includes": includes,
+            "file_hashes": {
+                path: ProjectFile.fingerprint(Path(root) / path)
+                for path in sorted(sources.union(file_mapping.values(), *includes.values()))
+                if (Path(root) / path).exists()
+            }
+        }
+    
+    @staticmethod
+    def source_root(hierarchy_data: Dict, project_dir: str) -> str:
+        """RTL root of saved hierarchy data; older projects kept sources next to the project file"""
+        return os.path.normpath(os.path.join(project_dir, hierarchy_data.get("root", ".")))
+    
+    @staticmethod
+    def fingerprint(path: Path) -> Dict:
+        """Size, modification time and content hash of a source file"""
+        stat = path.stat()
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": hashlib.sha1(path.read_bytes()).hexdigest()
+        }
+    
+    @staticmethod
+    def is_unchanged(path: str, saved: Dict) -> bool:
+        """Checks a file against its saved fingerprint, hashing only when metadata differs"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != saved.get("size"):
+            return False
+        if stat.st_mtime_ns == saved.get("mtime_ns"):
+            return True
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest() == saved.get("sha1")
+    
+    @staticmethod
+    def stale_sources(unchanged: Dict[str, bool], includes: Dict[str, List[str]], current: List[str]) -> List[str]:
+        """Sources to re-parse: new or changed ones, those including a changed header, then deleted ones
+        
+        unchanged maps every saved path (sources and include files) to whether
+        it still matches its fingerprint; current lists the sources on disk.
+        """
+        changed_includes = {inc for files in includes.values() for inc in files if not unchanged.get(inc)}
+        included = set().union(*includes.values())
+        current_set = set(current)
+        stale = [path for path in current
+                 if not unchanged.get(path) or changed_includes.intersection(includes.get(path, ()))]
+        deleted = sorted(path for path in unchanged if path not in current_set and path not in included)
+        return stale + deleted
+    
+    @staticmethod
+    def restore_hierarchy(hierarchy_data: Dict, project_dir: str,
+                          preprocessor: Optional[SVPreprocessor] = None) -> Tuple[ModuleHierarchy, List[str]]:
+        """Rebuilds the saved hierarchy, re-parsing only stale, new or missing sources
+        
+        A source is also stale when an include file it used has changed.
+        project_dir is the project file's directory; sources are looked up
+        under the saved RTL root. Returns the hierarchy and the list of stale
+        files (relative to the root).
+        """
+        root = ProjectFile.source_root(hierarchy_data, project_dir)
+        saved_modules = [hierarchy_data["top_level"]] + list(hierarchy_data.get("submodules", {}).values())
+        file_mapping = dict(hierarchy_data.get("file_mapping", {}))
+        includes = hierarchy_data.get("includes", {})
+        unchanged = {
+            path: ProjectFile.is_unchanged(os.path.join(root, path), saved)
+            for path, saved in hierarchy_data.get("file_hashes", {}).items()
+        }
+        sources = RTLAnalyzer.walk_sources(root)
+        stale = ProjectFile.stale_sources(unchanged, includes, sources)
+        stale_set = set(stale)
+        
+        # Files whose saved fingerprint (and includes) still match keep their modules
+        modules = {}
+        for data in saved_modules:
+            path = file_mapping.get(data["name"])
+            if unchanged.get(path) and path not in stale_set:
+                modules[data["name"]] = ProjectFile.module_from_dict(data)
+        file_mapping = {name: os.path.join(root, path)
+                        for name, path in file_mapping.items() if name in modules}
+        kept_includes = {
+            os.path.join(root, path): [os.path.join(root, inc) for inc in files]
+            for path, files in includes.items()
+        }
+        
+        # Re-parse everything else found under the RTL root
+        preprocessor = preprocessor or SVPreprocessor([root])
+        parsed = {}
+        for path in stale:
+            file = os.path.join(root, path)
+            try:
+                module_info = RTLAnalyzer.extract_module_info(file, preprocessor)
+            except (ValueError, FileNotFoundError):
+                continue
+            modules[module_info.name] = module_info
+            file_mapping[module_info.name] = parsed[module_info.name] = file
+        kept_includes.update(RTLAnalyzer.include_dependencies(parsed, preprocessor))
+        
+        hierarchy = RTLAnalyzer.build_hierarchy(
+            modules, file_mapping, preferred_top=hierarchy_data["top_level"]["name"], includes=kept_includes
+        )
+        hierarchy.root = root
+        hierarchy.sources = [os.path.join(root, path) for path in sources]
+        if not stale:
+            # Nothing changed or deleted: keep the saved connections verbatim
+            hierarchy.connections = [tuple(c) for c in hierarchy_data.get("connections", [])]
+        return hierarchy, stale
+
+class LazyModuleDict(Mapping):
+    """Module mapping whose entries are read from a project database on first access"""
+    
+    def __init__(self, database: 'ProjectDatabase', names: List[str]):
+        self._database = database
+        self._names = list(names)
+        self._name_set = set(names)
+        self._cache: Dict[str, ModuleInfo] = {}
+    
+    def __getitem__(self, name: str) -> ModuleInfo:
+        if name not in self._name_set:
+            raise KeyError(name)
+        if name not in self._cache:
+            self._cache[name] = self._database.load_module(name)
+        return self._cache[name]
+    
+    def __contains__(self, name) -> bool:
+        return name in self._name_set
+    
+    def __iter__(self):
+        return iter(self._names)
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    @property
+    def path(self) -> str:
+        """Project database the modules are read from"""
+        return self._database.path
+    
+    def is_loaded(self, name: str) -> bool:
+        return name in self._cache
+    
+    def instances(self, name: str) -> Dict[str, str]:
+        """Instances of a module without reading its ports"""
+        if name in self._cache:
+            return self._cache[name].instances
+        return self._database.instances(name)
+    
+    def port_count(self, name: str) -> int:
+        """Port count of a module without reading its ports"""
+        if name in self._cache:
+            return len(self._cache[name].ports)
+        return self._database.port_count(name)
+
+
+class ProjectDatabase:
+    """Compact, versioned project format (SQLite) with on-demand section loading
+    
+    The hierarchy skeleton (module names, instances, port counts, connections)
+    is stored in plain tables; port lists and module details are stored as
+    zlib-compressed JSON blobs and only read when a module is accessed.
+    """
+    FORMAT_VERSION = 1
+    EXTENSION = ".vegadb"
+    MAGIC = b"SQLite format 3\x00"
+    
+    SCHEMA = """
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE config (section TEXT PRIMARY KEY, data TEXT);
+        CREATE TABLE modules (name TEXT PRIMARY KEY, file TEXT, is_top INTEGER,
+                              num_ports INTEGER, ports BLOB, details BLOB);
+        CREATE TABLE instances (parent TEXT, instance TEXT, module TEXT);
+        CREATE INDEX instances_parent ON instances (parent);
+        CREATE TABLE connections (src_mod TEXT, src_port TEXT, dest_mod TEXT, dest_port TEXT);
+        CREATE TABLE file_hashes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT);
+        CREATE TABLE layout (module TEXT PRIMARY KEY, x REAL, y REAL);
+    """
+    
+    @staticmethod
+    def is_database(path: str) -> bool:
+        """Detects the binary format by file signature"""
+        try:
+            with open(path, 'rb') as f:
+                return f.read(16) == ProjectDatabase.MAGIC
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _pack(data) -> bytes:
+        return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+    
+    @staticmethod
+    def _unpack(blob: bytes):
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+    
+    @classmethod
+    def save(cls, path: str, data: Dict, config: Dict, metadata: Dict, layout: Optional[Dict] = None):
+        """Writes hierarchy data (from ProjectFile.hierarchy_to_dict), configuration and a cached graph layout"""
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(cls.SCHEMA)
+            meta = dict(metadata, format_version=cls.FORMAT_VERSION, includes=data.get("includes", {}),
+                        root=data.get("root", "."))
+            if layout:
+                meta["layout_key"] = layout["key"]
+                conn.executemany("INSERT INTO layout VALUES (?, ?, ?)",
+                                 [(name, x, y) for name, (x, y) in layout["positions"].items()])
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             [(key, json.dumps(value)) for key, value in meta.items()])
+            conn.executemany("INSERT INTO config VALUES (?, ?)",
+                             [(section, json.dumps(value)) for section, value in config.items()])
+            
+            modules = [(data["top_level"], 1)] + [(m, 0) for m in data["submodules"].values()]
+            conn.executemany("INSERT INTO modules VALUES (?, ?, ?, ?, ?, ?)", [
+                (
+                    module["name"],
+                    data["file_mapping"].get(module["name"]),
+                    is_top,
+                    len(module["ports"]),
+                    cls._pack([[p["name"], p["direction"], p["width"], p["description"], p["connected_to"]]
+                               for p in module["ports"]]),
+                    cls._pack({key: module.get(key, {}) for key in ("parameters", "clock_signals", "reset_signals",
+                                                                    "instance_connections")})
+                )
+                for module, is_top in modules
+            ])
+            conn.executemany("INSERT INTO instances VALUES (?, ?, ?)", [
+                (module["name"], inst_name, mod_name)
+                for module, _ in modules
+                for inst_name, mod_name in module["instances"].items()
+            ])
+            conn.executemany("INSERT INTO connections VALUES (?, ?, ?, ?)", data["connections"])
+            conn.executemany("INSERT INTO file_hashes VALUES (?, ?, ?, ?)", [
+                (file, h["size"], h["mtime_ns"], h["sha1"]) for file, h in data["file_hashes"].items()
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.metadata = {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+        
+        version = self.metadata.get("format_version")
+        if version != self.FORMAT_VERSION:
+            self.conn.close()
+            raise ValueError(f"Unsupported project format version: {version}")
+    
+    def close(self):
+        self.conn.close()
+    
+    def load_config(self) -> Dict:
+        """Reads the saved configuration sections"""
+        return {section: json.loads(data) for section, data in self.conn.execute("SELECT section, data FROM config")}
+    
+    def load_layout(self) -> Optional[Dict]:
+        """Cached connection graph layout, if one was saved"""
+        key = self.metadata.get("layout_key")
+        if not key:
+            return None
+        return {"key": key, "positions": {name: (x, y) for name, x, y in self.conn.execute("SELECT * FROM layout")}}
+    
+    def top_level_name(self) -> str:
+        return self.conn.execute("SELECT name FROM modules WHERE is_top = 1").fetchone()[0]
+    
+    def module_names(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT name FROM modules ORDER BY rowid")]
+    
+    def port_count(self, name: str) -> int:
+        row = self.conn.execute("SELECT num_ports FROM modules WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+    
+    def instances(self, name: str) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT instance, module FROM instances WHERE parent = ? ORDER BY rowid", (name,)))
+    
+    def source_root(self, project_dir: str) -> str:
+        """RTL root of the saved sources, given the project file's directory"""
+        return os.path.normpath(os.path.join(project_dir, self.metadata.get("root", ".")))
+    
+    def file_mapping(self, root: str) -> Dict[str, str]:
+        return {name: os.path.join(root, file)
+                for name, file in self.conn.execute("SELECT name, file FROM modules WHERE file IS NOT NULL")}
+    
+    def load_module(self, name: str) -> ModuleInfo:
+        """Reads one module's ports and details"""
+        row = self.conn.execute("SELECT ports, details FROM modules WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        details = self._unpack(row[1])
+        return ModuleInfo(
+            name=name,
+            ports=[Port(name=p[0], direction=p[1], width=p[2], description=p[3], connected_to=p[4])
+                   for p in self._unpack(row[0])],
+            parameters=details["parameters"],
+            clock_signals=details["clock_signals"],
+            reset_signals=details["reset_signals"],
+            instances=self.instances(name),
+            instance_connections=details.get("instance_connections", {})
+        )
+    
+    def stale_files(self, root: str, sources: Optional[List[str]] = None) -> List[str]:
+        """Saved, deleted or newly added sources whose content (or included headers) no longer match
+        
+        Every scanned source has a fingerprint, packages and include-only
+        files included; sources defaults to the files currently under root.
+        """
+        unchanged = {
+            path: ProjectFile.is_unchanged(os.path.join(root, path),
+                                           {"size": size, "mtime_ns": mtime_ns, "sha1": sha1})
+            for path, size, mtime_ns, sha1 in self.conn.execute("SELECT * FROM file_hashes")
+        }
+        return ProjectFile.stale_sources(unchanged, self.metadata.get("includes", {}),
+                                         RTLAnalyzer.walk_sources(root) if sources is None else sources)
+    
+    def include_mapping(self, root: str) -> Dict[str, List[str]]:
+        """Saved include files of each source, as paths under root"""
+        return {os.path.join(root, path): [os.path.join(root, inc) for inc in files]
+                for path, files in self.metadata.get("includes", {}).items()}
+    
+    def load_hierarchy(self, project_dir: str,
+                       preprocessor: Optional[SVPreprocessor] = None) -> Tuple[ModuleHierarchy, List[str]]:
+        """Builds a hierarchy whose submodules are loaded lazily
+        
+        If any source changed, the affected modules are re-parsed and the
+        hierarchy is rebuilt from the full module set. project_dir is the
+        project file's directory; sources are looked up under the saved RTL root.
+        """
+        root = self.source_root(project_dir)
+        sources = RTLAnalyzer.walk_sources(root)
+        stale = self.stale_files(root, sources)
+        top_name = self.top_level_name()
+        file_mapping = self.file_mapping(root)
+        includes = self.include_mapping(root)
+        scanned = [os.path.join(root, path) for path in sources]
+        
+        if not stale:
+            names = [name for name in self.module_names() if name != top_name]
+            return ModuleHierarchy(
+                top_level=self.load_module(top_name),
+                submodules=LazyModuleDict(self, names),
+                connections=[tuple(row) for row in self.conn.execute("SELECT * FROM connections")],
+                file_mapping=file_mapping,
+                includes=includes,
+                root=root,
+                sources=scanned
+            ), []
+        
+        stale_set = set(stale)
+        modules = {
+            name: self.load_module(name)
+            for name in self.module_names()
+            if os.path.relpath(file_mapping.get(name, ""), root) not in stale_set
+        }
+        file_mapping = {name: path for name, path in file_mapping.items() if name in modules}
+        preprocessor = preprocessor or SVPreprocessor([root])
+        parsed = {}
+        for path in stale:
+            file = os.path.join(root, path)
+            try:
+                module_info = RTLAnalyzer.extract_module_info(file, preprocessor)
+            except (ValueError, FileNotFoundError):
+                continue
+            modules[module_info.name] = module_info
+            file_mapping[module_info.name] = parsed[module_info.name] = file
+        includes.update(RTLAnalyzer.include_dependencies(parsed, preprocessor))
+        
+        hierarchy = RTLAnalyzer.build_hierarchy(modules, file_mapping, preferred_top=top_name, includes=includes)
+        hierarchy.root = root
+        hierarchy.sources = scanned
+        return hierarchy, stale
+
+#---------------------------------------------------------------
+# Connection Graph
+#---------------------------------------------------------------
+class ConnectionGraph:
+    """Module-level connection graph with parallel connections bundled
+    
+    Signal connections between the same pair of modules become one weighted
+    edge. Instantiation (parent -> child) edges are kept separately so that
+    designs without resolved signal connections still have structure.
+    """
+    NODE_WIDTH = 140
+    NODE_HEIGHT = 36
+    NODE_GAP = 40
+    LAYER_GAP = 120
+    MAX_ROW_NODES = 64  # wide layers wrap onto several rows
+    
+    def __init__(self, hierarchy: ModuleHierarchy):
+        top_name = hierarchy.top_level.name
+        submodules = hierarchy.submodules
+        self.nodes = [top_name] + [name for name in submodules if name != top_name]
+        known = set(self.nodes)
+        
+        # (src, dst) -> [(src_port, dst_port), ...]
+        self.edges: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for src_mod, src_port, dest_mod, dest_port in hierarchy.connections:
+            if src_mod != dest_mod and src_mod in known and dest_mod in known:
+                self.edges.setdefault((src_mod, dest_mod), []).append((src_port, dest_port))
+        
+        # (parent, child) -> number of instances
+        self.instance_edges: Dict[Tuple[str, str], int] = {}
+        tree = hierarchy.instance_tree()
+        for name in self.nodes:
+            for sub_name in tree.children(name).values():
+                if sub_name != name:
+                    key = (name, sub_name)
+                    self.instance_edges[key] = self.instance_edges.get(key, 0) + 1
+    
+    def key(self) -> str:
+        """Digest of the graph structure, used to validate a cached layout"""
+        digest = hashlib.sha1()
+        for name in sorted(self.nodes):
+            digest.update(f"{name}\0".encode('utf-8'))
+        for src, dst in sorted(set(self.edges) | set(self.instance_edges)):
+            digest.update(f"{src}>{dst}\0".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def compute_layout(self, sweeps: int = 4) -> Dict[str, Tuple[float, float]]:
+        """Layered layout in world coordinates (node centers)
+        
+        Longest-path layering, a few barycenter ordering sweeps, and unconnected
+        modules in a final block. Runs in O(sweeps * (V + E)).
+        """
+        successors = defaultdict(list)
+        predecessors = defaultdict(list)
+        for src, dst in set(self.edges) | set(self.instance_edges):
+            successors[src].append(dst)
+            predecessors[dst].append(src)
+        
+        connected = [n for n in self.nodes if n in successors or n in predecessors]
+        isolated = [n for n in self.nodes if n not in successors and n not in predecessors]
+        
+        # Kahn's algorithm; a cycle is broken by placing its next unplaced node
+        in_degree = {n: len(predecessors[n]) for n in connected}
+        layer = dict.fromkeys(connected, 0)
+        placed = set()
+        stack = [n for n in connected if in_degree[n] == 0]
+        next_forced = 0
+        while len(placed) < len(connected):
+            if not stack:
+                while connected[next_forced] in placed:
+                    next_forced += 1
+                stack.append(connected[next_forced])
+            node = stack.pop()
+            if node in placed:
+                continue
+            placed.add(node)
+            for succ in successors[node]:
+                if succ in placed:
+                    continue
+                layer[succ] = max(layer[succ], layer[node] + 1)
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    stack.append(succ)
+        
+        by_layer = defaultdict(list)
+        for node in connected:
+            by_layer[layer[node]].append(node)
+        layers = [by_layer[depth] for depth in sorted(by_layer)]
+        
+        # Barycenter ordering, alternating downward and upward sweeps
+        order = {node: i for nodes in layers for i, node in enumerate(nodes)}
+        for sweep in range(sweeps):
+            neighbours = predecessors if sweep % 2 == 0 else successors
+            for nodes in (layers[1:] if sweep % 2 == 0 else reversed(layers[:-1])):
+                nodes.sort(key=lambda n: (sum(order[a] for a in neighbours[n]) / len(neighbours[n])
+                                          if neighbours[n] else order[n]))
+                for i, node in enumerate(nodes):
+                    order[node] = i
+        
+        if isolated:
+            layers.append(isolated)
+        
+        positions = {}
+        x_step = self.NODE_WIDTH + self.NODE_GAP
+        y_step = self.NODE_HEIGHT + self.NODE_GAP
+        y = 0.0
+        for nodes in layers:
+            for start in range(0, len(nodes), self.MAX_ROW_NODES):
+                row = nodes[start:start + self.MAX_ROW_NODES]
+                x = -(len(row) - 1) * x_step / 2
+                for node in row:
+                    positions[node] = (round(x, 1), y)
+                    x += x_step
+                y += y_step
+            y += self.LAYER_GAP - y_step
+        return positions
+
+class ConnectionGraphView:
+    """Pan/zoom canvas for a ConnectionGraph
+    
+    Only modules inside the visible region are drawn. Labels and bundle sizes
+    appear above fixed zoom levels, at most MAX_EDGES bundles are drawn
+    (heaviest first), and when modules shrink below a few pixels they are
+    merged into one marker per screen cell.
+    """
+    LABEL_ZOOM = 0.45
+    BUNDLE_LABEL_ZOOM = 0.9
+    MIN_NODE_PIXELS = 6
+    CELL_PIXELS = 4
+    MAX_EDGES = 3000
+    ZOOM_STEP = 1.2
+    
+    def __init__(self, parent, status: ttk.Label):
+        self.status = status
+        self.graph = None
+        self.positions = {}
+        self.scale = 1.0
+        self.offset_x = 0.0  # canvas = world * scale + offset
+        self.offset_y = 0.0
+        self._edges = []
+        self._redraw_job = None
+        self._drag = None
+        
+        self.canvas = tk.Canvas(parent, bg='white')
+        self.canvas.pack(fill='both', expand=True)
+        self.canvas.bind('<ButtonPress-1>', self.on_press)
+        self.canvas.bind('<B1-Motion>', self.on_drag)
+        self.canvas.bind('<MouseWheel>', self.on_wheel)
+        self.canvas.bind('<Button-4>', self.on_wheel)
+        self.canvas.bind('<Button-5>', self.on_wheel)
+        self.canvas.bind('<Configure>', lambda event: self.schedule_redraw())
+        self.canvas.bind('<Double-Button-1>', self.on_double_click)
+        self.canvas.bind('<Key-f>', lambda event: self.fit())
+    
+    def show_message(self, text: str):
+        self.canvas.delete('all')
+        self.canvas.create_text(20, 20, text=text, anchor='nw', fill='gray40')
+    
+    def set_graph(self, graph: ConnectionGraph, positions: Dict[str, Tuple[float, float]]):
+        """Displays a graph with precomputed positions"""
+        self.graph = graph
+        self.positions = positions
+        self._edges = sorted(
+            [(len(ports), src, dst, 'signal') for (src, dst), ports in graph.edges.items()]
+            + [(count, src, dst, 'instance') for (src, dst), count in graph.instance_edges.items()],
+            key=lambda edge: -edge[0]
+        )
+        self.fit()
+    
+    def fit(self):
+        """Zooms to show the whole graph"""
+        if not self.positions:
+            return
+        width = max(self.canvas.winfo_width(), 200)
+        height = max(self.canvas.winfo_height(), 200)
+        xs = [x for x, _ in self.positions.values()]
+        ys = [y for _, y in self.positions.values()]
+        span_x = max(xs) - min(xs) + 2 * ConnectionGraph.NODE_WIDTH
+        span_y = max(ys) - min(ys) + 2 * ConnectionGraph.NODE_HEIGHT
+        self.scale = min(width / span_x, height / span_y, 1.5)
+        self.offset_x = width / 2 - (min(xs) + max(xs)) / 2 * self.scale
+        self.offset_y = height / 2 - (min(ys) + max(ys)) / 2 * self.scale
+        self.redraw()
+    
+    def schedule_redraw(self, delay: int = 40):
+        if self._redraw_job is not None:
+            self.canvas.after_cancel(self._redraw_job)
+        self._redraw_job = self.canvas.after(delay, self.redraw)
+    
+    def on_press(self, event):
+        self.canvas.focus_set()
+        self._drag = (event.x, event.y)
+    
+    def on_drag(self, event):
+        if self._drag is None:
+            return
+        dx, dy = event.x - self._drag[0], event.y - self._drag[1]
+        self._drag = (event.x, event.y)
+        self.offset_x += dx
+        self.offset_y += dy
+        # Move what is already drawn now, fill in newly exposed parts later
+        self.canvas.move('all', dx, dy)
+        self.schedule_redraw()
+    
+    def on_wheel(self, event):
+        zoom_in = event.num == 4 or getattr(event, 'delta', 0) > 0
+        factor = self.ZOOM_STEP if zoom_in else 1 / self.ZOOM_STEP
+        self.scale *= factor
+        self.offset_x = event.x - (event.x - self.offset_x) * factor
+        self.offset_y = event.y - (event.y - self.offset_y) * factor
+        self.canvas.scale('all', event.x, event.y, factor, factor)
+        self.schedule_redraw()
+    
+    def on_double_click(self, event):
+        """Shows the bundles of the module under the cursor"""
+        current = self.canvas.find_withtag('current')
+        if not current:
+            return
+        tags = [tag for tag in self.canvas.gettags(current[0]) if tag.startswith('module=')]
+        if not tags:
+            return
+        name = tags[0][len('module='):]
+        incoming = [(src, len(ports)) for (src, dst), ports in self.graph.edges.items() if dst == name]
+        outgoing = [(dst, len(ports)) for (src, dst), ports in self.graph.edges.items() if src == name]
+        children = sum(count for (parent, _), count in self.graph.instance_edges.items() if parent == name)
+        self.status.config(text=(
+            f"{name}: {len(incoming)} incoming bundles ({sum(n for _, n in incoming)} signals), "
+            f"{len(outgoing)} outgoing bundles ({sum(n for _, n in outgoing)} signals), {children} instances"
+        ))
+    
+    def redraw(self):
+        """Draws the visible part of the graph at the current zoom level"""
+        self._redraw_job = None
+        if self.graph is None:
+            return
+        canvas = self.canvas
+        canvas.delete('all')
+        scale, off_x, off_y = self.scale, self.offset_x, self.offset_y
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        
+        # Visible world rectangle, with a margin of one node
+        margin_x, margin_y = ConnectionGraph.NODE_WIDTH, ConnectionGraph.NODE_HEIGHT
+        left, right = -off_x / scale - margin_x, (width - off_x) / scale + margin_x
+        top, bottom = -off_y / scale - margin_y, (height - off_y) / scale + margin_y
+        visible = {name for name, (x, y) in self.positions.items()
+                   if left <= x <= right and top <= y <= bottom}
+        
+        clustered = ConnectionGraph.NODE_WIDTH * scale < self.MIN_NODE_PIXELS
+        max_edges = self.MAX_EDGES // 6 if clustered else self.MAX_EDGES
+        drawn = 0
+        for weight, src, dst, kind in self._edges:
+            if drawn >= max_edges:
+                break
+            if src not in visible and dst not in visible:
+                continue
+            x1, y1 = self.positions[src]
+            x2, y2 = self.positions[dst]
+            x1, y1, x2, y2 = x1 * scale + off_x, y1 * scale + off_y, x2 * scale + off_x, y2 * scale + off_y
+            if kind == 'signal':
+                canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, fill='steelblue',
+                                   width=min(1 + math.log2(weight), 8))
+                if weight > 1 and scale >= self.BUNDLE_LABEL_ZOOM:
+                    canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text=str(weight), fill='steelblue')
+            else:
+                canvas.create_line(x1, y1, x2, y2, fill='gray70', dash=(4, 2))
+            drawn += 1
+        
+        top_name = self.graph.nodes[0]
+        if clustered:
+            # One marker per occupied screen cell
+            cells = set()
+            for name in visible:
+                x, y = self.positions[name]
+                cells.add((int((x * scale + off_x) // self.CELL_PIXELS), int((y * scale + off_y) // self.CELL_PIXELS)))
+            size = self.CELL_PIXELS - 1
+            for cx, cy in cells:
+                x, y = cx * self.CELL_PIXELS, cy * self.CELL_PIXELS
+                canvas.create_rectangle(x, y, x + size, y + size, fill='seagreen', outline='')
+        else:
+            half_w = ConnectionGraph.NODE_WIDTH * scale / 2
+            half_h = ConnectionGraph.NODE_HEIGHT * scale / 2
+            labels = scale >= self.LABEL_ZOOM
+            for name in visible:
+                x, y = self.positions[name]
+                x, y = x * scale + off_x, y * scale + off_y
+                canvas.create_rectangle(x - half_w, y - half_h, x + half_w, y + half_h,
+                                        fill='lightblue' if name == top_name else 'lightgreen',
+                                        outline='gray40' if labels else '', tags=(f"module={name}",))
+                if labels:
+                    canvas.create_text(x, y, text=name, width=2 * half_w, tags=(f"module={name}",))
+        
+        self.status.config(text=(
+            f"{len(visible)} of {len(self.positions)} modules visible, {drawn} of {len(self._edges)} bundles drawn, "
+            f"zoom {scale:.0%}  (drag to pan, wheel to zoom, F to fit, double-click a module for details)"
+        ))
+
+#---------------------------------------------------------------
+# File Preview
+#---------------------------------------------------------------
+class LineIndexedFile:
+    """Read-only memory-mapped text file with a sparse line index
+    
+    build_index() (run in a background thread) stores the offset of every
+    STRIDE-th line, so the index of a 500 MB log stays around a megabyte. A
+    line is located from the nearest entry by skipping at most STRIDE-1
+    newlines, and only the requested lines are ever decoded. Lines indexed
+    so far are readable while the index is still being built.
+    """
+    STRIDE = 64
+    MAX_LINE_BYTES = 4096  # longer lines are cut for display
+    _BLOCK = re.compile(rb'(?:[^\n]*\n){%d}' % STRIDE)
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._index = array('q', [0])  # offset of line k * STRIDE
+        self.line_count = 0  # lines readable so far
+        self.complete = False
+        self._stop = threading.Event()
+    
+    def build_index(self):
+        """Indexes the file; the regex consumes STRIDE lines per step in C"""
+        match = self._BLOCK.match
+        pos = 0
+        try:
+            while not self._stop.is_set():
+                block = match(self._map, pos)
+                if block is None:
+                    break
+                pos = block.end()
+                self._index.append(pos)
+                self.line_count = (len(self._index) - 1) * self.STRIDE
+            if self._stop.is_set():
+                return
+            tail = self._map[pos:]
+            self.line_count = (len(self._index) - 1) * self.STRIDE + tail.count(b'\n') + (not tail.endswith(b'\n'))
+            if self.size == 0:
+                self.line_count = 0
+            self.complete = True
+        except ValueError:
+            pass  # closed while indexing
+    
+    def close(self):
+        self._stop.set()
+        self._file.close()
+        try:
+            if self.size:
+                self._map.close()
+        except BufferError:
+            pass  # still in use by the indexer or a search; unmapped once they release it
+    
+    def line_offset(self, line: int) -> int:
+        block, rest = divmod(line, self.STRIDE)
+        pos = self._index[block]
+        for _ in range(rest):
+            end = self._map.find(b'\n', pos)
+            if end < 0:
+                return self.size
+            pos = end + 1
+        return pos
+    
+    def line_at(self, offset: int) -> int:
+        """Line number containing a byte offset"""
+        block = bisect.bisect_right(self._index, offset) - 1
+        return block * self.STRIDE + self._map[self._index[block]:offset].count(b'\n')
+    
+    def lines(self, first: int, count: int) -> List[str]:
+        """Decoded lines [first, first + count), as far as the index reaches"""
+        available = self.line_count if self.complete else len(self._index) * self.STRIDE
+        count = min(count, available - first)
+        if count <= 0:
+            return []
+        pos = self.line_offset(first)
+        result = []
+        for _ in range(count):
+            if pos >= self.size:
+                break
+            end = self._map.find(b'\n', pos)
+            if end < 0:
+                end = self.size
+            text = self._map[pos:min(end, pos + self.MAX_LINE_BYTES)].decode('utf-8', errors='replace')
+            result.append(text.rstrip('\r') + (' …' if end - pos > self.MAX_LINE_BYTES else ''))
+            pos = end + 1
+        return result
+    
+    def search(self, text: str, start_line: int = 0, ignore_case: bool = True) -> Optional[int]:
+        """First line at or after start_line containing text (wrapping around), within the indexed part"""
+        if not text or not self.line_count:
+            return None
+        regex = re.compile(re.escape(text.encode('utf-8')), re.IGNORECASE if ignore_case else 0)
+        limit = self.size if self.complete else self._index[-1]
+        start = self.line_offset(min(start_line, self.line_count - 1))
+        found = regex.search(self._map, start, limit) or regex.search(self._map, 0, min(start + len(text), limit))
+        return self.line_at(found.start()) if found else None
+
+class PagedTextView:
+    """File preview that only renders the visible lines of a LineIndexedFile"""
+    POLL_MS = 200
+    
+    def __init__(self, parent, font=('Consolas', 10)):
+        self.file = None
+        self.first = 0
+        self.match_line = None
+        self.search_var = tk.StringVar()
+        self.goto_var = tk.StringVar()
+        
+        self.frame = ttk.Frame(parent)
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill='x', pady=(0, 5))
+        search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=20)
+        search_entry.pack(side='left')
+        search_entry.bind('<Return>', lambda event: self.find_next())
+        ttk.Button(toolbar, text="🔍 Find Next", command=self.find_next).pack(side='left', padx=(5, 10))
+        ttk.Label(toolbar, text="Line:").pack(side='left')
+        goto_entry = ttk.Entry(toolbar, textvariable=self.goto_var, width=8)
+        goto_entry.pack(side='left', padx=(5, 10))
+        goto_entry.bind('<Return>', lambda event: self.goto_line())
+        ttk.Button(toolbar, text="📂 Open File...", command=self.choose_file).pack(side='left')
+        self.status = ttk.Label(self.frame, text="", foreground='gray')
+        self.status.pack(side='bottom', anchor='w')
+        
+        hbar = ttk.Scrollbar(self.frame, orient='horizontal')
+        hbar.pack(side='bottom', fill='x')
+        self.vbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.on_scrollbar)
+        self.vbar.pack(side='right', fill='y')
+        self.text = tk.Text(self.frame, font=font, state='disabled', wrap='none', xscrollcommand=hbar.set)
+        self.text.pack(fill='both', expand=True)
+        hbar.config(command=self.text.xview)
+        self.text.tag_configure('match', background='#fff2a8')
+        self.line_height = max(1, tkfont.Font(font=font).metrics('linespace'))
+        
+        self.text.bind('<MouseWheel>', self.on_wheel)
+        self.text.bind('<Button-4>', self.on_wheel)
+        self.text.bind('<Button-5>', self.on_wheel)
+        self.text.bind('<Prior>', lambda event: self.scroll_to(self.first - self.page_size()))
+        self.text.bind('<Next>', lambda event: self.scroll_to(self.first + self.page_size()))
+        self.text.bind('<Control-Home>', lambda event: self.scroll_to(0))
+        self.text.bind('<Control-End>', lambda event: self.scroll_to(self.file.line_count if self.file else 0))
+        self.text.bind('<Configure>', lambda event: self.render())
+    
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+    
+    def open(self, path: str):
+        """Maps the file, shows its first page and indexes the rest in the background"""
+        self.close()
+        self.file = LineIndexedFile(path)
+        self.first = 0
+        self.match_line = None
+        threading.Thread(target=self.file.build_index, daemon=True).start()
+        self.render()
+        self.frame.after(self.POLL_MS, self._poll_index, self.file)
+    
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+    
+    def show_message(self, message: str):
+        self.close()
+        self._set_text(message)
+        self.status.config(text="")
+    
+    def choose_file(self):
+        path = filedialog.askopenfilename(title="Open File",
+                                          filetypes=[("Logs and Sources", "*.log *.sv *.v *.svh *.txt"),
+                                                     ("All Files", "*.*")])
+        if path:
+            try:
+                self.open(path)
+            except OSError as e:
+                self.show_message(f"Error reading file: {str(e)}")
+    
+    def _poll_index(self, file: LineIndexedFile):
+        if file is not self.file:
+            return
+        self.render()
+        if not file.complete:
+            self.frame.after(self.POLL_MS, self._poll_index, file)
+    
+    def _set_text(self, content: str):
+        self.text.config(state='normal')
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, content)
+        self.text.config(state='disabled')
+    
+    def page_size(self) -> int:
+        return max(1, self.text.winfo_height() // self.line_height)
+    
+    def render(self):
+        """Replaces the widget content with the lines visible from self.first"""
+        if not self.file:
+            return
+        total = self.file.line_count
+        count = self.page_size()
+        self.first = max(0, min(self.first, total - count))
+        self._set_text("\n".join(self.file.lines(self.first, count)))
+        if self.match_line is not None and self.first <= self.match_line < self.first + count:
+            row = self.match_line - self.first + 1
+            self.text.tag_add('match', f"{row}.0", f"{row}.end")
+        
+        if total:
+            self.vbar.set(self.first / total, min(1.0, (self.first + count) / total))
+        else:
+            self.vbar.set(0.0, 1.0)
+        state = "" if self.file.complete else " (indexing...)"
+        self.status.config(text=f"{os.path.basename(self.file.path)}: lines {self.first + 1}-"
+                                f"{min(self.first + count, total)} of {total:,}{state}, "
+                                f"{self.file.size / 1024:.1f} KB")
+    
+    def scroll_to(self, line: int):
+        self.first = max(0, line)
+        self.render()
+        return 'break'
+    
+    def on_scrollbar(self, action, value, unit=None):
+        if not self.file:
+            return
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * self.file.line_count))
+        else:
+            step = self.page_size() if unit == 'pages' else 1
+            self.scroll_to(self.first + int(value) * step)
+    
+    def on_wheel(self, event):
+        up = event.num == 4 or getattr(event, 'delta', 0) > 0
+        return self.scroll_to(self.first + (-3 if up else 3))
+    
+    def goto_line(self):
+        try:
+            line = int(self.goto_var.get()) - 1
+        except ValueError:
+            return
+        self.match_line = line
+        self.scroll_to(line - self.page_size() // 2)
+    
+    def find_next(self):
+        """Searches from the line after the previous match in a worker thread"""
+        file, text = self.file, self.search_var.get()
+        if not file or not text:
+            return
+        start = self.match_line + 1 if self.match_line is not None else self.first
+        self.status.config(text=f"Searching for '{text}'...")
+        
+        def search():
+            try:
+                line = file.search(text, start)
+            except ValueError:
+                return  # file closed meanwhile
+            self.frame.after(0, self._show_match, file, text, line)
+        
+        threading.Thread(target=search, daemon=True).start()
+    
+    def _show_match(self, file: LineIndexedFile, text: str, line: Optional[int]):
+        if file is not self.file:
+            return
+        if line is None:
+            self.render()
+            self.status.config(text=f"'{text}' not found" + ("" if file.complete else " in the indexed part"))
+            return
+        self.match_line = line
+        self.scroll_to(line - self.page_size() // 2)
+
+#---------------------------------------------------------------
+# Testbench Generation
+#---------------------------------------------------------------
+class TestbenchGenerator:
+    """Renders the per-module UVM environment without the GUI"""
+    GENERATOR_VERSION = '5.0.0'
+    
+    # Defaults of the Configuration and Test Scenarios tabs
+    DEFAULT_CONFIG = {
+        'num_tests': 100,
+        'include_coverage': True,
+        'include_scoreboard': True,
+        'include_assertions': True,
+        'register_spec': "",
+        'clock_period': "10ns",
+        'reset_active_low': False,
+        'test_scenarios': "smoke,random,corner",
+        'enable_reporting': True,
+        'enable_statistics': True,
+        'scoreboard_ordering': "in_order",
+        'scoreboard_max_outstanding': 1024,
+        'reference_model': "sv",
+        'include_dirs': "",
+        'defines': "",
+        'scenarios': {'smoke': True, 'random': True, 'corner': True, 'reset': False, 'stress': False,
+                      'error': False, 'functional': False, 'performance': False}
+    }
+    
+    # Module aspects (see ModuleInfo.diff) each template reads; unlisted templates read everything
+    TEMPLATE_INPUTS = {
+        'interface.sv.j2': {'name', 'ports', 'signals'},
+        'transaction.sv.j2': {'name', 'ports'},
+        'sequence.sv.j2': {'name'},
+        'test.sv.j2': {'name'},
+        'scoreboard.sv.j2': {'name', 'ports', 'signals'},
+        'scoreboard_stress_test.sv.j2': {'name'},
+        'ref_model.c.j2': {'name', 'ports'},
+        'coverage.sv.j2': {'name', 'ports'},
+        'wave_dump.sv.j2': {'name', 'ports'},
+        'assertions.sv.j2': {'name', 'ports', 'parameters', 'signals'},
+        'reg_model.sv.j2': {'name', 'ports', 'signals'},
+        'bus_if.sv.j2': {'name', 'ports', 'signals'},
+        'axi_agent.sv.j2': {'name', 'ports', 'signals'},
+        'apb_agent.sv.j2': {'name', 'ports', 'signals'},
+        'wishbone_agent.sv.j2': {'name', 'ports', 'signals'},
+        'stream_agent.sv.j2': {'name', 'ports', 'signals'},
+    }
+    
+    def __init__(self, template_dir: Optional[str] = None):
+        self.template_dir = Path(template_dir) if template_dir else Path(__file__).parent / "templates"
+        self.env = Environment(
+            loader=FileSystemLoader(self.template_dir),
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+    
+    @classmethod
+    def make_config(cls, overrides: Optional[Dict] = None) -> Dict:
+        """Default configuration with overrides applied"""
+        config = json.loads(json.dumps(cls.DEFAULT_CONFIG))
+        config.update(overrides or {})
+        return config
+    
+    # Handshakes checked by the generated assertions: (channel prefix, valid, ready).
+    # The payload of a channel is every other signal with its prefix driven by the valid side.
+    HANDSHAKES = {
+        'axi': [('aw', 'awvalid', 'awready'), ('w', 'wvalid', 'wready'), ('b', 'bvalid', 'bready'),
+                ('ar', 'arvalid', 'arready'), ('r', 'rvalid', 'rready')],
+        'apb': [('', 'penable', 'pready')],
+        'wishbone': [('', 'stb', 'ack')],
+        'stream': [('', 'valid', 'ready')],
+    }
+    
+    @staticmethod
+    def key_ports(module_info: ModuleInfo) -> List[Port]:
+        """Selects the stimulus fields used as out-of-order matching key"""
+        inputs = [p for p in module_info.get_input_ports()
+                  if p.name not in module_info.clock_signals + module_info.reset_signals]
+        tagged = [p for p in inputs if re.search(r'(^|_)(id|tag)($|_)', p.name, re.IGNORECASE)]
+        return tagged or inputs
+    
+    @classmethod
+    def context(cls, module_info: ModuleInfo, config: Dict) -> Dict:
+        """Template context for one module"""
+        buses = RTLAnalyzer.detect_protocols(module_info)
+        return {
+            'module': module_info,
+            'config': config,
+            'key_ports': cls.key_ports(module_info),
+            'buses': buses,
+            'registers': (RegisterSpecImporter.load(config['register_spec'], module_info.name)
+                          if config.get('register_spec') else None),
+            'reg_bus': cls.register_bus(buses),
+            'bus_ports': sorted(port.name for bus in buses for port in bus.signals.values()),
+            'port_domains': RTLAnalyzer.port_domains(module_info),
+            'assertions': cls.assertions(module_info, buses),
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'generator_version': cls.GENERATOR_VERSION
+        }
+    
+    @staticmethod
+    def register_bus(buses: List[BusInterface]) -> Optional[BusInterface]:
+        """Bus the register model is accessed through: the first one where the DUT is the target"""
+        return next((bus for bus in buses if not bus.dut_initiator and bus.protocol in ('apb', 'axi', 'wishbone')),
+                    None)
+    
+    @classmethod
+    def assertions(cls, module_info: ModuleInfo, buses: List[BusInterface]) -> List[SVAssertion]:
+        """Assertions derived from the ports and detected bus interfaces
+        
+        Each handshake must keep a pending valid high with a stable payload
+        until it is accepted, DUT-driven valids must stay low during reset and
+        DUT outputs must not be X outside reset (bus payloads only while their
+        valid is high). Ports without a clock get no assertions.
+        """
+        domains = RTLAnalyzer.port_domains(module_info)
+        resets = [p.name for p in module_info.get_input_ports() if p.name in module_info.reset_signals]
+        
+        def reset_of(clock):
+            return next((reset for reset in resets if domains.get(reset) == clock), resets[0] if resets else "")
+        
+        def make(name, kind, clock, reset, expression, message, **kwargs):
+            return SVAssertion(name=name, kind=kind, clock=clock, expression=expression, message=message,
+                               reset=reset, reset_active_low=RTLAnalyzer.is_active_low(reset), **kwargs)
+        
+        assertions = []
+        gated = {}  # DUT output port -> valid port qualifying it
+        for bus in buses:
+            clock = bus.clock or domains.get(next(iter(bus.signals.values())).name, "")
+            if not clock:
+                continue
+            reset = bus.reset or reset_of(clock)
+            port = {signal: p.name for signal, p in bus.signals.items()}
+            
+            for channel, valid, ready in cls.HANDSHAKES[bus.protocol]:
+                if valid not in port:
+                    continue
+                sender = bus.signals[valid].direction
+                payload = [signal for signal, p in bus.signals.items()
+                           if signal not in (valid, ready) and signal.startswith(channel) and p.direction == sender]
+                # Selects (psel, cyc) frame the handshake: known even without the valid, low in reset
+                anchors = RTLAnalyzer.PROTOCOLS[bus.protocol]['anchor']
+                select = next((signal for signal in anchors if signal in payload), valid)
+                if sender == 'output':
+                    gated.update((port[signal], port[valid]) for signal in payload if signal not in anchors)
+                label = "_".join(filter(None, [bus.name, channel]))
+                where = " ".join(filter(None, [bus.name, channel]))
+                
+                accept = f"!{port['stall']}" if bus.protocol == 'wishbone' and 'stall' in port else port.get(ready)
+                if accept:
+                    stable = f" && $stable({{{', '.join(port[signal] for signal in payload)}}})" if payload else ""
+                    assertions.append(make(
+                        f"{label}_hold", 'handshake', clock, reset,
+                        f"{port[valid]} && !({accept}) |=> {port[valid]}{stable}",
+                        f"{where}: {valid} dropped or payload changed before it was accepted",
+                        cover=f"{port[valid]} && {accept}"
+                    ))
+                if sender == 'output' and reset:
+                    # Two sampled reset cycles, so synchronous resets have taken effect
+                    in_reset = f"!{reset}" if RTLAnalyzer.is_active_low(reset) else reset
+                    assertions.append(make(
+                        f"{label}_{select}_reset", 'reset', clock, reset,
+                        f"({in_reset})[*2] |-> !{port[select]}",
+                        f"{where}: {select} driven while in reset",
+                        disable_in_reset=False
+                    ))
+            
+            if bus.protocol == 'apb' and 'psel' in port:
+                assertions.append(make(
+                    f"{bus.name}_setup_access", 'protocol', clock, reset,
+                    f"{port['psel']} && !{port['penable']} |=> {port['psel']} && {port['penable']}",
+                    f"{bus.name}: setup phase not followed by the access phase"
+                ))
+        
+        for port in module_info.get_output_ports():
+            clock = domains.get(port.name, "")
+            if not clock:
+                continue
+            valid = gated.get(port.name)
+            assertions.append(make(
+                f"{port.name}_known", 'known', clock, reset_of(clock),
+                f"{valid} |-> !$isunknown({port.name})" if valid else f"!$isunknown({port.name})",
+                f"{port.name} is X/Z" + (f" while {valid} is high" if valid else "")
+            ))
+        return assertions
+    
+    @staticmethod
+    def file_plan(module_name: str, config: Dict) -> List[Tuple[str, str]]:
+        """(template, output file) pairs that make up the UVM environment"""
+        plan = [
+            ('interface.sv.j2', f"{module_name}_if.sv"),
+            ('transaction.sv.j2', f"{module_name}_transaction.sv"),
+            ('sequence.sv.j2', f"{module_name}_sequence.sv"),
+            ('test.sv.j2', f"{module_name}_test.sv"),
+            ('wave_dump.sv.j2', f"{module_name}_wave_dump.sv"),
+        ]
+        if config.get('include_scoreboard'):
+            plan.append(('scoreboard.sv.j2', f"{module_name}_scoreboard.sv"))
+            plan.append(('scoreboard_stress_test.sv.j2', f"{module_name}_sb_stress_test.sv"))
+            if config.get('reference_model') == 'dpi':
+                plan.append(('ref_model.c.j2', f"{module_name}_ref_model.c"))
+        if config.get('include_coverage'):
+            plan.append(('coverage.sv.j2', f"{module_name}_coverage.sv"))
+        if config.get('include_assertions'):
+            plan.append(('assertions.sv.j2', f"{module_name}_sva.sv"))
+        if config.get('register_spec'):
+            plan.append(('reg_model.sv.j2', f"{module_name}_reg_model.sv"))
+        return plan
+    
+    @staticmethod
+    def bus_plan(module_name: str, buses: List[BusInterface]) -> List[Tuple[str, str, BusInterface]]:
+        """(template, output file, interface) triples for the protocol agents"""
+        plan = []
+        for bus in buses:
+            plan.append(('bus_if.sv.j2', f"{module_name}_{bus.name}_if.sv", bus))
+            plan.append((bus.template, f"{module_name}_{bus.name}_agent.sv", bus))
+        return plan
+    
+    def impacted_templates(self, module_name: str, config: Dict, aspects: set) -> set:
+        """Templates whose output depends on any of the changed aspects"""
+        templates = [template for template, _ in self.file_plan(module_name, config)]
+        templates += ['bus_if.sv.j2'] + [f"{protocol}_agent.sv.j2" for protocol in RTLAnalyzer.PROTOCOLS]
+        return {
+            template for template in templates
+            if aspects & self.TEMPLATE_INPUTS.get(template, aspects)
+        }
+    
+    def generate(self, module_info: ModuleInfo, config: Dict, output_dir: str,
+                 only: Optional[set] = None, log=None) -> List[str]:
+        """Writes the planned files (or only those rendered by the given templates)"""
+        log = log or print
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        context = self.context(module_info, config)
+        
+        plan = [(template, output, None) for template, output in self.file_plan(module_info.name, config)]
+        plan += self.bus_plan(module_info.name, context['buses'])
+        
+        written = []
+        for template_name, output_name, bus in plan:
+            if only is not None and template_name not in only:
+                continue
+            try:
+                with TRACER.span("template.compile", "generator", template=template_name):
+                    template = self.env.get_template(template_name)
+            except TemplateNotFound:
+                log(f"Warning: template not found: {template_name}")
+                continue
+            output_file = output_path / output_name
+            with TRACER.span("template.render", "generator", template=template_name):
+                content = template.render(context, bus=bus)
+            with TRACER.span("template.write", "generator", file=output_name):
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            written.append(str(output_file))
+        return written
+    
+    @classmethod
+    def system_context(cls, hierarchy: ModuleHierarchy, system_config: SystemTestConfig) -> Dict:
+        """Template context for the system-level testbench"""
+        domains = RTLAnalyzer.infer_clock_domains(hierarchy, system_config.clock_periods,
+                                                  system_config.default_clock_period)
+        module_domains = {}
+        for domain in domains:
+            for _, module, port in domain.members:
+                ports = module_domains.setdefault(module, [])
+                if port not in [p for p, _ in ports]:
+                    ports.append((port, domain))
+        return {
+            'hierarchy': hierarchy,
+            'config': system_config,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'top_name': hierarchy.top_level.name,
+            'domains': domains,
+            'module_domains': module_domains,
+            'reset_cycles': 5,
+            'instances': [
+                (path.split('.', 1)[1].replace('.', '_'), module)
+                for path, module in hierarchy.instance_tree().walk() if '.' in path
+            ],
+            'paths': [
+                {'src': src.replace('.', '_'), 'src_mod': src_mod,
+                 'dst': dst.replace('.', '_'), 'dst_mod': dst_mod,
+                 'name': f"{src}_to_{dst}".replace('.', '_')}
+                for src, src_mod, dst, dst_mod in hierarchy.get_instance_paths()
+            ],
+            'uvm_required': True
+        }
+    
+    @staticmethod
+    def system_plan(top_name: str) -> List[Tuple[str, str]]:
+        """(template, output file) pairs of the system-level testbench"""
+        return [
+            ('clock_domains.sv.j2', f"{top_name}_clock_domains.sv"),
+            ('system_tb.sv.j2', f"{top_name}_system_tb.sv"),
+            ('system_scoreboard.sv.j2', f"{top_name}_system_scoreboard.sv"),
+        ]
+
+#---------------------------------------------------------------
+# Watch Mode
+#---------------------------------------------------------------
+class RTLWatcher:
+    """Polls RTL sources and headers and reports debounced batches of changed files"""
+    EXTENSIONS = ('.sv', '.v', '.svh', '.vh')
+    
+    def __init__(self, paths: List[str], on_change, interval: float = 0.25, debounce: float = 0.3,
+                 ignore: Optional[List[str]] = None):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.ignore = [os.path.abspath(p) for p in ignore or []]
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = self.snapshot()
+    
+    def _ignored(self, path: str) -> bool:
+        return any(path == d or path.startswith(d + os.sep) for d in self.ignore)
+    
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """(mtime_ns, size) of every watched file"""
+        files = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                candidates = (
+                    os.path.join(root, name)
+                    for root, dirs, names in os.walk(path) if not self._ignored(root)
+                    for name in names if name.endswith(self.EXTENSIONS)
+                )
+            else:
+                candidates = [path]
+            for file in candidates:
+                try:
+                    stat = os.stat(file)
+                except OSError:
+                    continue
+                files[file] = (stat.st_mtime_ns, stat.st_size)
+        return files
+    
+    def poll(self) -> List[str]:
+        """Files added, modified or removed since the previous poll"""
+        current = self.snapshot()
+        changed = sorted(p for p in current.keys() | self._state.keys() if current.get(p) != self._state.get(p))
+        self._state = current
+        return changed
+    
+    def run(self):
+        """Polls until stopped; on_change receives a batch once files stop changing for debounce seconds"""
+        pending = set()
+        last_change = 0.0
+        while not self._stop.wait(self.interval):
+            changed = self.poll()
+            if changed:
+                pending.update(changed)
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                batch, pending = sorted(pending), set()
+                self.on_change(batch)
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+
+class WatchSession:
+    """Re-analyzes a DUT when its sources change and regenerates only the impacted files"""
+    LATENCY_BUDGET = 2.0  # seconds from a detected change to regenerated (and recompiled) files
+    
+    def __init__(self, dut_path: str, output_dir: str, config: Dict,
+                 generator: Optional[TestbenchGenerator] = None,
+                 preprocessor: Optional[SVPreprocessor] = None,
+                 controller: Optional['SimulationController'] = None, log=None):
+        self.dut_path = os.path.abspath(dut_path)
+        self.output_dir = output_dir
+        self.config = config
+        self.generator = generator or TestbenchGenerator()
+        self.preprocessor = preprocessor or SVPreprocessor([os.path.dirname(self.dut_path)])
+        self.controller = controller
+        self.log = log or print
+        self.module_info = RTLAnalyzer.extract_module_info(self.dut_path, self.preprocessor)
+    
+    def watch_paths(self) -> List[str]:
+        """The DUT directory plus the include directories"""
+        paths = [os.path.dirname(self.dut_path)]
+        for inc in self.preprocessor.include_dirs:
+            if os.path.isdir(inc) and os.path.abspath(inc) not in map(os.path.abspath, paths):
+                paths.append(inc)
+        return paths
+    
+    def generate_all(self) -> List[str]:
+        """Full generation, used when watching starts"""
+        written = self.generator.generate(self.module_info, self.config, self.output_dir, log=self.log)
+        self._compile(written)
+        return written
+    
+    def _compile(self, written: List[str]):
+        if self.controller and written:
+            self.controller.compile(callback=self.log, wait=True, changed=written)
+    
+    def handle(self, changed: List[str]) -> Dict:
+        """Processes one batch of changed files"""
+        start = time.monotonic()
+        result = {'aspects': set(), 'written': [], 'elapsed': 0.0, 'error': None}
+        self.preprocessor.invalidate(changed)
+        if self.dut_path not in changed and self.dut_path not in self.preprocessor.dependents(changed):
+            return result
+        
+        try:
+            module_info = RTLAnalyzer.extract_module_info(self.dut_path, self.preprocessor)
+        except (ValueError, OSError) as e:
+            result['error'] = str(e)
+            self.log(f"Analysis failed, keeping previous testbench: {e}")
+            return result
+        
+        aspects = self.module_info.diff(module_info)
+        self.module_info = module_info
+        result['aspects'] = aspects
+        if not aspects:
+            self.log(f"{module_info.name}: no interface change, nothing to regenerate")
+            return result
+        
+        templates = self.generator.impacted_templates(module_info.name, self.config, aspects)
+        result['written'] = self.generator.generate(module_info, self.config, self.output_dir,
+                                                    only=templates, log=self.log)
+        self.log(f"{module_info.name}: {', '.join(sorted(aspects))} changed, "
+                 f"regenerated {len(result['written'])} files")
+        self._compile(result['written'])
+        
+        result['elapsed'] = time.monotonic() - start
+        self.log(f"Update took {result['elapsed'] * 1000:.0f} ms")
+        if result['elapsed'] > self.LATENCY_BUDGET:
+            self.log(f"Warning: update exceeded the {self.LATENCY_BUDGET:.1f} s latency budget")
+        return result
+
+#---------------------------------------------------------------
+# Project Export
+#---------------------------------------------------------------
+class ProjectExporter:
+    """Streams generated files into a ZIP or tar archive, compressing in parallel
+    
+    Entries keep their path relative to the output directory and are
+    written in sorted order. ZIP entries are deflated concurrently (zlib
+    releases the GIL) and written as they complete, in order, so memory
+    stays bounded to a window of files. tar archives are reproducible:
+    fixed timestamps (SOURCE_DATE_EPOCH or 0), owners and permissions.
+    .tar.gz is compressed as independent gzip members per 1 MiB chunk
+    (like pigz); .tar.zst needs the zstandard package.
+    """
+    FORMATS = {'.zip': 'zip', '.tar': 'tar', '.tar.gz': 'tar.gz', '.tgz': 'tar.gz', '.tar.zst': 'tar.zst'}
+    CHUNK_SIZE = 1 << 20
+    ZIP_LIMIT = 0xFFFFFFFF  # no Zip64 support
+    
+    def __init__(self, files: List[str], base_dir: str, jobs: Optional[int] = None, level: int = 6,
+                 reproducible: bool = False):
+        self.files = [os.path.abspath(f) for f in files]
+        self.base_dir = os.path.abspath(base_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.level = level
+        self.reproducible = reproducible
+        epoch = os.environ.get('SOURCE_DATE_EPOCH')
+        self.source_date_epoch = int(epoch) if epoch and epoch.isdigit() else 0
+    
+    @classmethod
+    def format_of(cls, archive_path: str) -> str:
+        for extension in sorted(cls.FORMATS, key=len, reverse=True):
+            if archive_path.lower().endswith(extension):
+                return cls.FORMATS[extension]
+        raise ValueError(f"Unsupported archive type: {os.path.basename(archive_path)} "
+                         f"(use {', '.join(cls.FORMATS)})")
+    
+    def entries(self) -> List[Tuple[str, str]]:
+        """(path, archive name) pairs, sorted by archive name, one per distinct file"""
+        files = sorted(set(self.files))
+        base = self.base_dir
+        if any(os.path.commonpath([base, f]) != base for f in files):
+            base = os.path.commonpath([base] + [os.path.dirname(f) for f in files])
+        return sorted(((f, Path(os.path.relpath(f, base)).as_posix()) for f in files), key=lambda e: e[1])
+    
+    def export(self, archive_path: str, progress=None) -> int:
+        """Writes the archive (atomically) and returns the number of entries"""
+        archive_format = self.format_of(archive_path)
+        entries = self.entries()
+        tmp_path = f"{archive_path}.tmp"
+        try:
+            with TRACER.span("export", "export", format=archive_format, files=len(entries)):
+                with open(tmp_path, 'wb') as f, ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                    if archive_format == 'zip':
+                        self._write_zip(f, entries, pool, progress)
+                    else:
+                        self._write_tar(f, entries, archive_format, pool, progress)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, archive_path)
+        return len(entries)
+    
+    def _ordered(self, pool: ThreadPoolExecutor, func, items):
+        """pool.map that keeps at most a window of results in flight"""
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) > 2 * self.jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    
+    def _deflate(self, entry: Tuple[str, str]) -> Tuple[str, os.stat_result, int, int, int, bytes]:
+        path, name = entry
+        with TRACER.span("export.compress", "export", file=name):
+            stat = os.stat(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+            if len(compressed) >= len(data):
+                return name, stat, 0, zlib.crc32(data), len(data), data  # stored
+            return name, stat, 8, zlib.crc32(data), len(data), compressed
+    
+    def _dos_time(self, mtime: float) -> Tuple[int, int]:
+        if self.reproducible:
+            # UTC, so the same SOURCE_DATE_EPOCH gives the same bytes in every timezone
+            t = time.gmtime(max(self.source_date_epoch, 315532800))  # ZIP dates start in 1980
+        else:
+            t = time.localtime(mtime)
+        return ((t.tm_year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday,
+                t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2)
+    
+    def _write_zip(self, f, entries, pool, progress):
+        central = []
+        offset = 0
+        for index, (name, stat, method, crc, size, data) in enumerate(self._ordered(pool, self._deflate, entries)):
+            if size > self.ZIP_LIMIT or offset > self.ZIP_LIMIT:
+                raise ValueError("Archive too large for ZIP, export as tar instead")
+            encoded = name.encode('utf-8')
+            date, clock = self._dos_time(stat.st_mtime)
+            fields = (method, clock, date, crc, len(data), size, len(encoded))
+            f.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, 0x800, *fields, 0))
+            f.write(encoded)
+            f.write(data)
+            mode = 0o755 if stat.st_mode & 0o111 else 0o644
+            central.append(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 0x0314, 20, 0x800, *fields,
+                                       0, 0, 0, 0, (0o100000 | mode) << 16, offset) + encoded)
+            offset += 30 + len(encoded) + len(data)
+            if progress:
+                progress(index + 1, len(entries))
+        if len(central) >= 0xFFFF:
+            raise ValueError("Too many files for ZIP, export as tar instead")
+        directory = b''.join(central)
+        f.write(directory)
+        f.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(central), len(central),
+                            len(directory), offset, 0))
+    
+    def _write_tar(self, f, entries, archive_format, pool, progress):
+        if archive_format == 'tar.zst':
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("tar.zst export needs the zstandard package (pip install zstandard)")
+            compressor = zstandard.ZstdCompressor(level=3, threads=self.jobs)
+            stream = compressor.stream_writer(f, closefd=False)
+        elif archive_format == 'tar.gz':
+            stream = _ParallelGzipWriter(f, pool, self.level, self.CHUNK_SIZE, 2 * self.jobs)
+        else:
+            stream = f
+        
+        with tarfile.open(fileobj=stream, mode='w|', format=tarfile.GNU_FORMAT) as tar:
+            for index, (path, name) in enumerate(entries):
+                stat = os.stat(path)
+                info = tarfile.TarInfo(name)
+                info.size = stat.st_size
+                info.mtime = self.source_date_epoch
+                info.mode = 0o755 if stat.st_mode & 0o111 else 0o644
+                info.uid = info.gid = 0
+                info.uname = info.gname = ""
+                with open(path, 'rb') as data:
+                    tar.addfile(info, data)
+                if progress:
+                    progress(index + 1, len(entries))
+        if stream is not f:
+            stream.close()
+
+class _ParallelGzipWriter:
+    """Write-only stream compressing fixed-size chunks as independent gzip members in parallel"""
+    
+    def __init__(self, fileobj, pool: ThreadPoolExecutor, level: int, chunk_size: int, window: int):
+        self.fileobj = fileobj
+        self.pool = pool
+        self.level = level
+        self.chunk_size = chunk_size
+        self.window = window
+        self._buffer = bytearray()
+        self._pending = deque()
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self._submit(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(data)
+    
+    def _submit(self, chunk: bytes):
+        self._pending.append(self.pool.submit(gzip.compress, chunk, self.level, mtime=0))
+        while len(self._pending) > self.window:
+            self.fileobj.write(self._pending.popleft().result())
+    
+    def close(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self.fileobj.write(self._pending.popleft().result())
+
+#---------------------------------------------------------------
+# Regression Ranking
+#---------------------------------------------------------------
+class CoverageRanker:
+    """Greedy set cover of regression runs over the coverage bins they hit
+    
+    Each run is a (scenario, seed) pair with the bins it covered, read from
+    the [COVBIN] lines the generated coverage collector prints at the end of
+    a simulation. select() keeps the runs that reach the merged coverage of
+    all runs at the lowest cost, and reweight() shifts scenario weights
+    toward the coverpoints that still have holes.
+    """
+    BIN_PATTERN = re.compile(r'\[COVBIN\]\s+(\S+)\s+(\d+)')
+    
+    def __init__(self):
+        self.runs: List[Dict] = []
+        self.universe = set()  # Every bin reported, covered or not
+    
+    def add_run(self, scenario: str, seed, hits: Dict[str, int], cost: float = 1.0):
+        """Adds a run from its per-bin hit counts"""
+        self.universe.update(hits)
+        self.runs.append({
+            'scenario': scenario,
+            'seed': seed,
+            'bins': frozenset(name for name, count in hits.items() if count),
+            'cost': max(float(cost), 1e-6),
+        })
+    
+    def load_log(self, log_file: str, cost: float = 1.0) -> bool:
+        """Adds a run from a <scenario>_<seed>.log; False if it reports no bins"""
+        hits = {}
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if '[COVBIN]' not in line:
+                    continue
+                match = self.BIN_PATTERN.search(line)
+                if match:
+                    hits[match.group(1)] = hits.get(match.group(1), 0) + int(match.group(2))
+        if not hits:
+            return False
+        scenario, _, seed = Path(log_file).stem.rpartition('_')
+        self.add_run(scenario or Path(log_file).stem, int(seed) if seed.isdigit() else seed, hits, cost)
+        return True
+    
+    def load_logs(self, log_dir: str) -> int:
+        """Adds every run log in a directory; returns the number of runs with coverage"""
+        return sum(self.load_log(str(log_file)) for log_file in sorted(Path(log_dir).glob('*.log')))
+    
+    def load_results(self, results: List[Dict]) -> int:
+        """Adds the runs returned by SimulationController.run_regression, costed by run time"""
+        return sum(self.load_log(result['log'], result.get('execution_time') or 1.0)
+                   for result in results if result.get('log') and os.path.exists(result['log']))
+    
+    def merged(self) -> set:
+        """Bins covered by at least one run"""
+        return set().union(*(run['bins'] for run in self.runs))
+    
+    def select(self) -> List[Dict]:
+        """Runs that together cover the merged bins, cheapest coverage gain first
+        
+        Lazy greedy: a run's gain only shrinks as bins get covered, so a stale
+        heap entry is re-scored when popped instead of re-scoring every run
+        after each pick.
+        """
+        remaining = self.merged()
+        heap = [(-len(run['bins']) / run['cost'], index) for index, run in enumerate(self.runs)]
+        heapq.heapify(heap)
+        selected = []
+        covered = 0
+        while remaining and heap:
+            _, index = heapq.heappop(heap)
+            run = self.runs[index]
+            gain = run['bins'] & remaining
+            if not gain:
+                continue
+            if heap and len(gain) / run['cost'] < -heap[0][0]:
+                heapq.heappush(heap, (-len(gain) / run['cost'], index))
+                continue
+            remaining -= gain
+            covered += len(gain)
+            selected.append({
+                'scenario': run['scenario'],
+                'seed': run['seed'],
+                'new_bins': len(gain),
+                'cost': run['cost'],
+                'coverage': covered / len(self.universe),
+            })
+        return selected
+    
+    def reweight(self, weights: Dict[str, int], total: int = 100) -> Dict[str, int]:
+        """Scenario weights favouring runs that reach rare bins of incompletely covered coverpoints
+        
+        A bin is worth 1/(runs hitting it), doubled for every hole left in its
+        coverpoint; a scenario scores the mean worth of its runs. Scenarios
+        without coverage data keep their share, and none drops below 1.
+        """
+        hits = Counter(name for run in self.runs for name in run['bins'])
+        holes = Counter(name.rpartition('.')[0] for name in self.universe if not hits[name])
+        worth = {name: (1 + holes[name.rpartition('.')[0]]) / count for name, count in hits.items()}
+        
+        scores = defaultdict(list)
+        for run in self.runs:
+            scores[run['scenario']].append(sum(worth[name] for name in run['bins']))
+        measured = {scenario: statistics.mean(values) for scenario, values in scores.items()}
+        if not measured:
+            return dict(weights)
+        
+        old_total = sum(weights.values()) or 1
+        # Measured scenarios share the weight they had between them (all of it for new names)
+        pool = sum(weights.get(scenario, 0) for scenario in measured) or old_total
+        score_total = sum(measured.values()) or 1
+        shares = {scenario: pool * measured[scenario] / score_total if scenario in measured else weight
+                  for scenario, weight in weights.items()}
+        shares.update({scenario: pool * score / score_total for scenario, score in measured.items()
+                       if scenario not in shares})
+        share_total = sum(shares.values()) or 1
+        return {scenario: max(1, round(total * share / share_total)) for scenario, share in shares.items()}
+    
+    def summary(self, selected: List[Dict]) -> Dict:
+        """Coverage and cost of all runs versus the selected ones"""
+        merged = self.merged()
+        return {
+            'runs': len(self.runs),
+            'selected': len(selected),
+            'bins': len(self.universe),
+            'covered': len(merged),
+            'holes': sorted(self.universe - merged),
+            'cost': sum(run['cost'] for run in self.runs),
+            'selected_cost': sum(run['cost'] for run in selected),
+        }
+    
+    @staticmethod
+    def write_nightly(path: str, selected: List[Dict], summary: Dict):
+        """Writes the "<scenario> <seed>" list read by the Makefile nightly target"""
+        coverage = summary['covered'] / summary['bins'] if summary['bins'] else 0.0
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# Nightly regression generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"# {summary['selected']} of {summary['runs']} runs, "
+                    f"{summary['selected_cost']:g} of {summary['cost']:g} cost units, "
+                    f"{summary['covered']}/{summary['bins']} bins ({coverage:.1%})\n")
+            for run in selected:
+                f.write(f"{run['scenario']} {run['seed']}\n")
+
+#---------------------------------------------------------------
+# Failure Triage
+#---------------------------------------------------------------
+class FailureTriage:
+    """Clusters failing regression runs by the signature of their first error
+    
+    Only the first UVM_ERROR/UVM_FATAL of a run is used (later errors are
+    usually fallout); logs are read line by line and abandoned at that
+    message. Runs without one fall back to their first simulator error.
+    Numbers, hex values and times are masked so that the same check failing
+    on different data, seeds or cycles lands in one cluster.
+    """
+    UVM_MESSAGE = re.compile(r'^(?:#\s*)?(UVM_ERROR|UVM_FATAL)\b(?!\s*:)\s*(.*)$')
+    UVM_FIELDS = re.compile(r'^(?:\S+\(\d+\)\s+)?(?:@\s*([\d.]+)\s*\w*\s*:\s*)?(\S+)\s+\[([^\]]*)\]\s*(.*)$')
+    MASKS = [
+        (re.compile(r"(?:\b\d+)?'[sS]?[hH][0-9a-fA-FxXzZ_?]+|\b0[xX][0-9a-fA-F_]+"), '<HEX>'),
+        (re.compile(r"(?:\b\d+)?'[sS]?[bBoOdD][0-9a-fA-FxXzZ_?]+"), '<NUM>'),
+        (re.compile(r'\b\d+(?:\.\d+)?\s*(?:fs|ps|ns|us|ms|s)\b'), '<TIME>'),
+        (re.compile(r'\b(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{4,}\b'), '<HEX>'),
+        (re.compile(r'(?<![A-Za-z<])\d+(?:\.\d+)?'), '<NUM>'),
+        (re.compile(r'\s+'), ' '),
+    ]
+    MAX_SEEDS = 50  # Seeds kept per cluster for the report
+    
+    def __init__(self, backend: Optional[SimulatorBackend] = None):
+        self.backend = backend or SimulatorBackend()
+        self.clusters: Dict[str, Dict] = {}
+        self.runs = 0
+        self.failed = 0
+        self.scenarios: Dict[str, Dict[str, int]] = {}
+    
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """Masks run-specific values of a message"""
+        for pattern, token in cls.MASKS:
+            text = pattern.sub(token, text)
+        return text.strip()
+    
+    def first_error(self, lines) -> Optional[Dict]:
+        """Signature of the first UVM error/fatal in a log (else its first tool error), or None"""
+        fallback = None
+        for number, line in enumerate(lines, 1):
+            if 'UVM_' not in line and fallback is not None:
+                continue
+            match = self.UVM_MESSAGE.match(line.strip())
+            if match:
+                severity, rest = match.groups()
+                fields = self.UVM_FIELDS.match(rest)
+                if fields:
+                    time, reporter, message_id, message = fields.groups()
+                    signature = f"{severity} {self.normalize(reporter)} [{message_id}] {self.normalize(message)}"
+                else:
+                    time, message = None, rest
+                    signature = f"{severity} {self.normalize(rest)}"
+                return {'signature': signature, 'severity': severity, 'message': message.strip(),
+                        'line': number, 'time': float(time) if time else None}
+            if fallback is None and self.backend.error_pattern.search(line.strip()):
+                fallback = {'signature': f"TOOL {self.normalize(line.strip())}", 'severity': 'TOOL',
+                            'message': line.strip(), 'line': number, 'time': None}
+        return fallback
+    
+    def add_log(self, log_file: str, scenario: Optional[str] = None, seed=None) -> Optional[Dict]:
+        """Triages one <scenario>_<seed>.log; returns its error, or None if it passed"""
+        scenario, seed, error = self._read(log_file, scenario, seed)
+        self._record(scenario, seed, str(log_file), error)
+        return error
+    
+    def add_results(self, results: List[Dict]):
+        """Triages the runs returned by SimulationController.run_regression"""
+        for result in results:
+            if result.get('log') and os.path.exists(result['log']):
+                self.add_log(result['log'], result['scenario'], result['seed'])
+    
+    def scan(self, log_dir: str, jobs: Optional[int] = None, progress=None) -> 'FailureTriage':
+        """Triages every log in a directory, reading several files at a time
+        
+        Results are recorded in file name order, so reports do not depend on
+        which reader finishes first.
+        """
+        paths = sorted(entry.path for entry in os.scandir(log_dir)
+                       if entry.is_file() and entry.name.endswith('.log'))
+        with ThreadPoolExecutor(max_workers=jobs or min(8, os.cpu_count() or 1)) as pool:
+            for count, (path, (scenario, seed, error)) in enumerate(zip(paths, pool.map(self._read, paths)), 1):
+                self._record(scenario, seed, path, error)
+                if progress and count % 500 == 0:
+                    progress(count)
+        return self
+    
+    def _read(self, log_file: str, scenario: Optional[str] = None, seed=None) -> Tuple[str, object, Optional[Dict]]:
+        if scenario is None:
+            stem = Path(log_file).stem
+            scenario, _, seed = stem.rpartition('_')
+            scenario, seed = scenario or stem, int(seed) if seed.isdigit() else seed
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            return scenario, seed, self.first_error(f)
+    
+    def _record(self, scenario: str, seed, log_file: str, error: Optional[Dict]):
+        self.runs += 1
+        counts = self.scenarios.setdefault(scenario, {'passed': 0, 'failed': 0})
+        counts['failed' if error else 'passed'] += 1
+        if error is None:
+            return
+        self.failed += 1
+        cluster = self.clusters.get(error['signature'])
+        if cluster is None:
+            cluster = self.clusters[error['signature']] = {
+                'signature': error['signature'],
+                'severity': error['severity'],
+                'count': 0,
+                'scenarios': {},
+                'seeds': [],
+                'representative': None,
+            }
+        cluster['count'] += 1
+        cluster['scenarios'][scenario] = cluster['scenarios'].get(scenario, 0) + 1
+        if len(cluster['seeds']) < self.MAX_SEEDS:
+            cluster['seeds'].append(seed)
+        # Representative: the run failing earliest in simulation time (quickest to reproduce)
+        run = {'scenario': scenario, 'seed': seed, 'log': log_file, 'line': error['line'],
+               'time': error['time'], 'message': error['message']}
+        best = cluster['representative']
+        if best is None or self._sooner(run, best):
+            cluster['representative'] = run
+    
+    @staticmethod
+    def _sooner(run: Dict, best: Dict) -> bool:
+        key = lambda r: (r['time'] is None, r['time'] or 0.0, str(r['seed']))
+        return key(run) < key(best)
+    
+    def report(self) -> Dict:
+        """Clusters by decreasing size, with run totals (JSON-compatible)"""
+        return {
+            'runs': self.runs,
+            'failed': self.failed,
+            'scenarios': self.scenarios,
+            'clusters': sorted(self.clusters.values(), key=lambda c: (-c['count'], c['signature'])),
+        }
+
+#---------------------------------------------------------------
+# Generator Service
 #---------------------------------------------------------------
-class RTLAnalyzer:
-    """Class responsible for RTL module analysis"""
+class ServiceError(Exception):
+    """Error reported to an RPC client as a JSON-RPC error object"""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+@dataclass
+class ServiceJob:
+    """A request being executed by the service"""
+    id: str
+    method: str
+    started: float = field(default_factory=time.monotonic)
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    controller: Optional['SimulationController'] = None
+
+class VegaService:
+    """Long-lived generator behind `vega serve`
+    
+    Keeps preprocessors (with their parsed include files), analyzed modules,
+    the compiled Jinja templates and simulation controllers warm between
+    requests. Cached files are re-validated against their mtime and size on
+    every request, so edits are picked up without restarting the daemon.
+    
+    Requests are JSON-RPC 2.0 objects. generate and regress run in one of
+    max_jobs slots; at most max_queue further requests wait for a slot and
+    the rest are rejected as busy. Any job can be cancelled by id while it
+    waits or runs.
+    """
+    PARSE_ERROR = -32700
+    INVALID_REQUEST = -32600
+    METHOD_NOT_FOUND = -32601
+    INVALID_PARAMS = -32602
+    FAILED = -32000
+    CANCELLED = -32001
+    BUSY = -32002
+    
+    HEAVY_METHODS = {'generate', 'regress'}
+    POLL_INTERVAL = 0.1  # seconds between cancellation checks while waiting
+    
+    def __init__(self, include_dirs: Optional[List[str]] = None, defines: Optional[Dict[str, str]] = None,
+                 max_jobs: Optional[int] = None, max_queue: int = 16,
+                 generator: Optional[TestbenchGenerator] = None):
+        self.include_dirs = [os.path.abspath(d) for d in include_dirs or []]
+        self.defines = dict(defines or {})
+        self.generator = generator or TestbenchGenerator()
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.methods = {
+            'analyze': self.analyze,
+            'generate': self.generate,
+            'regress': self.regress,
+            'report': self.report,
+            'rank': self.rank,
+            'triage': self.triage,
+            'cancel': self.cancel,
+            'status': self.status,
+        }
+        self.stats = {'requests': 0, 'errors': 0, 'cancelled': 0, 'module_cache_hits': 0}
+        self._slots = threading.BoundedSemaphore(self.max_jobs)
+        self._waiting = 0
+        self._job_count = 0
+        self._jobs: Dict[str, ServiceJob] = {}
+        self._lock = threading.Lock()  # jobs, counters and output locks
+        self._analysis_lock = threading.RLock()  # preprocessors and the module cache are not thread-safe
+        self._preprocessors: Dict[Tuple, SVPreprocessor] = {}
+        self._modules: Dict[Tuple, ModuleInfo] = {}  # (preprocessor key, path) -> module
+        self._generated: Dict[str, Tuple[ModuleInfo, Dict, List[str]]] = {}  # output dir -> (module, config, files)
+        self._controllers: Dict[Tuple[str, str, str], SimulationController] = {}
+        self._output_locks: Dict[str, threading.Lock] = {}
+    
+    # --- JSON-RPC ---
+    
+    def handle_payload(self, data: bytes) -> Optional[bytes]:
+        """Executes a JSON-RPC request or batch; returns the encoded response (None for notifications)"""
+        try:
+            request = json.loads(data)
+        except ValueError:
+            return json.dumps(self._error(None, self.PARSE_ERROR, "Parse error")).encode()
+        if isinstance(request, list):
+            if not request:
+                return json.dumps(self._error(None, self.INVALID_REQUEST, "Empty batch")).encode()
+            responses = [r for r in map(self.handle, request) if r is not None]
+            return json.dumps(responses).encode() if responses else None
+        response = self.handle(request)
+        return json.dumps(response).encode() if response is not None else None
+    
+    def handle(self, request) -> Optional[Dict]:
+        """Executes one JSON-RPC request object"""
+        if (not isinstance(request, dict) or request.get('jsonrpc') != '2.0'
+                or not isinstance(request.get('method'), str)):
+            return self._error(None, self.INVALID_REQUEST, "Invalid request")
+        request_id = request.get('id')
+        self.stats['requests'] += 1
+        try:
+            method = self.methods.get(request['method'])
+            if method is None:
+                raise ServiceError(self.METHOD_NOT_FOUND, f"Unknown method: {request['method']}")
+            params = request.get('params', {})
+            if not isinstance(params, dict):
+                raise ServiceError(self.INVALID_PARAMS, "params must be an object")
+            if request['method'] in ('cancel', 'status'):
+                result = method(params)
+            else:
+                result = self._run_job(request['method'], method, params, params.get('job', request_id))
+        except ServiceError as e:
+            self.stats['errors'] += 1
+            if e.code == self.CANCELLED:
+                self.stats['cancelled'] += 1
+            return self._error(request_id, e.code, str(e)) if 'id' in request else None
+        except (ValueError, OSError, TypeError, KeyError) as e:
+            self.stats['errors'] += 1
+            return self._error(request_id, self.FAILED, str(e)) if 'id' in request else None
+        if 'id' not in request:
+            return None
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
     
     @staticmethod
-    def extract_module_info(file_path: str) -> ModuleInfo:
-        """Extracts information from SystemVerilog/Verilog module"""
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
-        
+    def _error(request_id, code: int, message: str) -> Dict:
+        return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+    
+    def _run_job(self, name: str, method, params: Dict, job_id):
+        with self._lock:
+            if job_id is None:
+                self._job_count += 1
+                job_id = f"job{self._job_count}"
+            job_id = str(job_id)
+            if job_id in self._jobs:
+                raise ServiceError(self.INVALID_REQUEST, f"Job {job_id} is already running")
+            job = ServiceJob(job_id, name)
+            self._jobs[job_id] = job
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            with open(file_path, 'r', encoding='latin-1') as f:
-                content = f.read()
-        
-        # Remove comments
-        content = RTLAnalyzer._remove_comments(content)
-        
-        # Find module declaration
-        module_match = re.search(
-            r'module\s+(\w+)\s*(?:#\s*\([^)]*\))?\s*\(\s*(.*?)\s*\)\s*;', 
-            content, 
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        if not module_match:
-            raise ValueError("Module declaration not found")
-        
-        module_name = module_match.group(1)
-        ports_section = module_match.group(2)
+            if name not in self.HEAVY_METHODS:
+                return method(params, job)
+            self._acquire_slot(job)
+            try:
+                return method(params, job)
+            finally:
+                self._slots.release()
+        finally:
+            with self._lock:
+                del self._jobs[job_id]
+    
+    def _acquire_slot(self, job: ServiceJob):
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                raise ServiceError(self.BUSY, f"Server busy: {self.max_queue} requests already queued")
+            self._waiting += 1
+        try:
+            self._wait_for(self._slots, job)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+    
+    def _wait_for(self, lock, job: ServiceJob):
+        """Acquires a lock or semaphore, giving up if the job is cancelled meanwhile"""
+        while not lock.acquire(timeout=self.POLL_INTERVAL):
+            self._check(job)
+        if job.cancelled.is_set():
+            lock.release()
+            self._check(job)
+    
+    def _check(self, job: ServiceJob):
+        if job.cancelled.is_set():
+            raise ServiceError(self.CANCELLED, f"Job {job.id} cancelled")
+    
+    def _output_lock(self, output_dir: str) -> threading.Lock:
+        with self._lock:
+            return self._output_locks.setdefault(output_dir, threading.Lock())
+    
+    # --- Parameters ---
+    
+    @staticmethod
+    def _path(params: Dict, name: str, default: Optional[str] = None) -> str:
+        """Absolute path parameter; relative paths are taken from params['cwd']"""
+        value = params.get(name, default)
+        if not isinstance(value, str) or not value:
+            raise ServiceError(VegaService.INVALID_PARAMS, f"Missing path parameter: {name}")
+        return os.path.abspath(os.path.join(params.get('cwd', os.getcwd()), value))
+    
+    def _preprocessor(self, params: Dict, extra_dirs: Tuple[str, ...] = ()) -> Tuple[Tuple, SVPreprocessor]:
+        """Shared preprocessor for the requested include dirs and defines, refreshed from disk"""
+        cwd = params.get('cwd', os.getcwd())
+        include_dirs = (list(extra_dirs) + self.include_dirs
+                        + [os.path.abspath(os.path.join(cwd, d)) for d in params.get('include_dirs', [])])
+        defines = dict(self.defines)
+        defines.update(SVPreprocessor.parse_define_args(params.get('defines', [])))
+        key = (tuple(include_dirs), tuple(sorted(defines.items())))
+        
+        preprocessor = self._preprocessors.get(key)
+        if preprocessor is None:
+            preprocessor = self._preprocessors[key] = SVPreprocessor(include_dirs, defines)
+        else:
+            changed = preprocessor.refresh()
+            if changed:
+                stale = set(changed) | preprocessor.dependents(changed)
+                for cache_key in [k for k in self._modules if k[0] == key and k[1] in stale]:
+                    del self._modules[cache_key]
+        return key, preprocessor
+    
+    def _module(self, path: str, key: Tuple, preprocessor: SVPreprocessor) -> ModuleInfo:
+        module = self._modules.get((key, path))
+        if module is None:
+            module = self._modules[(key, path)] = RTLAnalyzer.extract_module_info(path, preprocessor)
+        else:
+            self.stats['module_cache_hits'] += 1
+        return module
+    
+    def _hierarchy(self, project_dir: str, key: Tuple, preprocessor: SVPreprocessor) -> ModuleHierarchy:
+        """RTLAnalyzer.extract_hierarchy over the module cache"""
+        modules = {}
+        file_mapping = {}
+        for file in RTLAnalyzer.discover_sources(project_dir):
+            try:
+                module = self._module(str(file), key, preprocessor)
+            except ValueError:
+                continue
+            modules[module.name] = module
+            file_mapping[module.name] = str(file)
+        return RTLAnalyzer.build_hierarchy(modules, file_mapping)
+    
+    # --- Methods ---
+    
+    def analyze(self, params: Dict, job: ServiceJob) -> Dict:
+        """Module information of a file, or the hierarchy of a project directory
         
-        module_info = ModuleInfo(name=module_name)
+        params: path, [include_dirs], [defines], [cwd]
+        """
+        path = self._path(params, 'path')
+        with self._analysis_lock:
+            if os.path.isdir(path):
+                key, preprocessor = self._preprocessor(params, (path,))
+                hierarchy = self._hierarchy(path, key, preprocessor)
+                modules = [hierarchy.top_level] + list(hierarchy.submodules.values())
+                return {
+                    'top': hierarchy.top_level.name,
+                    'modules': {m.name: ProjectFile.module_to_dict(m) for m in modules},
+                    'files': hierarchy.file_mapping,
+                    'connections': [list(c) for c in hierarchy.connections],
+                    'instances': len(hierarchy.instance_tree()),
+                    'missing_includes': sorted(set(preprocessor.missing_includes)),
+                }
+            key, preprocessor = self._preprocessor(params)
+            return ProjectFile.module_to_dict(self._module(path, key, preprocessor))
+    
+    def generate(self, params: Dict, job: ServiceJob) -> Dict:
+        """Generates the UVM environment for a DUT
         
-        # Extract ports
-        module_info.ports = RTLAnalyzer._extract_ports(ports_section, content)
+        params: dut, [output], [config], [force], [include_dirs], [defines], [cwd]
+        Files are only re-rendered when the module or configuration changed
+        since the last generation into the same directory (unless force).
+        """
+        start = time.monotonic()
+        dut = self._path(params, 'dut')
+        output_dir = self._path(params, 'output', 'uvm_tb_generated')
+        config = TestbenchGenerator.make_config(params.get('config'))
+        with self._analysis_lock:
+            key, preprocessor = self._preprocessor(params)
+            module = self._module(dut, key, preprocessor)
+        self._check(job)
+        
+        lock = self._output_lock(output_dir)
+        self._wait_for(lock, job)
+        try:
+            only = None
+            previous = self._generated.get(output_dir)
+            if (previous and previous[1] == config and not params.get('force')
+                    and all(os.path.exists(p) for p in previous[2])):
+                only = self.generator.impacted_templates(module.name, config, previous[0].diff(module))
+            warnings = []
+            written = self.generator.generate(module, config, output_dir, only=only, log=warnings.append)
+            files = written if only is None else previous[2]
+            self._generated[output_dir] = (module, config, files)
+        finally:
+            lock.release()
+        return {
+            'module': module.name,
+            'output': output_dir,
+            'written': written,
+            'warnings': warnings,
+            'elapsed_ms': round((time.monotonic() - start) * 1000, 1),
+        }
+    
+    def regress(self, params: Dict, job: ServiceJob) -> Dict:
+        """Compiles a generated environment and runs scenarios in parallel
         
-        # Extract parameters
-        module_info.parameters = RTLAnalyzer._extract_parameters(content)
+        params: output, [simulator], [top], [scenarios], [seeds], [base_seed],
+        [plusargs], [jobs], [compile], [cwd]
+        """
+        output_dir = self._path(params, 'output', 'uvm_tb_generated')
+        if not os.path.isdir(output_dir):
+            raise ServiceError(self.INVALID_PARAMS, f"Output directory not found: {output_dir}")
+        simulator = params.get('simulator', 'auto')
+        top = params.get('top', 'top')
+        scenarios = params.get('scenarios', ['smoke'])
+        base_seed = int(params.get('base_seed', 1))
+        runs = [{'scenario': scenario, 'seed': base_seed + i, 'plusargs': dict(params.get('plusargs', {}))}
+                for scenario in scenarios for i in range(int(params.get('seeds', 1)))]
+        
+        lock = self._output_lock(output_dir)
+        self._wait_for(lock, job)
+        try:
+            key = (output_dir, simulator, top)
+            controller = self._controllers.get(key)
+            if controller is None:
+                controller = self._controllers[key] = SimulationController(output_dir, simulator, top=top)
+            job.controller = controller
+            self._check(job)
+            
+            log = []
+            if params.get('compile', True) or not controller.compile_complete:
+                if not controller.compile(callback=log.append, wait=True):
+                    self._check(job)
+                    raise ServiceError(self.FAILED, "\n".join(["Compilation failed"] + log[-20:]))
+            self._check(job)
+            results = controller.run_regression(runs, jobs=params.get('jobs', self.max_jobs))
+            self._check(job)
+        finally:
+            job.controller = None
+            lock.release()
+        return {
+            'output': output_dir,
+            'simulator': controller.backend.name,
+            'runs': results,
+            'passed': sum(r['passed'] for r in results),
+            'failed': sum(not r['passed'] for r in results),
+        }
+    
+    def report(self, params: Dict, job: ServiceJob) -> Dict:
+        """Pass/fail summary per scenario from the regression logs
         
-        # Extract instances and connections
-        module_info.instances = RTLAnalyzer._extract_instances(content)
+        params: output, [log_dir], [simulator], [cwd]
+        """
+        output_dir = self._path(params, 'output', 'uvm_tb_generated')
+        log_dir = Path(output_dir) / params.get('log_dir', 'logs')
+        backend = get_simulator_backend(params.get('simulator', 'auto'))
+        scenarios = {}
+        for log_file in sorted(log_dir.glob('*.log')):
+            self._check(job)
+            scenario, _, seed = log_file.stem.rpartition('_')
+            with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+                summary = backend.summarize_log(f)
+            passed = not (summary.get('UVM_ERROR') or summary.get('UVM_FATAL') or summary.get('error'))
+            entry = scenarios.setdefault(scenario or log_file.stem, {'passed': 0, 'failed': 0, 'failing_seeds': []})
+            entry['passed' if passed else 'failed'] += 1
+            if not passed:
+                entry['failing_seeds'].append(seed)
+        return {
+            'output': output_dir,
+            'scenarios': scenarios,
+            'passed': sum(s['passed'] for s in scenarios.values()),
+            'failed': sum(s['failed'] for s in scenarios.values()),
+        }
+    
+    def triage(self, params: Dict, job: ServiceJob) -> Dict:
+        """Failing runs clustered by first-error signature
         
-        # Extract port connections
-        RTLAnalyzer._extract_port_connections(content, module_info)
+        params: output, [log_dir], [simulator], [cwd]
+        """
+        output_dir = self._path(params, 'output', 'uvm_tb_generated')
+        log_dir = Path(output_dir) / params.get('log_dir', 'logs')
+        if not log_dir.is_dir():
+            raise ServiceError(self.INVALID_PARAMS, f"Log directory not found: {log_dir}")
+        triage = FailureTriage(get_simulator_backend(params.get('simulator', 'auto')))
+        triage.scan(str(log_dir), progress=lambda count: self._check(job))
+        return dict(triage.report(), output=output_dir)
+    
+    def rank(self, params: Dict, job: ServiceJob) -> Dict:
+        """Minimized nightly run list and scenario weights from the regression coverage
         
-        return module_info
+        params: output, [log_dir], [weights], [nightly], [cwd]
+        """
+        output_dir = self._path(params, 'output', 'uvm_tb_generated')
+        ranker = CoverageRanker()
+        ranker.load_logs(str(Path(output_dir) / params.get('log_dir', 'logs')))
+        self._check(job)
+        selected = ranker.select()
+        summary = ranker.summary(selected)
+        nightly = os.path.join(output_dir, params.get('nightly', 'nightly_seeds.txt'))
+        if selected:
+            CoverageRanker.write_nightly(nightly, selected, summary)
+        return {
+            'output': output_dir,
+            'nightly': nightly if selected else None,
+            'selected': selected,
+            'summary': summary,
+            'weights': ranker.reweight(params.get('weights') or VerificationPlan().test_weights),
+        }
+    
+    def cancel(self, params: Dict) -> Dict:
+        """Cancels a queued or running job; params: job"""
+        job_id = str(params.get('job'))
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise ServiceError(self.INVALID_PARAMS, f"No such job: {job_id}")
+        job.cancelled.set()
+        if job.controller:
+            job.controller.cancel()
+        return {'job': job_id, 'cancelled': True}
+    
+    def status(self, params: Dict) -> Dict:
+        """Running jobs, queue depth and cache sizes"""
+        now = time.monotonic()
+        with self._lock:
+            jobs = [{'job': j.id, 'method': j.method, 'elapsed': round(now - j.started, 3)}
+                    for j in self._jobs.values()]
+            waiting = self._waiting
+        return {
+            'jobs': jobs,
+            'queued': waiting,
+            'max_jobs': self.max_jobs,
+            'max_queue': self.max_queue,
+            'cached_modules': len(self._modules),
+            'preprocessors': len(self._preprocessors),
+            'stats': dict(self.stats),
+        }
+    
+    # --- Transport ---
+    
+    def make_server(self, port: int = 8765, socket_path: Optional[str] = None):
+        """Threaded JSON-RPC server: HTTP POST on localhost, or newline-delimited
+        JSON over a Unix socket when socket_path is given"""
+        if socket_path:
+            if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+                raise OSError("Unix sockets are not supported on this platform")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = socketserver.ThreadingUnixStreamServer(socket_path, _RPCStreamHandler)
+            os.chmod(socket_path, 0o600)
+        else:
+            server = ThreadingHTTPServer(('127.0.0.1', port), _RPCHTTPHandler)
+        server.daemon_threads = True
+        server.service = self
+        return server
+
+class _RPCHTTPHandler(BaseHTTPRequestHandler):
+    """JSON-RPC over HTTP POST"""
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        response = self.server.service.handle_payload(self.rfile.read(length))
+        self.send_response(200 if response else 204)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response or b'')))
+        self.end_headers()
+        if response:
+            self.wfile.write(response)
+    
+    def log_message(self, format, *args):
+        pass
+
+class _RPCStreamHandler(socketserver.StreamRequestHandler):
+    """JSON-RPC over a stream socket, one request per line"""
+    
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.service.handle_payload(line)
+            if response:
+                self.wfile.write(response + b'\n')
+                self.wfile.flush()
+
+#---------------------------------------------------------------
+# Benchmarks
+#---------------------------------------------------------------
+class SyntheticRTL:
+    """Writes synthetic SystemVerilog projects used as benchmark fixtures"""
     
     @staticmethod
-    def _remove_comments(content: str) -> str:
-        """Removes // and /* */ comments from code"""
-        content = re.sub(r'//.*?$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-        return content
+    def module_text(name: str, ports: int, instances: Optional[List[Tuple[str, str]]] = None) -> str:
+        """Module with clk/rst_n plus alternating input/output vector ports and named-port instances"""
+        port_lines = ["    input  logic clk", "    input  logic rst_n"]
+        port_lines += [f"    {'input ' if i % 2 == 0 else 'output'} logic [WIDTH-1:0] p{i}" for i in range(ports)]
+        lines = [f"module {name} #(parameter WIDTH = 8) (", ",\n".join(port_lines), ");"]
+        for i, (child, child_ports) in enumerate(instances or []):
+            lines.append(f"    logic [WIDTH-1:0] w{i}_0;")
+            connections = [".clk(clk)", ".rst_n(rst_n)"] + [
+                f".p{j}({'w%d_0' % i if j == 0 else 'p%d' % (j % max(ports, 1))})" for j in range(child_ports)
+            ]
+            lines.append(f"    {child} u_{child}_{i} ({', '.join(connections)});")
+        lines.append("endmodule")
+        return "\n".join(lines) + "\n"
     
     @staticmethod
-    def _extract_ports(ports_section: str, full_content: str) -> List[Port]:
-        """Extracts port information"""
-        ports = []
-        port_pattern = r'(input|output|inout)\s+(?:(wire|reg)\s+)?(?:(signed)\s+)?(\[.*?\])?\s*(\w+)'
-        
-        # Look for declarations in ports section
-        port_matches = re.findall(port_pattern, ports_section, re.IGNORECASE)
-        
-        for direction, wire_type, signed, width, name in port_matches:
-            port = Port(
-                name=name.strip(),
-                direction=direction.lower(),
-                width=width.strip() if width else "1"
-            )
-            ports.append(port)
-        
-        # If no ports found in declaration, look in module body
-        if not ports:
-            ports = RTLAnalyzer._extract_ports_from_body(full_content)
-        
-        return ports
+    def wide(project_dir: str, ports: int) -> str:
+        """One module with many ports"""
+        path = os.path.join(project_dir, "wide.sv")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(SyntheticRTL.module_text("wide", ports))
+        return path
     
     @staticmethod
-    def _extract_ports_from_body(content: str) -> List[Port]:
-        """Extracts ports from module body (separate declarations)"""
-        ports = []
-        separate_pattern = r'(input|output|inout)\s+(?:(wire|reg)\s+)?(?:(signed)\s+)?(\[.*?\])?\s*(\w+(?:\s*,\s*\w+)*)\s*;'
-        
-        matches = re.findall(separate_pattern, content, re.IGNORECASE | re.MULTILINE)
-        
-        for direction, wire_type, signed, width, names in matches:
-            name_list = [name.strip() for name in names.split(',')]
-            
-            for name in name_list:
-                if name:
-                    port = Port(
-                        name=name,
-                        direction=direction.lower(),
-                        width=width.strip() if width else "1"
-                    )
-                    ports.append(port)
-        
-        return ports
+    def netlist(project_dir: str, instances: int, ports: int) -> str:
+        """A top module instantiating one leaf many times (a large flat netlist)"""
+        os.makedirs(project_dir, exist_ok=True)
+        with open(os.path.join(project_dir, "leaf.sv"), 'w', encoding='utf-8') as f:
+            f.write(SyntheticRTL.module_text("leaf", ports))
+        path = os.path.join(project_dir, "netlist_top.sv")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(SyntheticRTL.module_text("netlist_top", ports, [("leaf", ports)] * instances))
+        return path
     
     @staticmethod
-    def _extract_parameters(content: str) -> Dict[str, str]:
-        """Extracts module parameters"""
-        parameters = {}
-        param_pattern = r'parameter\s+(?:\w+\s+)?(\w+)\s*=\s*([^;,]+)'
-        
-        matches = re.findall(param_pattern, content, re.IGNORECASE)
-        
-        for name, value in matches:
-            parameters[name.strip()] = value.strip()
-        
-        return parameters
-
+    def flat(project_dir: str, modules: int, ports: int) -> str:
+        """A top module instantiating many different leaf modules, one file each"""
+        os.makedirs(project_dir, exist_ok=True)
+        for i in range(modules):
+            with open(os.path.join(project_dir, f"leaf{i}.sv"), 'w', encoding='utf-8') as f:
+                f.write(SyntheticRTL.module_text(f"leaf{i}", ports))
+        with open(os.path.join(project_dir, "flat_top.sv"), 'w', encoding='utf-8') as f:
+            f.write(SyntheticRTL.module_text("flat_top", ports, [(f"leaf{i}", ports) for i in range(modules)]))
+        return project_dir
+    
     @staticmethod
-    def _extract_instances(content: str) -> Dict[str, str]:
-        """Extracts module instances"""
-        instances = {}
-        instance_pattern = r'\b(\w+)\s+(\w+)\s*\('
-        
-        matches = re.findall(instance_pattern, content)
-        for module_name, instance_name in matches:
-            instances[instance_name] = module_name
-            
-        return instances
-
+    def deep(project_dir: str, depth: int, ports: int) -> str:
+        """A chain of modules, each instantiating the next level"""
+        os.makedirs(project_dir, exist_ok=True)
+        for level in range(depth):
+            children = [(f"level{level + 1}", ports)] if level + 1 < depth else []
+            with open(os.path.join(project_dir, f"level{level}.sv"), 'w', encoding='utf-8') as f:
+                f.write(SyntheticRTL.module_text(f"level{level}", ports, children))
+        return project_dir
+    
     @staticmethod
-    def _extract_port_connections(content: str, module_info: ModuleInfo):
-        """Extracts port connections from module content"""
-        port_connections = re.findall(r'\.(\w+)\s*\(\s*(\w+)\s*\)', content)
-        for port_name, connection in port_connections:
-            for port in module_info.ports:
-                if port.name == port_name:
-                    port.connected_to = connection
-                    break
+    def regression_logs(log_dir: str, runs: int, scenarios: List[str]) -> str:
+        """UVM-style simulation logs named <scenario>_<seed>.log, one in ten failing"""
+        os.makedirs(log_dir, exist_ok=True)
+        for i in range(runs):
+            errors = 1 if i % 10 == 9 else 0
+            body = [f"UVM_INFO top.sv(10) @ {t}: reporter [TEST] transaction {t}" for t in range(200)]
+            if errors:
+                body.insert(100 + i % 50, f"UVM_ERROR sb.sv(42) @ {100 + i % 50}: uvm_test_top.env.sb [SB_MISMATCH] "
+                                          f"expected 0x{i * 7919 % 65536:04x} got 0x{i * 104729 % 65536:04x}")
+            body += ["--- UVM Report Summary ---", "UVM_INFO :  200", "UVM_WARNING :    0",
+                     f"UVM_ERROR :    {errors}", "UVM_FATAL :    0"]
+            with open(os.path.join(log_dir, f"{scenarios[i % len(scenarios)]}_{i}.log"), 'w', encoding='utf-8') as f:
+                f.write("\n".join(body) + "\n")
+        return log_dir
 
     @staticmethod
-    def extract_hierarchy(project_dir: str) -> ModuleHierarchy:
-        """Analyzes a complete project and extracts the hierarchy"""
-        module_files = list(Path(project_dir).glob("**/*.[svv]"))
-        modules = {}
+    def ipxact(path: str, registers: int) -> str:
+        """IP-XACT 2014 component with one address block of two-field registers"""
+        ns = "http://www.accellera.org/XMLSchema/IPXACT/1685-2014"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<ipxact:component xmlns:ipxact="{ns}">\n'
+                    '<ipxact:name>bench_regs</ipxact:name><ipxact:memoryMaps><ipxact:memoryMap>'
+                    '<ipxact:name>map</ipxact:name><ipxact:addressBlock><ipxact:name>regs</ipxact:name>'
+                    '<ipxact:baseAddress>0x0</ipxact:baseAddress><ipxact:width>32</ipxact:width>\n')
+            for i in range(registers):
+                f.write(f'<ipxact:register><ipxact:name>reg{i}</ipxact:name>'
+                        f'<ipxact:addressOffset>0x{4 * i:x}</ipxact:addressOffset><ipxact:size>32</ipxact:size>'
+                        f'<ipxact:field><ipxact:name>ctrl</ipxact:name><ipxact:bitOffset>0</ipxact:bitOffset>'
+                        f'<ipxact:resets><ipxact:reset><ipxact:value>0x{i % 7:x}</ipxact:value></ipxact:reset>'
+                        f'</ipxact:resets><ipxact:bitWidth>16</ipxact:bitWidth><ipxact:access>read-write</ipxact:access>'
+                        f'</ipxact:field><ipxact:field><ipxact:name>status</ipxact:name><ipxact:bitOffset>16</ipxact:bitOffset>'
+                        f'<ipxact:bitWidth>16</ipxact:bitWidth><ipxact:access>read-only</ipxact:access></ipxact:field>'
+                        f'</ipxact:register>\n')
+            f.write('</ipxact:addressBlock></ipxact:memoryMap></ipxact:memoryMaps></ipxact:component>\n')
+        return path
+
+class BenchmarkSuite:
+    """Times the analyzer, generator, project persistence and report pipelines
+    
+    Fixtures are generated in a scratch directory. Every benchmark reports
+    the median, min and max of `repeat` runs plus the fixture size, so a
+    stored baseline is only compared against runs of the same size.
+    """
+    FORMAT_VERSION = 1
+    MIN_DELTA = 0.005  # seconds; smaller slowdowns are treated as noise
+    SIZES = {
+        'quick': {'wide_ports': 500, 'netlist_instances': 500, 'flat_modules': 100, 'deep_levels': 50,
+                  'ports': 8, 'log_runs': 100, 'registers': 2000},
+        'full': {'wide_ports': 4000, 'netlist_instances': 5000, 'flat_modules': 1000, 'deep_levels': 300,
+                 'ports': 16, 'log_runs': 1000, 'registers': 50000},
+    }
+    
+    def __init__(self, work_dir: str, quick: bool = False, repeat: int = 5, log=None):
+        self.work_dir = work_dir
+        self.mode = 'quick' if quick else 'full'
+        self.size = self.SIZES[self.mode]
+        self.repeat = max(1, repeat)
+        self.log = log or print
+        self._fixtures = {}
+    
+    def fixture(self, name: str, build):
+        """Builds a fixture on first use and shares it between benchmarks"""
+        if name not in self._fixtures:
+            self._fixtures[name] = build()
+        return self._fixtures[name]
+    
+    def cases(self) -> List[Tuple[str, object, Dict]]:
+        """(name, setup, fixture size) for every benchmark
         
-        # Step 1: Extract all modules
-        for file in module_files:
-            try:
-                module_info = RTLAnalyzer.extract_module_info(str(file))
-                modules[module_info.name] = module_info
-            except ValueError as e:
+        setup writes the fixtures the benchmark needs and returns the timed
+        callable, so only the selected benchmarks pay for their fixtures.
+        """
+        size = self.size
+        root = Path(self.work_dir)
+        reports = str(root / "reports")
+        modules = size['flat_modules'] + 1
+        
+        def wide():
+            return self.fixture("wide", lambda: SyntheticRTL.wide(str(root), size['wide_ports']))
+        
+        def flat():
+            return self.fixture("flat", lambda: SyntheticRTL.flat(str(root / "flat"), size['flat_modules'],
+                                                                  size['ports']))
+        
+        def logs():
+            return self.fixture("logs", lambda: SyntheticRTL.regression_logs(
+                os.path.join(reports, "logs"), size['log_runs'], ["smoke", "random", "corner"]))
+        
+        def module_wide():
+            path = wide()
+            return lambda: RTLAnalyzer.extract_module_info(path)
+        
+        def netlist():
+            path = self.fixture("netlist", lambda: SyntheticRTL.netlist(
+                str(root / "netlist"), size['netlist_instances'], size['ports']))
+            return lambda: RTLAnalyzer.extract_module_info(path)
+        
+        def hierarchy_flat():
+            path = flat()
+            return lambda: RTLAnalyzer.extract_hierarchy(path)
+        
+        def deep():
+            path = self.fixture("deep", lambda: SyntheticRTL.deep(str(root / "deep"), size['deep_levels'],
+                                                                  size['ports']))
+            return lambda: len(RTLAnalyzer.extract_hierarchy(path).instance_tree())
+        
+        def render():
+            generator = TestbenchGenerator()
+            module = RTLAnalyzer.extract_module_info(wide())
+            config = TestbenchGenerator.make_config()
+            return lambda: generator.generate(module, config, str(root / "tb"), log=lambda m: None)
+        
+        def project():
+            """Saved .vega and .vegadb copies of the flat hierarchy, plus their save/load callables"""
+            def build():
+                project_dir = flat()
+                hierarchy = RTLAnalyzer.extract_hierarchy(project_dir)
+                json_file = os.path.join(project_dir, "flat_project.vega")
+                db_file = os.path.join(project_dir, f"flat_project{ProjectDatabase.EXTENSION}")
+                metadata = {"version": TestbenchGenerator.GENERATOR_VERSION, "tool": "VEGA"}
+                
+                def save_json():
+                    with open(json_file, 'w', encoding='utf-8') as f:
+                        json.dump({"metadata": metadata,
+                                   "hierarchy": ProjectFile.hierarchy_to_dict(hierarchy, project_dir),
+                                   "config": {}}, f, indent=4)
+                
+                def load_json():
+                    with open(json_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    return ProjectFile.restore_hierarchy(data["hierarchy"], project_dir)
+                
+                def save_db():
+                    ProjectDatabase.save(db_file, ProjectFile.hierarchy_to_dict(hierarchy, project_dir), {}, metadata)
+                
+                def load_db():
+                    database = ProjectDatabase(db_file)
+                    try:
+                        loaded, _ = database.load_hierarchy(project_dir)
+                        return len(loaded.instance_tree())
+                    finally:
+                        database.close()
+                
+                save_json()
+                save_db()
+                return {"save_json": save_json, "load_json": load_json, "save_db": save_db, "load_db": load_db}
+            return self.fixture("project", build)
+        
+        def report():
+            logs()
+            service = VegaService(max_jobs=1)
+            job = ServiceJob("bench", "report")
+            return lambda: service.report({'output': reports, 'simulator': 'stub'}, job)
+        
+        def triage():
+            path = logs()
+            return lambda: FailureTriage(StubBackend()).scan(path)
+        
+        def registers():
+            spec = SyntheticRTL.ipxact(str(root / "registers.xml"), size['registers'])
+            return lambda: RegisterSpecImporter.load(spec)
+        
+        return [
+            ("analyzer.module_wide", module_wide, {'ports': size['wide_ports']}),
+            ("analyzer.module_netlist", netlist,
+             {'instances': size['netlist_instances'], 'ports': size['ports']}),
+            ("analyzer.hierarchy_flat", hierarchy_flat, {'modules': modules, 'ports': size['ports']}),
+            ("analyzer.hierarchy_deep", deep, {'levels': size['deep_levels'], 'ports': size['ports']}),
+            ("generator.render", render, {'ports': size['wide_ports']}),
+            ("project.save_json", lambda: project()["save_json"], {'modules': modules}),
+            ("project.load_json", lambda: project()["load_json"], {'modules': modules}),
+            ("project.save_db", lambda: project()["save_db"], {'modules': modules}),
+            ("project.load_db", lambda: project()["load_db"], {'modules': modules}),
+            ("report.aggregate", report, {'logs': size['log_runs']}),
+            ("report.triage", triage, {'logs': size['log_runs']}),
+            ("registers.import_ipxact", registers, {'registers': size['registers']}),
+        ]
+    
+    def run(self, only: Optional[str] = None) -> Dict:
+        """Runs the benchmarks whose name contains only (all by default)"""
+        results = {}
+        for name, setup, case_size in self.cases():
+            if only and only not in name:
                 continue
-        
-        # Step 2: Identify top-level (module not instantiated by others)
-        top_level_candidates = set(modules.keys())
-        for module in modules.values():
-            for instance in module.instances.values():
-                if instance in top_level_candidates:
-                    top_level_candidates.remove(instance)
-        
-        if not top_level_candidates:
-            raise ValueError("Could not identify top-level module")
-        
-        top_level_name = next(iter(top_level_candidates))
-        top_level = modules[top_level_name]
-        
-        # Step 3: Map hierarchical connections
-        connections = []
-        for module in modules.values():
-            for port in module.ports:
-                if port.connected_to:
-                    src_mod, src_port = port.connected_to.split('.')
-                    connections.append((module.name, port.name, src_mod, src_port))
-        
-        # Step 4: Create file mapping
-        file_mapping = {mod.name: str(file) for file, mod in zip(module_files, modules.values())}
-        
-        # Step 5: Filter submodules (all except top-level)
-        submodules = {name: mod for name, mod in modules.items() if name != top_level_name}
-        
-        return ModuleHierarchy(
-            top_level=top_level,
-            submodules=submodules,
-            connections=connections,
-            file_mapping=file_mapping
-        )
+            func = setup()
+            func()  # warm-up, also checks the fixture before timing
+            timings = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            results[name] = {
+                'median': statistics.median(timings),
+                'min': min(timings),
+                'max': max(timings),
+                'size': case_size,
+            }
+            self.log(f"{name:<28} {results[name]['median'] * 1000:10.2f} ms")
+        return {
+            'format_version': self.FORMAT_VERSION,
+            'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'mode': self.mode,
+            'repeat': self.repeat,
+            'benchmarks': results,
+        }
+    
+    @classmethod
+    def compare(cls, results: Dict, baseline: Dict, threshold: float = 0.25) -> List[Dict]:
+        """One row per benchmark; status is 'regression' when the median grew by more than threshold"""
+        rows = []
+        for name, current in results['benchmarks'].items():
+            saved = baseline.get('benchmarks', {}).get(name)
+            row = {'name': name, 'median': current['median'], 'baseline': None, 'ratio': None, 'status': 'new'}
+            if saved is not None and saved.get('size') != current['size']:
+                row['status'] = 'size changed'
+            elif saved is not None:
+                ratio = current['median'] / saved['median'] if saved['median'] else float('inf')
+                row.update(baseline=saved['median'], ratio=ratio)
+                slower = current['median'] - saved['median'] > cls.MIN_DELTA
+                if ratio > 1 + threshold and slower:
+                    row['status'] = 'regression'
+                elif ratio < 1 - threshold and not slower:
+                    row['status'] = 'improved'
+                else:
+                    row['status'] = 'ok'
+            rows.append(row)
+        return rows
 
 #---------------------------------------------------------------
 # Main Application
@@ -467,10 +5355,20 @@ class UVMAutoGenerator:
         self.dark_mode = tk.BooleanVar(value=False)
         self.module_info = None
         self.module_hierarchy = None
+        self.graph_layout = None  # {"key": graph digest, "positions": {module: (x, y)}}
         self.generated_files = []
         self.test_results = []
+        self.failure_triage = None  # FailureTriage.report() of the last triaged regression
+        self._triage_items = {}  # Failure Signatures tree item -> representative run
         self.system_test_config = SystemTestConfig()
         self.sim_controller = None
+        self.watch_enabled = tk.BooleanVar(value=False)
+        self.watcher = None
+        self.export_running = False
+        self.reproducible_export = tk.BooleanVar(value=False)
+        self.trace_enabled = tk.BooleanVar(value=TRACER.enabled)
+        self.trace_profiler = tk.StringVar(value=TRACER.profiler_name or "none")
+        self.simulator = tk.StringVar(value="auto")
         self.simulation_running = False
         self.compilation_done = False
 
@@ -479,11 +5377,18 @@ class UVMAutoGenerator:
             'num_tests': tk.IntVar(value=100),
             'include_coverage': tk.BooleanVar(value=True),
             'include_scoreboard': tk.BooleanVar(value=True),
+            'include_assertions': tk.BooleanVar(value=True),
+            'register_spec': tk.StringVar(value=""),
             'clock_period': tk.StringVar(value="10ns"),
             'reset_active_low': tk.BooleanVar(value=False),
             'test_scenarios': tk.StringVar(value="smoke,random,corner"),
             'enable_reporting': tk.BooleanVar(value=True),
-            'enable_statistics': tk.BooleanVar(value=True)
+            'enable_statistics': tk.BooleanVar(value=True),
+            'scoreboard_ordering': tk.StringVar(value="in_order"),
+            'scoreboard_max_outstanding': tk.IntVar(value=1024),
+            'reference_model': tk.StringVar(value="sv"),
+            'include_dirs': tk.StringVar(value=""),
+            'defines': tk.StringVar(value="")
         }
         
         self.scenario_vars = {
@@ -629,7 +5534,7 @@ class UVMAutoGenerator:
             
             // Connect agents to scoreboard
             {% for mod in hierarchy.submodules.values() %}
-            {mod.name}_agent.monitor.analysis_port.connect(scoreboard.{mod.name}_export);
+            {mod.name}_agent.monitor.mon_ap.connect(scoreboard.{mod.name}_export);
             {% endfor %}
         endfunction
     endclass
@@ -696,6 +5601,20 @@ class UVMAutoGenerator:
         self.hierarchy_tree.heading("ports", text="Ports")
         self.hierarchy_tree.heading("file", text="File")
         
+        # Children are inserted only when a node is expanded
+        self.hierarchy_tree.bind('<<TreeviewOpen>>', self.on_hierarchy_open)
+        self._node_modules = {}  # Tree item -> module name
+        self._hierarchy_index = None
+        self._search_job = None
+        
+        # Search bar (prefix search over a sorted name index instead of walking the tree)
+        search_frame = ttk.Frame(tab)
+        search_frame.pack(fill='x', padx=10, before=tree_frame)
+        ttk.Label(search_frame, text="Filter:").pack(side='left')
+        self.hierarchy_search = tk.StringVar()
+        self.hierarchy_search.trace_add('write', lambda *args: self._schedule_hierarchy_search())
+        ttk.Entry(search_frame, textvariable=self.hierarchy_search, width=40).pack(side='left', padx=5)
+        
         # Action buttons
         btn_frame = ttk.Frame(tab)
         btn_frame.pack(fill='x', padx=10, pady=5)
@@ -729,13 +5648,32 @@ class UVMAutoGenerator:
                     command=lambda: setattr(self.system_test_config, 'generate_cross_coverage', 
                                             not self.system_test_config.generate_cross_coverage)).pack(anchor='w')
         
+    def format_clock_periods(self):
+        """Clock periods as shown in the configuration entry"""
+        periods = [f"{name}={period:g}" for name, period in self.system_test_config.clock_periods.items()]
+        return "; ".join([f"default={self.system_test_config.default_clock_period:g}"] + periods)
+    
+    def parse_clock_periods(self):
+        """Reads the clock period entry; malformed or non-positive items are ignored"""
+        periods = {}
+        for item in re.split(r'[;,]', self.clock_periods_var.get()):
+            name, _, value = item.partition('=')
+            try:
+                period = float(value)
+            except ValueError:
+                continue
+            if name.strip() and period > 0:
+                periods[name.strip()] = period
+        self.system_test_config.default_clock_period = periods.pop('default', 10.0)
+        self.system_test_config.clock_periods = periods
+    
     def load_project(self):
         """Loads a complete project"""
         # First ask to select the main project file
         project_file = filedialog.askopenfilename(
             title="Select Project File",
             filetypes=[
-                ("VEGA Project Files", "*.vega"),
+                ("VEGA Project Files", f"*.vega *{ProjectDatabase.EXTENSION}"),
                 ("SystemVerilog Files", "*.sv"),
                 ("Verilog Files", "*.v"),
                 ("All Files", "*.*")
@@ -746,96 +5684,294 @@ class UVMAutoGenerator:
             return
         
         try:
+            # Compact project: show the top level now, read submodules on demand
+            if ProjectDatabase.is_database(project_file):
+                project_dir = os.path.dirname(os.path.abspath(project_file))
+                database = ProjectDatabase(project_file)
+                self.apply_project_config(database.load_config())
+                self.module_hierarchy, reparsed = database.load_hierarchy(
+                    project_dir, self.make_preprocessor(database.source_root(project_dir))
+                )
+                self.graph_layout = database.load_layout()
+                self.update_hierarchy_view()
+                messagebox.showinfo("Success", f"Project loaded successfully!\nTop-level: {self.module_hierarchy.top_level.name}"
+                                    f"\nRe-analyzed files: {len(reparsed)}")
+            
             # If it's a .vega file (saved project)
-            if project_file.endswith('.vega'):
-                with open(project_file, 'r') as f:
+            elif project_file.endswith('.vega'):
+                with open(project_file, 'r', encoding='utf-8') as f:
                     project_data = json.load(f)
                 
-                # Load project data
-                project_dir = os.path.dirname(project_file)
-                self.module_hierarchy = RTLAnalyzer.extract_hierarchy(project_dir)
+                # Restore the saved hierarchy, re-parsing only changed sources
+                project_dir = os.path.dirname(os.path.abspath(project_file))
+                root = ProjectFile.source_root(project_data["hierarchy"], project_dir)
+                self.apply_project_config(project_data.get("config", {}))
+                self.module_hierarchy, reparsed = ProjectFile.restore_hierarchy(
+                    project_data["hierarchy"], project_dir, self.make_preprocessor(root)
+                )
+                self.graph_layout = project_data.get("graph_layout")
                 self.update_hierarchy_view()
-                messagebox.showinfo("Success", f"Project loaded successfully!\nTop-level: {self.module_hierarchy.top_level.name}")
+                messagebox.showinfo("Success", f"Project loaded successfully!\nTop-level: {self.module_hierarchy.top_level.name}"
+                                    f"\nRe-analyzed files: {len(reparsed)}")
             
             # If it's an individual RTL file
             elif project_file.endswith(('.sv', '.v')):
                 project_dir = os.path.dirname(project_file)
-                self.module_hierarchy = RTLAnalyzer.extract_hierarchy(project_dir)
+                self.module_hierarchy = RTLAnalyzer.extract_hierarchy(
+                    project_dir, self.make_preprocessor(project_dir)
+                )
                 self.update_hierarchy_view()
                 messagebox.showinfo("Success", f"RTL file analyzed successfully!\nTop-level: {self.module_hierarchy.top_level.name}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load project: {str(e)}")
         
+    def make_preprocessor(self, base_dir):
+        """Creates a preprocessor from the include directory and define settings"""
+        include_dirs = [base_dir] + [
+            os.path.join(base_dir, d.strip())
+            for d in self.custom_config['include_dirs'].get().split(';') if d.strip()
+        ]
+        defines = SVPreprocessor.parse_define_args(self.custom_config['defines'].get().split())
+        return SVPreprocessor(include_dirs, defines)
+    
+    def apply_project_config(self, config):
+        """Restores saved system test and custom configuration"""
+        for key, value in config.get("system_test", {}).items():
+            if hasattr(self.system_test_config, key):
+                setattr(self.system_test_config, key, value)
+        if hasattr(self, 'clock_periods_var'):
+            self.clock_periods_var.set(self.format_clock_periods())
+        
+        for key, value in config.get("custom_config", {}).items():
+            var = self.custom_config.get(key)
+            if var is not None and hasattr(var, 'set'):
+                try:
+                    var.set(value)
+                except tk.TclError:
+                    pass
+    
+    PLACEHOLDER = "#placeholder"
+    MAX_SEARCH_RESULTS = 500
+    
     def update_hierarchy_view(self):
-        """Updates the hierarchy view"""
+        """Updates the hierarchy view (top level only; deeper levels load on expand)
+        
+        The filter's name index is built in the background from a snapshot
+        taken here, so the worker shares no module cache or database
+        connection with the Tk thread.
+        """
+        self._hierarchy_index = None
+        self._show_hierarchy_root()
+        hierarchy = self.module_hierarchy
+        if not hierarchy:
+            return
+        top = hierarchy.top_level
+        submodules = hierarchy.submodules
+        if isinstance(submodules, LazyModuleDict):
+            database_path, submodules = submodules.path, list(submodules)
+        else:
+            database_path, submodules = None, dict(submodules)
+        
+        def worker():
+            database = None
+            try:
+                database = ProjectDatabase(database_path) if database_path else None
+                snapshot = ModuleHierarchy(
+                    top_level=top,
+                    submodules=LazyModuleDict(database, submodules) if database else submodules,
+                    connections=[],
+                    file_mapping={}
+                )
+                index, error = self._build_hierarchy_index(snapshot)
+            except (sqlite3.Error, ValueError) as e:
+                index, error = [], str(e)
+            finally:
+                if database:
+                    database.close()
+            self.root.after(0, lambda: self._hierarchy_index_ready(hierarchy, index, error))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _hierarchy_index_ready(self, hierarchy, index, error):
+        if hierarchy is not self.module_hierarchy:
+            return  # a newer project was loaded meanwhile
+        self._hierarchy_index = index
+        if error:
+            messagebox.showwarning("Warning", f"Instance paths not indexed: {error}")
+        if self.hierarchy_search.get().strip():
+            self.apply_hierarchy_filter()
+    
+    def _show_hierarchy_root(self):
         self.hierarchy_tree.delete(*self.hierarchy_tree.get_children())
+        self._node_modules = {}
+        
+        if not self.module_hierarchy:
+            return
+        
+        top = self.module_hierarchy.top_level
+        self.hierarchy_tree.insert("", "end", iid=top.name, text=top.name, open=False,
+                                   values=("Top-Level", len(top.ports),
+                                           self.module_hierarchy.file_mapping.get(top.name, "")))
+        self._node_modules[top.name] = top.name
+        self._add_placeholder(top.name)
+    
+    def _find_module(self, name):
+        """Returns the top-level or submodule with the given name, if known"""
+        if name == self.module_hierarchy.top_level.name:
+            return self.module_hierarchy.top_level
+        return self.module_hierarchy.submodules.get(name)
+    
+    def _module_port_count(self, name):
+        submodules = self.module_hierarchy.submodules
+        if name != self.module_hierarchy.top_level.name and hasattr(submodules, 'port_count'):
+            return submodules.port_count(name)
+        return len(self._find_module(name).ports)
+    
+    def _add_placeholder(self, iid):
+        self.hierarchy_tree.insert(iid, "end", iid=iid + self.PLACEHOLDER, text="…")
+    
+    def on_hierarchy_open(self, event=None):
+        """Populates a node's children the first time it is expanded"""
+        iid = self.hierarchy_tree.focus()
+        placeholder = iid + self.PLACEHOLDER
+        if not self.hierarchy_tree.exists(placeholder):
+            return
+        self.hierarchy_tree.delete(placeholder)
+        
+        module_name = self._node_modules[iid]
+        if iid.endswith("#ports"):
+            # Port group: insert the module's ports
+            module = self._find_module(module_name)
+            for port in module.ports:
+                conn = f" → {port.connected_to}" if port.connected_to else ""
+                self.hierarchy_tree.insert(iid, "end", iid=f"{iid}:{port.name}", text=port.name,
+                                           values=(port.direction, port.width, conn))
+            return
+        
+        # Instance/top node: ports group plus one node per known submodule instance
+        port_count = self._module_port_count(module_name)
+        if port_count:
+            ports_iid = f"{iid}#ports"
+            self.hierarchy_tree.insert(iid, "end", iid=ports_iid, text=f"Ports ({port_count})",
+                                       values=("Ports", port_count, ""))
+            self._node_modules[ports_iid] = module_name
+            self._add_placeholder(ports_iid)
+        
+        for inst_name, sub_name in self.module_hierarchy.instance_tree().children(module_name).items():
+            child = f"{iid}.{inst_name}"
+            self.hierarchy_tree.insert(iid, "end", iid=child, text=f"{inst_name} ({sub_name})",
+                                       values=("Submodule", self._module_port_count(sub_name),
+                                               self.module_hierarchy.file_mapping.get(sub_name, "")))
+            self._node_modules[child] = sub_name
+            self._add_placeholder(child)
+    
+    @staticmethod
+    def _build_hierarchy_index(hierarchy: ModuleHierarchy) -> Tuple[List[Tuple[str, str, str]], Optional[str]]:
+        """Sorted (key, label, module name) entries for modules, ports and instance paths
+        
+        Dotted names are also keyed from each segment, so a prefix search finds
+        ports and instances by their own name. Returns the index and any error
+        that kept instance paths out of it.
+        """
+        index = []
         
+        def add(name, label, module_name):
+            parts = name.lower().split('.')
+            for i in range(len(parts)):
+                index.append(('.'.join(parts[i:]), label, module_name))
+        
+        top = hierarchy.top_level
+        for name in [top.name] + list(hierarchy.submodules):
+            module = top if name == top.name else hierarchy.submodules[name]
+            add(name, f"module {name}", name)
+            for port in module.ports:
+                add(f"{name}.{port.name}", f"port {name}.{port.name}", name)
+        error = None
+        try:
+            for path, name in hierarchy.instance_tree().index().items():
+                if '.' in path:
+                    add(path, f"instance {path} ({name})", name)
+        except ValueError as e:
+            error = str(e)
+        index.sort()
+        return index, error
+    
+    def _schedule_hierarchy_search(self):
+        """Debounces filter input"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(200, self.apply_hierarchy_filter)
+    
+    def apply_hierarchy_filter(self):
+        """Shows index matches for the filter text, or the lazy tree when empty"""
+        self._search_job = None
         if not self.module_hierarchy:
             return
         
-        # Add top-level
-        top = self.module_hierarchy.top_level
-        top_id = self.hierarchy_tree.insert("", "end", text=top.name, 
-                                        values=("Top-Level", len(top.ports), 
-                                                self.module_hierarchy.file_mapping.get(top.name, "")))
-        
-        # Add submodules
-        for inst_name, module_name in top.instances.items():
-            if module_name in self.module_hierarchy.submodules:
-                mod = self.module_hierarchy.submodules[module_name]
-                mod_id = self.hierarchy_tree.insert(top_id, "end", text=f"{inst_name} ({module_name})",
-                                                values=("Submodule", len(mod.ports),
-                                                        self.module_hierarchy.file_mapping.get(module_name, "")))
-                
-                # Add ports with connections
-                for port in mod.ports:
-                    conn = f" → {port.connected_to}" if port.connected_to else ""
-                    self.hierarchy_tree.insert(mod_id, "end", text=port.name,
-                                            values=(port.direction, port.width, conn))
+        query = self.hierarchy_search.get().strip().lower()
+        if not query:
+            self._show_hierarchy_root()
+            return
+        
+        self.hierarchy_tree.delete(*self.hierarchy_tree.get_children())
+        self._node_modules = {}
+        if self._hierarchy_index is None:
+            self.hierarchy_tree.insert("", "end", text="Indexing names…")
+            return  # _hierarchy_index_ready() re-applies the filter
+        
+        # Entries sharing the prefix are contiguous in the sorted index
+        index = self._hierarchy_index
+        matches, seen = [], set()
+        for i in range(bisect.bisect_left(index, (query,)), len(index)):
+            key, label, module_name = index[i]
+            if not key.startswith(query):
+                break
+            if label not in seen:
+                seen.add(label)
+                matches.append((key, label, module_name))
+        
+        for key, label, module_name in matches[:self.MAX_SEARCH_RESULTS]:
+            self.hierarchy_tree.insert("", "end", text=label,
+                                       values=("Match", "", self.module_hierarchy.file_mapping.get(module_name, "")))
+        if len(matches) > self.MAX_SEARCH_RESULTS:
+            self.hierarchy_tree.insert("", "end", text=f"… {len(matches) - self.MAX_SEARCH_RESULTS} more matches")
     
     def show_connections(self):
-        """Shows a diagram of connections between modules"""
+        """Shows the module connection graph (layout computed in the background and cached)"""
         if not self.module_hierarchy:
             messagebox.showwarning("Warning", "No project loaded")
             return
         
         conn_window = tk.Toplevel(self.root)
         conn_window.title("Module Connections")
+        conn_window.geometry("1000x700")
+        
+        status = ttk.Label(conn_window, anchor='w')
+        status.pack(side='bottom', fill='x')
+        view = ConnectionGraphView(conn_window, status)
+        view.show_message("Computing layout...")
+        
+        hierarchy = self.module_hierarchy
+        cached = self.graph_layout
+        
+        def worker():
+            # Only reads the cached layout taken above; self.graph_layout is assigned on the Tk thread
+            graph = ConnectionGraph(hierarchy)
+            key = graph.key()
+            if cached and cached.get("key") == key:
+                positions = {name: tuple(pos) for name, pos in cached["positions"].items()}
+            else:
+                positions = graph.compute_layout()
+            self.root.after(0, lambda: self._connection_layout_ready(hierarchy, graph, key, positions, view, conn_window))
         
-        canvas = tk.Canvas(conn_window, width=800, height=600, bg='white')
-        canvas.pack(fill='both', expand=True)
-        
-        # Position modules
-        module_pos = {}
-        center_x, center_y = 400, 300
-        radius = 200
-        angle = 0
-        angle_step = 360 / (len(self.module_hierarchy.submodules) + 1)
-        
-        # Top-level in center
-        canvas.create_oval(center_x-50, center_y-50, center_x+50, center_y+50, fill='lightblue')
-        canvas.create_text(center_x, center_y, text=self.module_hierarchy.top_level.name)
-        module_pos[self.module_hierarchy.top_level.name] = (center_x, center_y)
-        
-        # Submodules in circle
-        for mod_name in self.module_hierarchy.submodules:
-            angle += angle_step
-            rad = angle * (3.141592653589793 / 180)
-            x = center_x + radius * math.cos(rad)
-            y = center_y + radius * math.sin(rad)
-            
-            canvas.create_oval(x-40, y-40, x+40, y+40, fill='lightgreen')
-            canvas.create_text(x, y, text=mod_name)
-            module_pos[mod_name] = (x, y)
-        
-        # Draw connections
-        for conn in self.module_hierarchy.connections:
-            src_mod, src_port, dest_mod, dest_port = conn
-            if src_mod in module_pos and dest_mod in module_pos:
-                x1, y1 = module_pos[src_mod]
-                x2, y2 = module_pos[dest_mod]
-                canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, fill='gray')
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _connection_layout_ready(self, hierarchy, graph, key, positions, view, conn_window):
+        if hierarchy is self.module_hierarchy:
+            self.graph_layout = {"key": key, "positions": positions}
+        if conn_window.winfo_exists():
+            view.set_graph(graph, positions)
 
     def setup_menu(self):
         """Creates the menu bar"""
@@ -1151,6 +6287,13 @@ class UVMAutoGenerator:
         )
         analyze_button.pack(pady=10)
         
+        ttk.Checkbutton(
+            file_frame,
+            text="👁 Watch for changes (re-analyze and regenerate automatically)",
+            variable=self.watch_enabled,
+            command=self.toggle_watch
+        ).pack(anchor='w')
+        
         results_frame = ttk.LabelFrame(main_frame, text="Module Analysis Results", padding=15)
         results_frame.pack(fill='both', expand=True)
         
@@ -1213,6 +6356,34 @@ class UVMAutoGenerator:
             width=15
         ).grid(row=1, column=1, sticky='w', pady=5)
         
+        # Row 2: System clock domains, e.g. "default=10; clk_core=2.5; clk_io=8"
+        ttk.Label(general_frame, text="Domain Clock Periods (ns):").grid(row=2, column=0, sticky='w', padx=(0, 10), pady=5)
+        self.clock_periods_var = tk.StringVar(value=self.format_clock_periods())
+        self.clock_periods_var.trace_add('write', lambda *args: self.parse_clock_periods())
+        ttk.Entry(
+            general_frame,
+            textvariable=self.clock_periods_var,
+            width=40
+        ).grid(row=2, column=1, sticky='w', pady=5)
+        
+        # Preprocessor section
+        preproc_frame = ttk.LabelFrame(main_frame, text="RTL Preprocessor", padding=15)
+        preproc_frame.pack(fill='x', pady=(0, 15))
+        
+        ttk.Label(preproc_frame, text="Include Dirs (; separated):").grid(row=0, column=0, sticky='w', padx=(0, 10), pady=5)
+        ttk.Entry(
+            preproc_frame,
+            textvariable=self.custom_config['include_dirs'],
+            width=50
+        ).grid(row=0, column=1, sticky='w', pady=5)
+        
+        ttk.Label(preproc_frame, text="Defines (+define+A+B=1 or A B=1):").grid(row=1, column=0, sticky='w', padx=(0, 10), pady=5)
+        ttk.Entry(
+            preproc_frame,
+            textvariable=self.custom_config['defines'],
+            width=50
+        ).grid(row=1, column=1, sticky='w', pady=5)
+        
         # Reset Configuration section
         reset_frame = ttk.LabelFrame(main_frame, text="Reset Configuration", padding=15)
         reset_frame.pack(fill='x', pady=(0, 15))
@@ -1268,6 +6439,55 @@ class UVMAutoGenerator:
             variable=self.custom_config['include_scoreboard']
         ).pack(anchor='w', pady=2)
         
+        ttk.Checkbutton(
+            components_frame,
+            text="Include SVA Protocol Assertions (bind)",
+            variable=self.custom_config['include_assertions']
+        ).pack(anchor='w', pady=2)
+        
+        # Register model from a CSV/IP-XACT spec (empty: no register model)
+        reg_frame = ttk.Frame(components_frame)
+        reg_frame.pack(anchor='w', pady=2)
+        
+        ttk.Label(reg_frame, text="Register Spec (CSV/IP-XACT):").grid(row=0, column=0, sticky='w', padx=(0, 10), pady=2)
+        ttk.Entry(
+            reg_frame,
+            textvariable=self.custom_config['register_spec'],
+            width=40
+        ).grid(row=0, column=1, sticky='w', pady=2)
+        ttk.Button(reg_frame, text="Browse...", command=self.browse_register_spec).grid(row=0, column=2, padx=(5, 0), pady=2)
+        
+        # Scoreboard matching engine
+        sb_frame = ttk.Frame(components_frame)
+        sb_frame.pack(anchor='w', pady=2)
+        
+        ttk.Label(sb_frame, text="Scoreboard Matching:").grid(row=0, column=0, sticky='w', padx=(0, 10), pady=2)
+        ttk.Combobox(
+            sb_frame,
+            textvariable=self.custom_config['scoreboard_ordering'],
+            values=['in_order', 'out_of_order'],
+            state='readonly',
+            width=15
+        ).grid(row=0, column=1, sticky='w', pady=2)
+        
+        ttk.Label(sb_frame, text="Max Outstanding:").grid(row=1, column=0, sticky='w', padx=(0, 10), pady=2)
+        ttk.Spinbox(
+            sb_frame,
+            from_=1,
+            to=1000000,
+            textvariable=self.custom_config['scoreboard_max_outstanding'],
+            width=15
+        ).grid(row=1, column=1, sticky='w', pady=2)
+        
+        ttk.Label(sb_frame, text="Reference Model:").grid(row=2, column=0, sticky='w', padx=(0, 10), pady=2)
+        ttk.Combobox(
+            sb_frame,
+            textvariable=self.custom_config['reference_model'],
+            values=['sv', 'dpi'],
+            state='readonly',
+            width=15
+        ).grid(row=2, column=1, sticky='w', pady=2)
+        
         # Reporting Options section
         reporting_frame = ttk.LabelFrame(main_frame, text="Reporting Options", padding=15)
         reporting_frame.pack(fill='x', pady=(0, 15))
@@ -1484,6 +6704,12 @@ class UVMAutoGenerator:
         )
         print_report_button.pack(side='left', padx=(0, 10))
         
+        ttk.Button(
+            button_frame,
+            text="🔍 Triage Regression Logs",
+            command=self.triage_regression_logs
+        ).pack(side='left', padx=(0, 10))
+        
         # Results display area
         results_frame = ttk.LabelFrame(main_frame, text="Test Results", padding=15)
         results_frame.pack(fill='both', expand=True)
@@ -1507,10 +6733,183 @@ class UVMAutoGenerator:
         self.canvas = FigureCanvasTkAgg(self.figure, master=graph_frame)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
         
+        # Failing runs clustered by first-error signature
+        triage_frame = ttk.LabelFrame(main_frame, text="Failure Signatures", padding=10)
+        triage_frame.pack(fill='x', pady=(15, 0))
+        
+        ttk.Button(
+            triage_frame,
+            text="🌊 Re-run Selected with Waves",
+            command=self.rerun_failure_with_waves
+        ).pack(anchor='w', pady=(0, 5))
+        
+        columns = ('runs', 'scenarios', 'seed')
+        self.triage_tree = ttk.Treeview(triage_frame, columns=columns, height=6)
+        self.triage_tree.heading('#0', text='Signature')
+        for column, heading, width in zip(columns, ('Runs', 'Scenarios', 'Reproduce'), (60, 180, 140)):
+            self.triage_tree.heading(column, text=heading)
+            self.triage_tree.column(column, width=width, anchor='e' if column == 'runs' else 'w')
+        self.triage_tree.column('#0', width=480)
+        self.triage_tree.pack(fill='x')
+        
+        # Pipeline profile (timing spans recorded by TRACER)
+        profile_frame = ttk.LabelFrame(main_frame, text="Pipeline Profile", padding=10)
+        profile_frame.pack(fill='x', pady=(15, 0))
+        
+        profile_controls = ttk.Frame(profile_frame)
+        profile_controls.pack(fill='x', pady=(0, 5))
+        ttk.Checkbutton(
+            profile_controls,
+            text="Record trace",
+            variable=self.trace_enabled,
+            command=self.toggle_tracing
+        ).pack(side='left', padx=(0, 10))
+        ttk.Label(profile_controls, text="Profiler:").pack(side='left')
+        ttk.Combobox(
+            profile_controls,
+            textvariable=self.trace_profiler,
+            values=["none"] + list(Tracer.PROFILERS),
+            state='readonly',
+            width=12
+        ).pack(side='left', padx=(5, 10))
+        ttk.Button(profile_controls, text="🔄 Refresh", command=self.refresh_profile_summary).pack(side='left', padx=(0, 10))
+        ttk.Button(profile_controls, text="💾 Save Trace", command=self.save_trace).pack(side='left')
+        
+        columns = ('calls', 'total', 'mean', 'max')
+        self.profile_tree = ttk.Treeview(profile_frame, columns=columns, height=8)
+        self.profile_tree.heading('#0', text='Stage')
+        for column, heading in zip(columns, ('Calls', 'Total (ms)', 'Mean (ms)', 'Max (ms)')):
+            self.profile_tree.heading(column, text=heading)
+            self.profile_tree.column(column, width=90, anchor='e')
+        self.profile_tree.pack(fill='x')
+        
         # Status label
         self.report_status = ttk.Label(main_frame, text="No test results available", foreground='gray')
         self.report_status.pack(anchor='w', pady=(10, 0))
     
+    def triage_regression_logs(self):
+        """Clusters the failing runs of a regression log directory in the background"""
+        log_dir = filedialog.askdirectory(
+            title="Select Regression Log Directory",
+            initialdir=str(Path(self.output_dir.get()) / "logs")
+        )
+        if not log_dir:
+            return
+        
+        backend = get_simulator_backend(self.simulator.get())
+        self.report_status.config(text=f"Triaging logs in {log_dir}...", foreground='gray')
+        
+        def execute():
+            try:
+                report = FailureTriage(backend).scan(log_dir).report()
+                self.root.after(0, self.show_failure_triage, report)
+            except Exception as e:
+                message = str(e)
+                self.root.after(0, lambda: messagebox.showerror("Triage Error", f"Failed to triage logs: {message}"))
+        
+        threading.Thread(target=execute, daemon=True).start()
+    
+    def show_failure_triage(self, report):
+        """Shows triaged clusters; scenarios without results take their pass/fail counts"""
+        self.failure_triage = report
+        self.triage_tree.delete(*self.triage_tree.get_children())
+        self._triage_items = {}
+        for cluster in report['clusters']:
+            representative = cluster['representative']
+            item = self.triage_tree.insert('', 'end', text=cluster['signature'], values=(
+                cluster['count'],
+                ", ".join(f"{name} {count}" for name, count in cluster['scenarios'].items()),
+                f"{representative['scenario']} seed {representative['seed']}"
+            ))
+            detail = self.triage_tree.insert(item, 'end', text=representative['message'],
+                                             values=("", "", f"{Path(representative['log']).name}:{representative['line']}"))
+            self._triage_items[item] = self._triage_items[detail] = representative
+        
+        known = {r.scenario for r in self.test_results}
+        for scenario, counts in report['scenarios'].items():
+            if scenario not in known:
+                self.test_results.append(TestResult(scenario=scenario, passed=counts['passed'], failed=counts['failed']))
+        self.generate_test_report()
+        self.report_status.config(
+            text=f"✓ {report['failed']} of {report['runs']} runs failed, {len(report['clusters'])} signature(s)",
+            foreground='green' if not report['failed'] else 'orange'
+        )
+    
+    def rerun_failure_with_waves(self):
+        """Re-runs the representative seed of the selected signature with a dump around its failure"""
+        selection = self.triage_tree.selection() if self.failure_triage else ()
+        representative = self._triage_items.get(selection[0]) if selection else None
+        if representative is None:
+            messagebox.showerror("Error", "Select a failure signature first")
+            return
+        if not self.sim_controller or not self.compilation_done:
+            messagebox.showerror("Error", "Compile the project first")
+            return
+        
+        def execute():
+            result = self.sim_controller.rerun_with_waves(
+                representative['scenario'], representative['seed'], window=representative['time'],
+                callback=lambda message: self.root.after(0, self.append_to_console, message),
+                plusargs={'UVM_TESTNAME': self.get_uvm_testname()}
+            )
+            if result:
+                self.root.after(0, lambda: messagebox.showinfo(
+                    "Waveform", f"Waveform written to:\n{result['dump']}\nLog: {result['log']}"))
+        
+        threading.Thread(target=execute, daemon=True).start()
+    
+    def toggle_tracing(self):
+        """Starts or stops recording pipeline spans"""
+        if self.trace_enabled.get():
+            profiler = self.trace_profiler.get()
+            try:
+                TRACER.start(None if profiler == "none" else profiler)
+            except RuntimeError as e:
+                self.trace_enabled.set(False)
+                messagebox.showerror("Profiler Error", str(e))
+        else:
+            TRACER.stop()
+        self.refresh_profile_summary()
+    
+    def refresh_profile_summary(self):
+        """Shows per-stage totals of the recorded spans, plus the top profiled functions"""
+        self.profile_tree.delete(*self.profile_tree.get_children())
+        for entry in TRACER.summary():
+            self.profile_tree.insert('', 'end', text=entry['name'], values=(
+                entry['count'], f"{entry['total'] * 1000:.2f}", f"{entry['mean'] * 1000:.3f}",
+                f"{entry['max'] * 1000:.2f}"
+            ))
+        functions = TRACER.profile_summary()
+        if functions:
+            parent = self.profile_tree.insert('', 'end', text="cProfile: top functions (cumulative)", open=False)
+            for name, calls, own, cumulative in functions:
+                self.profile_tree.insert(parent, 'end', text=name, values=(
+                    calls, f"{cumulative * 1000:.2f}", f"{cumulative / calls * 1000:.3f}" if calls else "-",
+                    f"{own * 1000:.2f} own"
+                ))
+    
+    def save_trace(self):
+        """Writes the recorded spans as a Chrome trace or speedscope file (recording stops)"""
+        if not TRACER.events:
+            messagebox.showerror("Error", "No trace recorded - enable 'Record trace' and run a generation first")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save Trace",
+            defaultextension=".json",
+            filetypes=[("Chrome Trace", "*.json"), ("Speedscope", "*.speedscope.json"), ("All Files", "*.*")],
+            initialfile="vega_trace.json"
+        )
+        if not path:
+            return
+        TRACER.stop()
+        self.trace_enabled.set(False)
+        try:
+            written = TRACER.write(path)
+            self.refresh_profile_summary()
+            messagebox.showinfo("Success", "Trace saved to:\n" + "\n".join(written))
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save trace: {str(e)}")
+    
     def print_test_report(self):
         """Prints the full test report including the statistical graph"""
         if not self.test_results:
@@ -1585,7 +6984,20 @@ class UVMAutoGenerator:
             text="📦 Export as ZIP",
             command=self.export_project
         )
-        export_button.pack(side='left', padx=(0, 10))
+        export_button.pack(side='left', padx=(0, 5))
+        
+        ttk.Checkbutton(
+            action_frame,
+            text="Reproducible",
+            variable=self.reproducible_export
+        ).pack(side='left', padx=(0, 10))
+        
+        cocotb_button = ttk.Button(
+            action_frame,
+            text="🐍 Generate cocotb TB",
+            command=self.generate_cocotb_tb
+        )
+        cocotb_button.pack(side='left', padx=(0, 10))
         
         open_folder_button = ttk.Button(
             action_frame,
@@ -1618,13 +7030,9 @@ class UVMAutoGenerator:
         preview_frame = ttk.LabelFrame(preview_container, text="File Preview", padding=10)
         preview_frame.pack(side='right', fill='both', expand=True)
         
-        self.preview_text = scrolledtext.ScrolledText(
-            preview_frame,
-            font=('Consolas', 10),
-            state='disabled',
-            wrap='none'
-        )
-        self.preview_text.pack(fill='both', expand=True)
+        self.preview_view = PagedTextView(preview_frame)
+        self.preview_view.pack(fill='both', expand=True)
+        self.preview_text = self.preview_view.text
 
     def init_about_tab(self):
         """Creates the 'About' tab with software information"""
@@ -1800,6 +7208,17 @@ class UVMAutoGenerator:
                     ""
                 ])
             
+            if self.failure_triage and self.failure_triage['clusters']:
+                report_lines.append("Failure Signatures:")
+                report_lines.append("-" * 30)
+                for cluster in self.failure_triage['clusters']:
+                    representative = cluster['representative']
+                    report_lines.extend([
+                        f"[{cluster['count']} runs] {cluster['signature']}",
+                        f"  • Reproduce: {representative['scenario']} seed {representative['seed']}",
+                        ""
+                    ])
+            
             self.report_text.insert(tk.END, "\n".join(report_lines))
             self.report_text.config(state='disabled')
             
@@ -1879,6 +7298,8 @@ class UVMAutoGenerator:
                     } for r in self.test_results
                 ]
             }
+            if self.failure_triage:
+                report_data["failure_triage"] = self.failure_triage
             
             # Asks for save location
             file_path = filedialog.asksaveasfilename(
@@ -1919,6 +7340,19 @@ class UVMAutoGenerator:
             if hasattr(self, 'analysis_status') and self.analysis_status:
                 self.analysis_status.config(text="File selected - ready for analysis", foreground='blue')
 
+    def browse_register_spec(self):
+        """Opens dialog to select the register specification"""
+        path = filedialog.askopenfilename(
+            title="Select Register Specification",
+            filetypes=[
+                ("Register Specs", "*.csv *.xml *.ipxact"),
+                ("All Files", "*.*")
+            ]
+        )
+        
+        if path:
+            self.custom_config['register_spec'].set(path)
+
     def browse_output_dir(self):
         """Opens dialog to select output directory"""
         directory = filedialog.askdirectory(
@@ -1953,7 +7387,9 @@ class UVMAutoGenerator:
                 self.info_text.config(state='disabled')
             
             # Perform analysis
-            self.module_info = RTLAnalyzer.extract_module_info(dut_path)
+            self.module_info = RTLAnalyzer.extract_module_info(
+                dut_path, self.make_preprocessor(os.path.dirname(dut_path))
+            )
             
             # Display results
             self.display_module_info()
@@ -1986,6 +7422,82 @@ class UVMAutoGenerator:
             print(f"Analysis error details: {e}")
             traceback.print_exc()
 
+    def toggle_watch(self):
+        """Starts or stops watch mode for the selected DUT"""
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        if not self.watch_enabled.get():
+            self.analysis_status.config(text="Watch mode stopped", foreground='gray')
+            return
+        
+        dut_path = self.dut_path.get().strip()
+        if not dut_path or not os.path.exists(dut_path):
+            messagebox.showerror("Error", "Please select an existing RTL file first")
+            self.watch_enabled.set(False)
+            return
+        
+        # Tk variables are read here; the first generation (and the compile it
+        # may trigger) runs in a worker like the later updates
+        output_dir = self.output_dir.get()
+        config = self.generation_config()
+        preprocessor = self.make_preprocessor(os.path.dirname(dut_path))
+        controller = self.sim_controller if self.compilation_done else None
+        self.analysis_status.config(text=f"👁 Starting watch mode for {dut_path}...", foreground='gray')
+        
+        def start():
+            try:
+                session = WatchSession(
+                    dut_path, output_dir, config,
+                    preprocessor=preprocessor,
+                    controller=controller,
+                    log=lambda message: self.root.after(0, self.append_to_console, message)
+                )
+                files = session.generate_all()
+            except Exception as e:
+                self.root.after(0, self._watch_start_failed, str(e))
+                return
+            self.root.after(0, self._start_watcher, session, files)
+        
+        threading.Thread(target=start, daemon=True).start()
+    
+    def _watch_start_failed(self, error):
+        messagebox.showerror("Watch Error", f"Failed to start watch mode: {error}")
+        self.watch_enabled.set(False)
+        self.analysis_status.config(text="Watch mode stopped", foreground='gray')
+    
+    def _start_watcher(self, session, files):
+        """Shows the first generation and starts watching (runs on the UI thread)"""
+        if not self.watch_enabled.get() or self.watcher:
+            return  # stopped or restarted while generating
+        self.generated_files = files
+        self._apply_watch_result(session, None)
+        self.watcher = RTLWatcher(
+            session.watch_paths(),
+            lambda changed: self.root.after(0, self._apply_watch_result, session, session.handle(changed)),
+            ignore=[self.output_dir.get()]
+        )
+        self.watcher.start()
+    
+    def _apply_watch_result(self, session, result):
+        """Shows the outcome of a watch update (runs on the UI thread)"""
+        self.module_info = session.module_info
+        self.display_module_info()
+        for path in (result or {}).get('written', []):
+            if path not in self.generated_files:
+                self.generated_files.append(path)
+        self.update_file_list()
+        
+        if result and result['error']:
+            self.analysis_status.config(text=f"👁 Watching - analysis failed: {result['error']}", foreground='red')
+        elif result:
+            self.analysis_status.config(
+                text=f"👁 Watching - {len(result['written'])} files regenerated at {datetime.now():%H:%M:%S}",
+                foreground='green'
+            )
+        else:
+            self.analysis_status.config(text=f"👁 Watching {session.dut_path}", foreground='green')
+    
     def display_module_info(self):
         """Displays analyzed module information"""
         if not self.module_info:
@@ -2077,19 +7589,13 @@ class UVMAutoGenerator:
             context = self.prepare_generation_context()
             self.generated_files = []
             
-            # Generate basic UVM files
-            self._generate_file_from_template('uvm_pkg.sv.j2', 'uvm_pkg.sv', context, output_path)
-            self._generate_file_from_template('interface.sv.j2', f"{context['module'].name}_if.sv", context, output_path)
-            self._generate_file_from_template('transaction.sv.j2', f"{context['module'].name}_transaction.sv", context, output_path)
-            self._generate_file_from_template('sequence.sv.j2', f"{context['module'].name}_sequence.sv", context, output_path)
-            self._generate_file_from_template('test.sv.j2', f"{context['module'].name}_test.sv", context, output_path)
-            
-            # Generate optional components
-            if context['config']['include_scoreboard']:
-                self._generate_file_from_template('scoreboard.sv.j2', f"{context['module'].name}_scoreboard.sv", context, output_path)
+            # Generate UVM files (basic files plus the enabled optional components)
+            for template_name, output_name in TestbenchGenerator.file_plan(context['module'].name, context['config']):
+                self._generate_file_from_template(template_name, output_name, context, output_path)
             
-            if context['config']['include_coverage']:
-                self._generate_file_from_template('coverage.sv.j2', f"{context['module'].name}_coverage.sv", context, output_path)
+            # Protocol-aware agents for the detected bus interfaces
+            for template_name, output_name, bus in TestbenchGenerator.bus_plan(context['module'].name, context['buses']):
+                self._generate_file_from_template(template_name, output_name, dict(context, bus=bus), output_path)
             
             # Generate UVM-specific compilation script
             self._generate_uvm_compile_script(context, output_path)
@@ -2102,6 +7608,10 @@ class UVMAutoGenerator:
                 
     def prepare_generation_context(self):
         """Prepares context for template generation"""
+        return TestbenchGenerator.context(self.module_info, self.generation_config())
+    
+    def generation_config(self):
+        """Current configuration and scenario settings as plain values"""
         config_dict = {}
         for key, var in self.custom_config.items():
             if hasattr(var, 'get'):
@@ -2114,22 +7624,20 @@ class UVMAutoGenerator:
         for scenario, var in self.scenario_vars.items():
             config_dict['scenarios'][scenario] = var.get()
         
-        return {
-            'module': self.module_info,
-            'config': config_dict,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'generator_version': '5.0.0'
-        }
+        return config_dict
     
     def _generate_file_from_template(self, template_name, output_name, context, output_path):
         """Generates a file from a template"""
         try:
-            template = self.template_env.get_template(template_name)
-            content = template.render(context)
+            with TRACER.span("template.compile", "generator", template=template_name):
+                template = self.template_env.get_template(template_name)
+            with TRACER.span("template.render", "generator", template=template_name):
+                content = template.render(context)
             
             output_file = output_path / output_name
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            with TRACER.span("template.write", "generator", file=output_name):
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
             
             self.generated_files.append(str(output_file))
         except TemplateNotFound as e:
@@ -2139,10 +7647,88 @@ class UVMAutoGenerator:
             messagebox.showerror("Generation Error", f"Failed to generate file: {str(e)}")
             raise
 
+    def generate_cocotb_tb(self):
+        """Generates a cocotb Python testbench with a NumPy golden model"""
+        if not self.module_info:
+            messagebox.showerror("Error", "Please analyze a module first")
+            return
+        
+        try:
+            output_path = Path(self.output_dir.get())
+            output_path.mkdir(exist_ok=True)
+            
+            context = self.prepare_generation_context()
+            datapath = self._detect_datapath_model(self.module_info)
+            context['datapath_model'] = datapath['model'] if datapath else None
+            context['datapath_ports'] = datapath
+            context['dut_source'] = str(Path(self.dut_path.get()).resolve())
+            
+            name = context['module'].name
+            self._generate_file_from_template('cocotb_test.py.j2', f"test_{name}.py", context, output_path)
+            self._generate_file_from_template('Makefile.cocotb.j2', "Makefile.cocotb", context, output_path)
+            
+            self.update_file_list()
+            if datapath:
+                messagebox.showinfo("Success", "cocotb testbench generated successfully!\n"
+                                    f"Golden model: {datapath['model']} ({datapath['op']} selects the operation)")
+            else:
+                messagebox.showinfo("Success", "cocotb testbench generated successfully!\n"
+                                    "No datapath golden model recognized: outputs are only checked for X/Z")
+        except Exception as e:
+            messagebox.showerror("Generation Error", f"Failed to generate cocotb testbench: {str(e)}")
+    
+    @staticmethod
+    def _detect_datapath_model(module_info):
+        """Recognizes ALU-style datapaths that get a built-in vectorized golden model
+        
+        Needs two operands a and b of the same known width and an opcode of at
+        least 3 bits; anything weaker (a mux with a select line) gets the stub.
+        """
+        inputs = {p.name.lower(): p for p in module_info.get_input_ports()}
+        outputs = {p.name.lower(): p for p in module_info.get_output_ports()}
+        
+        if 'a' not in inputs or 'b' not in inputs:
+            return None
+        operand_width = module_info.bit_width(inputs['a'].width)
+        op = next((p.name for name, p in inputs.items()
+                   if re.search(r'(op|opcode|ctrl|control|func)$', name)
+                   and (module_info.bit_width(p.width) or 0) >= 3), None)
+        result = next((outputs[name].name for name in ('result', 'res', 'y', 'out') if name in outputs), None)
+        
+        if not operand_width or module_info.bit_width(inputs['b'].width) != operand_width or not op or not result:
+            return None
+        return {
+            'model': 'alu',
+            'a': inputs['a'].name,
+            'b': inputs['b'].name,
+            'op': op,
+            'result': result,
+            'zero': outputs['zero'].name if 'zero' in outputs else None
+        }
+    
     def _generate_uvm_compile_script(self, context, output_path):
-        """Generates UVM-specific compilation script"""
+        """Generates a compilation script for the selected simulator"""
+        backend = get_simulator_backend(self.simulator.get(), os.environ.get('UVM_HOME'))
+        graph = SourceDependencyGraph(
+            sorted(Path(f).name for f in self.generated_files if f.endswith('.sv')), output_path
+        )
+        SourceDependencyGraph.write_filelist(output_path / "sources.f", graph.order())
+        self.generated_files.append(str(output_path / "sources.f"))
+        filelist = ['-f', 'sources.f']
+        commands = backend.compile_commands(filelist) + backend.elaborate_commands("top", sources=filelist)
+        
+        steps = "\n\n".join(
+            f"{' '.join(cmd)} || {{ echo \"Error: {cmd[0]} failed\"; exit 1; }}"
+            for cmd in commands
+        )
+        waves_steps = "\n".join(
+            f"    {' '.join(cmd)} || {{ echo \"Error: {cmd[0]} failed\"; exit 1; }}"
+            for cmd in backend.elaborate_commands("top", SimulationController.WAVES_SNAPSHOT, waves=True,
+                                                  sources=filelist)
+        )
+        
         compile_script = f"""#!/bin/bash
-# UVM compilation script for {context['module'].name}
+# UVM compilation script for {context['module'].name} ({backend.label})
 # Generated by VEGA on {context['timestamp']}
 
 echo "Compiling UVM testbench for {context['module'].name}..."
@@ -2152,30 +7738,11 @@ if [ -z "$UVM_HOME" ]; then
     echo "Warning: UVM_HOME environment variable not set"
 fi
 
-# Compile command
-xvlog -sv \\
-    -d UVM_NO_DPI \\
-    -i $UVM_HOME/src \\
-    {context['module'].name}_if.sv \\
-    {context['module'].name}_pkg.sv \\
-    {context['module'].name}_test.sv
-
-# Check compilation status
-if [ $? -ne 0 ]; then
-    echo "Error: Compilation failed"
-    exit 1
-fi
-
-# Elaborate
-xelab -debug typical \\
-    -timescale 1ns/1ps \\
-    -L uvm \\
-    {context['module'].name}_test \\
-    -s sim
+{steps}
 
-if [ $? -ne 0 ]; then
-    echo "Error: Elaboration failed"
-    exit 1
+# Debug-visible snapshot for re-running failing seeds with +DUMP (WAVES=1 ./compile_uvm.sh)
+if [ "$WAVES" = "1" ]; then
+{waves_steps}
 fi
 
 echo "Compilation completed successfully"
@@ -2212,53 +7779,62 @@ echo "Compilation completed successfully"
             messagebox.showerror("Preview Error", f"Could not preview file: {str(e)}")
     
     def preview_file(self, file_path):
-        """Shows preview of selected file"""
+        """Shows preview of selected file (paged, so any size opens immediately)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            self.preview_text.config(state='normal')
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(tk.END, content)
-            self.preview_text.config(state='disabled')
-            
+            self.preview_view.open(file_path)
         except Exception as e:
-            self.preview_text.config(state='normal')
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(tk.END, f"Error reading file: {str(e)}")
-            self.preview_text.config(state='disabled')
+            self.preview_view.show_message(f"Error reading file: {str(e)}")
     
     def export_project(self):
-        """Exports project as ZIP file"""
+        """Exports the generated environment as a ZIP or reproducible tar archive in the background
+        
+        ZIP archives get fixed timestamps when "Reproducible" is checked.
+        """
         if not self.generated_files:
             messagebox.showerror("Error", "Please generate the UVM environment first")
             return
+        if self.export_running:
+            messagebox.showinfo("Export", "An export is already running")
+            return
+        
+        default_name = f"{self.module_info.name}_uvm_tb_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        archive_path = filedialog.asksaveasfilename(
+            title="Export Project",
+            defaultextension=".zip",
+            initialfile=default_name,
+            filetypes=[
+                ("ZIP Archive", "*.zip"),
+                ("Reproducible tar.gz", "*.tar.gz"),
+                ("Reproducible tar.zst", "*.tar.zst"),
+                ("tar Archive", "*.tar"),
+                ("All Files", "*.*")
+            ]
+        )
+        if not archive_path:
+            return
         
         try:
-            default_name = f"{self.module_info.name}_uvm_tb_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            
-            zip_path = filedialog.asksaveasfilename(
-                title="Export Project as ZIP",
-                defaultextension=".zip",
-                initialname=default_name,
-                filetypes=[("ZIP Archive", "*.zip"), ("All Files", "*.*")]
-            )
-            
-            if not zip_path:
-                return
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in self.generated_files:
-                    arcname = Path(file_path).name
-                    zipf.write(file_path, arcname)
-            
-            messagebox.showinfo(
-                "Export Complete",
-                f"Project exported successfully to:\n{zip_path}"
-            )
-            
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export project: {str(e)}")
+            ProjectExporter.format_of(archive_path)
+        except ValueError as e:
+            messagebox.showerror("Export Error", str(e))
+            return
+        exporter = ProjectExporter(self.generated_files, self.output_dir.get(),
+                                   reproducible=self.reproducible_export.get())
+        self.export_running = True
+        
+        def execute():
+            try:
+                count = exporter.export(archive_path)
+                self.root.after(0, lambda: messagebox.showinfo(
+                    "Export Complete", f"{count} files exported successfully to:\n{archive_path}"))
+            except Exception as e:
+                message = str(e)
+                self.root.after(0, lambda: messagebox.showerror(
+                    "Export Error", f"Failed to export project: {message}"))
+            finally:
+                self.export_running = False
+        
+        threading.Thread(target=execute, daemon=True).start()
     
     def open_output_folder(self):
         """Opens output folder in file explorer"""
@@ -2284,65 +7860,23 @@ echo "Compilation completed successfully"
             messagebox.showerror("Error", f"Could not open folder: {str(e)}")
 
     def generate_system_tb(self):
-        """Generates a system testbench with UVM configuration"""
-        context = {
-            'hierarchy': self.module_hierarchy,
-            'config': self.system_test_config,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'top_name': self.module_hierarchy.top_level.name,
-            'uvm_required': True
-        }
-        
-        # Generates testbench with UVM includes
-        template_content = f"""// System testbench for {context['top_name']}
-        // Automatically generated on {context['timestamp']}
-
-        `timescale 1ns/1ps
-
-        // UVM package inclusion
-        `include "uvm_pkg.sv"
-        import uvm_pkg::*;
-
-        module {context['top_name']}_system_tb;
-            // Clock and reset
-            logic clk;
-            logic reset_n;
-            
-            // Interfaces
-            {context['top_name']}_if dut_if();
-            
-            // DUT instance
-            {context['top_name']} dut (
-                .clk(clk),
-                .reset_n(reset_n),
-                // Other connections...
-            );
-
-            // Clock generation
-            initial begin
-                clk = 0;
-                forever #10 clk = ~clk;
-            end
-            
-            // UVM environment
-            initial begin
-                // Configure UVM verbosity
-                uvm_top.set_report_verbosity_level(UVM_MEDIUM);
-                
-                // Configure interface in UVM database
-                uvm_config_db#(virtual {context['top_name']}_if)::set(null, "*", "dut_vif", dut_if);
-                
-                // Start test
-                run_test("{context['top_name']}_test");
-            end
-        endmodule
-        """
+        """Generates a system testbench with per-domain clocks and resets"""
+        if not self.module_hierarchy:
+            messagebox.showwarning("Warning", "Please load a project first")
+            return
         
-        output_file = Path(self.output_dir.get()) / f"{context['top_name']}_system_tb.sv"
-        with open(output_file, 'w') as f:
-            f.write(template_content)
+        context = TestbenchGenerator.system_context(self.module_hierarchy, self.system_test_config)
+        output_path = Path(self.output_dir.get())
+        output_path.mkdir(parents=True, exist_ok=True)
+        for template_name, output_name in TestbenchGenerator.system_plan(context['top_name']):
+            self._generate_file_from_template(template_name, output_name, context, output_path)
         
-        self.generated_files.append(str(output_file)) 
+        summary = "\n".join(
+            f"  {d.name}: {d.period_ns:g} ns{' (generated)' if d.generated else ''}, "
+            f"{len(d.modules)} module(s)" for d in context['domains']
+        )
+        messagebox.showinfo("Success", f"System testbench generated with {len(context['domains'])} "
+                            f"clock domain(s):\n{summary or '  none found'}")
 
     def save_project(self):
         """Saves the current project to a .vega file"""
@@ -2354,7 +7888,11 @@ echo "Compilation completed successfully"
             project_file = filedialog.asksaveasfilename(
                 title="Save Project As",
                 defaultextension=".vega",
-                filetypes=[("VEGA Project Files", "*.vega"), ("All Files", "*.*")],
+                filetypes=[
+                    ("VEGA Project Files", "*.vega"),
+                    ("VEGA Compact Project Files", f"*{ProjectDatabase.EXTENSION}"),
+                    ("All Files", "*.*")
+                ],
                 initialfile=f"{self.module_hierarchy.top_level.name}_project.vega"
             )
             
@@ -2367,46 +7905,17 @@ echo "Compilation completed successfully"
                     "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     "tool": "VEGA"
                 },
-                "hierarchy": {
-                    "top_level": {
-                        "name": self.module_hierarchy.top_level.name,
-                        "ports": [{
-                            "name": port.name,
-                            "direction": port.direction,
-                            "width": port.width,
-                            "description": port.description,
-                            "connected_to": port.connected_to
-                        } for port in self.module_hierarchy.top_level.ports],
-                        "parameters": self.module_hierarchy.top_level.parameters,
-                        "clock_signals": self.module_hierarchy.top_level.clock_signals,
-                        "reset_signals": self.module_hierarchy.top_level.reset_signals,
-                        "instances": self.module_hierarchy.top_level.instances
-                    },
-                    "submodules": {
-                        name: {
-                            "name": module.name,
-                            "ports": [{
-                                "name": port.name,
-                                "direction": port.direction,
-                                "width": port.width,
-                                "description": port.description,
-                                "connected_to": port.connected_to
-                            } for port in module.ports],
-                            "parameters": module.parameters,
-                            "clock_signals": module.clock_signals,
-                            "reset_signals": module.reset_signals,
-                            "instances": module.instances
-                        } for name, module in self.module_hierarchy.submodules.items()
-                    },
-                    "connections": self.module_hierarchy.connections,
-                    "file_mapping": self.module_hierarchy.file_mapping
-                },
+                "hierarchy": ProjectFile.hierarchy_to_dict(
+                    self.module_hierarchy, os.path.dirname(os.path.abspath(project_file))
+                ),
                 "config": {
                     "system_test": {
                         "enable_pipeline_verification": self.system_test_config.enable_pipeline_verification,
                         "check_interfaces": self.system_test_config.check_interfaces,
                         "generate_cross_coverage": self.system_test_config.generate_cross_coverage,
-                        "monitor_performance": self.system_test_config.monitor_performance
+                        "monitor_performance": self.system_test_config.monitor_performance,
+                        "clock_periods": self.system_test_config.clock_periods,
+                        "default_clock_period": self.system_test_config.default_clock_period
                     },
                     "custom_config": {
                         key: var.get() if hasattr(var, 'get') else var
@@ -2414,9 +7923,16 @@ echo "Compilation completed successfully"
                     }
                 }
             }
+            if self.graph_layout:
+                project_data["graph_layout"] = self.graph_layout
             
-            with open(project_file, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, indent=4)
+            if project_file.endswith(ProjectDatabase.EXTENSION):
+                ProjectDatabase.save(project_file, project_data["hierarchy"],
+                                     project_data["config"], project_data["metadata"],
+                                     layout=self.graph_layout)
+            else:
+                with open(project_file, 'w', encoding='utf-8') as f:
+                    json.dump(project_data, f, indent=4)
             
             messagebox.showinfo("Success", f"Project saved successfully to:\n{project_file}")
             
@@ -2482,6 +7998,13 @@ echo "Compilation completed successfully"
         )
         self.stop_btn.pack(side='left', padx=5)
         
+        self.verilator_btn = ttk.Button(
+            control_frame,
+            text="Verilator Fast-Path",
+            command=self.run_verilator_fast_path
+        )
+        self.verilator_btn.pack(side='left', padx=5)
+        
         self.clear_btn = ttk.Button(
             control_frame,
             text="Clear Console",
@@ -2489,6 +8012,17 @@ echo "Compilation completed successfully"
         )
         self.clear_btn.pack(side='right')
         
+        simulator_box = ttk.Combobox(
+            control_frame,
+            textvariable=self.simulator,
+            values=['auto'] + list(SIMULATOR_BACKENDS),
+            state='readonly',
+            width=10
+        )
+        simulator_box.pack(side='right', padx=5)
+        simulator_box.bind('<<ComboboxSelected>>', lambda e: setattr(self, 'sim_controller', None))
+        ttk.Label(control_frame, text="Simulator:").pack(side='right')
+        
         # Reports Tab
         report_frame = ttk.Frame(exec_notebook)
         exec_notebook.add(report_frame, text="Reports")
@@ -2542,7 +8076,8 @@ echo "Compilation completed successfully"
         
         # Create simulation controller if it doesn't exist
         if self.sim_controller is None:
-            self.sim_controller = SimulationController(output_dir)
+            self.sim_controller = SimulationController(output_dir, simulator=self.simulator.get())
+        self.append_to_console(f"Simulator: {self.sim_controller.backend.label}")
         
         # Start compilation in a separate thread
         threading.Thread(
@@ -2563,7 +8098,7 @@ echo "Compilation completed successfully"
         self.append_to_console(message)
         
         if "Error" in message:
-            self.after(100, lambda: messagebox.showerror("Compilation Error", message))
+            self.root.after(100, lambda: messagebox.showerror("Compilation Error", message))
             self.toggle_simulation_buttons(compiling=False)
         
         if "Compilation completed" in message:
@@ -2571,9 +8106,14 @@ echo "Compilation completed successfully"
             self.toggle_simulation_buttons(compiling=False)
             self.append_to_console("Compilation completed successfully!")
 
-    def toggle_simulation_buttons(self, compiling=False):
+    def toggle_simulation_buttons(self, compiling=False, running=False):
         """Updates the state of simulation buttons"""
-        if compiling:
+        if running:
+            self.compile_btn.config(state='disabled')
+            self.run_gui_btn.config(state='disabled')
+            self.run_batch_btn.config(state='disabled')
+            self.stop_btn.config(state='normal')
+        elif compiling:
             self.compile_btn.config(state='disabled')
             self.run_gui_btn.config(state='disabled')
             self.run_batch_btn.config(state='disabled')
@@ -2617,35 +8157,87 @@ echo "Compilation completed successfully"
 
         try:
             self.simulation_running = True
-            
-            # Simulation command with UVM options
-            sim_cmd = [
-                'xsim', 'sim',
-                '-gui' if gui else '-R',
-                '-testplusarg', 'UVM_TESTNAME=basic_test',
-                '-testplusarg', f'UVM_VERBOSITY={self.get_uvm_verbosity()}',
-                '-sv_seed', str(self.get_simulation_seed())
-            ]
-            
-            self.append_to_console(f"Running: {' '.join(sim_cmd)}")
-            
-            process = subprocess.Popen(
-                sim_cmd,
-                cwd=self.output_dir.get(),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
+            self.sim_controller.run_simulation(
+                gui=gui,
+                callback=self.append_to_console,
+                plusargs={
+                    'UVM_TESTNAME': self.get_uvm_testname(),
+                    'UVM_VERBOSITY': self.get_uvm_verbosity()
+                },
+                seed=self.get_simulation_seed(),
+                wait=True
             )
-            
-            for line in iter(process.stdout.readline, ''):
-                self.append_to_console(line.strip())
-                
         except Exception as e:
             self.append_to_console(f"Simulation error: {str(e)}")
         finally:
             self.simulation_running = False
             self.toggle_simulation_buttons(running=False)
 
+    def generate_verilator_tb(self):
+        """Generates the self-contained Verilator harness for the analyzed module"""
+        output_path = Path(self.output_dir.get())
+        output_path.mkdir(exist_ok=True)
+        
+        context = self.prepare_generation_context()
+        output_name = f"{context['module'].name}_vl_tb.sv"
+        self._generate_file_from_template('verilator_tb.sv.j2', output_name, context, output_path)
+        self.update_file_list()
+        return output_path / output_name
+    
+    def run_verilator_fast_path(self):
+        """Builds the Verilator harness and runs smoke/random scenarios on all cores"""
+        if not self.module_info:
+            messagebox.showerror("Error", "Please analyze a module first")
+            return
+        
+        try:
+            harness = self.generate_verilator_tb()
+        except Exception as e:
+            self.append_to_console(f"Error generating Verilator harness: {str(e)}")
+            return
+        
+        controller = SimulationController(
+            harness.parent,
+            simulator='verilator',
+            top=f"{self.module_info.name}_vl_tb",
+            sources=[harness.name, str(Path(self.dut_path.get()).resolve())]
+        )
+        if not controller.check_simulator_installation():
+            messagebox.showerror("Error", "Verilator not found in PATH")
+            return
+        
+        scenarios = [s for s in ('smoke', 'random') if self.scenario_vars[s].get()] or ['smoke']
+        base_seed = self.get_simulation_seed()
+        runs = [{'scenario': scenario, 'seed': base_seed + i,
+                 'plusargs': {'NUM_TESTS': self.custom_config['num_tests'].get()}}
+                for scenario in scenarios for i in range(os.cpu_count() or 1)]
+        
+        self.clear_console()
+        self.toggle_simulation_buttons(running=True)
+        
+        def execute():
+            try:
+                if not controller.compile(callback=self.append_to_console, wait=True):
+                    return
+                results = controller.run_regression(runs, callback=self.append_to_console)
+                for scenario in scenarios:
+                    scenario_runs = [r for r in results if r['scenario'] == scenario]
+                    self.test_results.append(TestResult(
+                        scenario=scenario,
+                        passed=sum(r['passed'] for r in scenario_runs),
+                        failed=sum(not r['passed'] for r in scenario_runs),
+                        execution_time=sum(r['execution_time'] for r in scenario_runs)
+                    ))
+                self.append_to_console(
+                    f"Verilator fast-path: {sum(r['passed'] for r in results)}/{len(results)} runs passed")
+                triage = FailureTriage(controller.backend)
+                triage.add_results(results)
+                self.root.after(0, self.show_failure_triage, triage.report())
+            finally:
+                self.toggle_simulation_buttons(running=False)
+        
+        threading.Thread(target=execute, daemon=True).start()
+
     def append_to_console(self, text):
         """Adds text to console"""
         self.console_text.config(state='normal')
@@ -2697,8 +8289,188 @@ echo "Compilation completed successfully"
         # Implementation similar to report export
         pass
 
-def main():
+def parse_args(argv=None):
+    """Command line: no arguments starts the GUI"""
+    parser = argparse.ArgumentParser(prog="vega", description="VEGA - Verification Environment Generator Assembler")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record pipeline spans and write them on exit (*.speedscope.json or Chrome trace)")
+    parser.add_argument("--profile", choices=Tracer.PROFILERS, help="also capture a profile (requires --trace)")
+    commands = parser.add_subparsers(dest="command")
+    
+    watch = commands.add_parser("watch", help="regenerate the testbench whenever the RTL changes")
+    watch.add_argument("dut", help="RTL file of the design under test")
+    watch.add_argument("-o", "--output", default="uvm_tb_generated", help="output directory")
+    watch.add_argument("-I", "--include-dir", action="append", default=[], help="include search directory")
+    watch.add_argument("-D", "--define", action="append", default=[], help="macro definition NAME[=VALUE]")
+    watch.add_argument("--registers", metavar="SPEC", help="register spec (CSV or IP-XACT) for the register model")
+    watch.add_argument("--compile", action="store_true", help="recompile after regenerating")
+    watch.add_argument("--simulator", default="auto", choices=["auto"] + list(SIMULATOR_BACKENDS))
+    watch.add_argument("--interval", type=float, default=0.25, help="polling interval in seconds")
+    watch.add_argument("--debounce", type=float, default=0.3, help="quiet time before acting on changes")
+    
+    serve = commands.add_parser("serve", help="run the generator as a daemon with a JSON-RPC API")
+    serve.add_argument("--port", type=int, default=8765, help="localhost HTTP port")
+    serve.add_argument("--socket", help="listen on this Unix socket instead of HTTP")
+    serve.add_argument("-I", "--include-dir", action="append", default=[], help="include search directory")
+    serve.add_argument("-D", "--define", action="append", default=[], help="macro definition NAME[=VALUE]")
+    serve.add_argument("-j", "--jobs", type=int, default=None, help="concurrent generate/regress jobs")
+    serve.add_argument("--queue", type=int, default=16, help="requests allowed to wait for a job slot")
+    
+    bench = commands.add_parser("bench", help="time the analyzer, generator, persistence and report pipelines")
+    bench.add_argument("--quick", action="store_true", help="small fixtures for a fast check")
+    bench.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    bench.add_argument("-k", "--filter", help="only benchmarks whose name contains this text")
+    bench.add_argument("-o", "--output", help="write results as JSON (usable as a baseline)")
+    bench.add_argument("--baseline", help="results JSON to compare against")
+    bench.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    
+    rank = commands.add_parser("rank", help="minimize the nightly regression from per-run coverage logs")
+    rank.add_argument("log_dir", help="directory of <scenario>_<seed>.log regression logs")
+    rank.add_argument("-o", "--output", default="nightly_seeds.txt", help="nightly run list to write")
+    rank.add_argument("--weights", help="current scenario weights NAME=WEIGHT,... (default: the verification plan's)")
+    
+    triage = commands.add_parser("triage", help="cluster failing regression runs by error signature")
+    triage.add_argument("log_dir", help="directory of <scenario>_<seed>.log regression logs")
+    triage.add_argument("--simulator", default="auto", choices=["auto"] + list(SIMULATOR_BACKENDS),
+                        help="log dialect for simulator errors")
+    triage.add_argument("-o", "--output", help="write the clusters as JSON")
+    args = parser.parse_args(argv)
+    if args.profile and not args.trace:
+        parser.error("--profile requires --trace")
+    return args
+
+def run_watch(args):
+    """Watch mode without the GUI"""
+    dut_dir = os.path.dirname(os.path.abspath(args.dut))
+    preprocessor = SVPreprocessor([dut_dir] + args.include_dir, SVPreprocessor.parse_define_args(args.define))
+    controller = SimulationController(args.output, simulator=args.simulator) if args.compile else None
+    config = TestbenchGenerator.make_config({'register_spec': os.path.abspath(args.registers)} if args.registers else None)
+    session = WatchSession(args.dut, args.output, config,
+                           preprocessor=preprocessor, controller=controller)
+    written = session.generate_all()
+    print(f"Generated {len(written)} files for {session.module_info.name} in {args.output}")
+    
+    watcher = RTLWatcher(session.watch_paths(), session.handle, args.interval, args.debounce, ignore=[args.output])
+    print(f"Watching {', '.join(watcher.paths)} (Ctrl+C to stop)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nWatch mode stopped")
+
+def run_serve(args):
+    """Generator daemon without the GUI"""
+    service = VegaService(args.include_dir, SVPreprocessor.parse_define_args(args.define),
+                          max_jobs=args.jobs, max_queue=args.queue)
+    server = service.make_server(port=args.port, socket_path=args.socket)
+    address = args.socket or f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"VEGA service listening on {address} ({service.max_jobs} job slots, Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nService stopped")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+def run_bench(args):
+    """Benchmark suite; exits with status 1 if a benchmark regressed against the baseline"""
+    work_dir = tempfile.mkdtemp(prefix="vega_bench_")
+    try:
+        results = BenchmarkSuite(work_dir, quick=args.quick, repeat=args.repeat).run(args.filter)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.output}")
+    if not args.baseline:
+        return
+    
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows = BenchmarkSuite.compare(results, baseline, args.threshold)
+    print(f"\n{'Benchmark':<28} {'Baseline':>12} {'Current':>12} {'Ratio':>7}  Status")
+    for row in rows:
+        saved = f"{row['baseline'] * 1000:.2f} ms" if row['baseline'] is not None else "-"
+        ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else "-"
+        print(f"{row['name']:<28} {saved:>12} {row['median'] * 1000:9.2f} ms {ratio:>7}  {row['status']}")
+    regressions = [row['name'] for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+def run_rank(args):
+    """Coverage-driven seed selection without the GUI"""
+    ranker = CoverageRanker()
+    if not ranker.load_logs(args.log_dir):
+        print(f"No [COVBIN] coverage found in {args.log_dir}")
+        sys.exit(1)
+    selected = ranker.select()
+    summary = ranker.summary(selected)
+    CoverageRanker.write_nightly(args.output, selected, summary)
+    print(f"{summary['selected']} of {summary['runs']} runs keep {summary['covered']}/{summary['bins']} bins "
+          f"at {summary['selected_cost']:g} of {summary['cost']:g} cost units; list written to {args.output}")
+    
+    weights = VerificationPlan().test_weights
+    if args.weights:
+        weights = {name.strip(): int(value) for name, _, value in
+                   (item.partition('=') for item in args.weights.split(',')) if value.strip()}
+    print("Scenario weights: " + ", ".join(f"{name} {weights.get(name, 0)} -> {weight}"
+                                           for name, weight in ranker.reweight(weights).items()))
+    if summary['holes']:
+        print(f"{len(summary['holes'])} bin(s) never hit: {', '.join(summary['holes'][:10])}"
+              + (" ..." if len(summary['holes']) > 10 else ""))
+
+def run_triage(args):
+    """Failure triage without the GUI"""
+    report = FailureTriage(get_simulator_backend(args.simulator)).scan(args.log_dir).report()
+    print(f"{report['failed']} of {report['runs']} runs failed, {len(report['clusters'])} signature(s)")
+    for cluster in report['clusters']:
+        representative = cluster['representative']
+        print(f"\n{cluster['count']:6d}  {cluster['signature']}")
+        print(f"        scenarios: {', '.join(f'{name} {count}' for name, count in cluster['scenarios'].items())}")
+        print(f"        reproduce: {representative['scenario']} seed {representative['seed']} "
+              f"({representative['log']}:{representative['line']})")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"\nClusters written to {args.output}")
+
+def main(argv=None):
     """Main application function"""
+    args = parse_args(argv)
+    if not args.trace:
+        run_command(args)
+        return
+    
+    TRACER.start(args.profile)
+    try:
+        run_command(args)
+    finally:
+        TRACER.stop()
+        if TRACER.events:
+            print(f"Trace written to {', '.join(TRACER.write(args.trace))}")
+
+def run_command(args):
+    """Dispatches to a subcommand, or starts the GUI"""
+    if args.command == "watch":
+        run_watch(args)
+        return
+    if args.command == "serve":
+        run_serve(args)
+        return
+    if args.command == "bench":
+        run_bench(args)
+        return
+    if args.command == "rank":
+        run_rank(args)
+        return
+    if args.command == "triage":
+        run_triage(args)
+        return
+    
     root = tk.Tk()
     root.title("VEGA - Verification Environment Generator Assembler")
     